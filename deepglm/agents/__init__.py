@@ -1,5 +1,7 @@
 """Agents module for DeepGLM Android Automation Agent."""
 
+from deepglm.agents.checkpointer import SqliteCheckpointer  # noqa: F401
 from deepglm.agents.main_agent import create_android_agent  # noqa: F401
+from deepglm.agents.router import IntentRouter  # noqa: F401
 
-__all__ = ["create_android_agent"]
+__all__ = ["create_android_agent", "IntentRouter", "SqliteCheckpointer"]
@@ -0,0 +1,517 @@
+"""SQLite checkpointer for durable, resumable agent runs.
+
+Every graph step is persisted, so a run interrupted by a crash or a provider
+outage can continue from its last completed step instead of starting over
+(see `main.py --resume`). Only the SQLite module from the standard library
+is used.
+
+Channel values are stored once per channel version, so a step that only
+appends a message does not rewrite the rest of the state. Large payloads
+(base64 screenshots in message content, raw image bytes) are moved out of
+line into a table keyed by SHA-256, which keeps checkpoints small and stores
+identical screenshots once across steps and threads. Each thread records the
+payloads it references; deleting the last thread that uses a payload deletes
+the payload too.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+# Values at least this large are stored out of line by content hash
+DEFAULT_PAYLOAD_THRESHOLD = 32 * 1024
+
+_PAYLOAD_PREFIX = "deepglm-payload:"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channel_values (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS payloads (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payload_refs (
+    thread_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (thread_id, hash)
+);
+CREATE INDEX IF NOT EXISTS payload_refs_hash ON payload_refs (hash);
+"""
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """Persist LangGraph checkpoints to a SQLite database.
+
+    Args:
+        path: Database file (parent directories are created); ":memory:"
+            keeps everything in memory
+        payload_threshold: Minimum size in bytes of a string or bytes value
+            stored out of line by content hash
+        serde: Serializer for checkpoint data (defaults to LangGraph's)
+
+    Example:
+        >>> checkpointer = SqliteCheckpointer(".deepglm/checkpoints.db")
+        >>> agent = create_android_agent(checkpointer=checkpointer)
+        >>> agent.invoke(inputs, {"configurable": {"thread_id": "task-1"}})
+    """
+
+    def __init__(
+        self,
+        path: str,
+        payload_threshold: int = DEFAULT_PAYLOAD_THRESHOLD,
+        serde: SerializerProtocol | None = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.payload_threshold = payload_threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "SqliteCheckpointer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # Out-of-line payloads
+
+    def _offload(self, value: Any, payloads: dict[str, bytes]) -> Any:
+        """Replace large strings and bytes with content-hash references."""
+        if isinstance(value, (str, bytes)) and len(value) >= self.payload_threshold:
+            kind, data = ("s", value.encode()) if isinstance(value, str) else ("b", value)
+            digest = hashlib.sha256(data).hexdigest()
+            payloads[digest] = data
+            return f"{_PAYLOAD_PREFIX}{kind}:{digest}"
+        if isinstance(value, BaseMessage):
+            content = self._offload(value.content, payloads)
+            if content is value.content:
+                return value
+            return value.model_copy(update={"content": content})
+        if isinstance(value, dict):
+            mapped = {k: self._offload(v, payloads) for k, v in value.items()}
+            return mapped if any(mapped[k] is not value[k] for k in value) else value
+        if isinstance(value, list) or type(value) is tuple:
+            items = [self._offload(v, payloads) for v in value]
+            if all(a is b for a, b in zip(items, value)):
+                return value
+            return items if isinstance(value, list) else tuple(items)
+        return value
+
+    def _restore(self, value: Any) -> Any:
+        """Inverse of _offload."""
+        if isinstance(value, str) and value.startswith(_PAYLOAD_PREFIX):
+            kind, _, digest = value[len(_PAYLOAD_PREFIX):].partition(":")
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM payloads WHERE hash = ?", (digest,)
+                ).fetchone()
+            if row is None:
+                logger.warning(f"Checkpoint payload {digest} is missing")
+                return value
+            return row[0].decode() if kind == "s" else bytes(row[0])
+        if isinstance(value, BaseMessage):
+            content = self._restore(value.content)
+            if content is value.content:
+                return value
+            return value.model_copy(update={"content": content})
+        if isinstance(value, dict):
+            mapped = {k: self._restore(v) for k, v in value.items()}
+            return mapped if any(mapped[k] is not value[k] for k in value) else value
+        if isinstance(value, list) or type(value) is tuple:
+            items = [self._restore(v) for v in value]
+            if all(a is b for a, b in zip(items, value)):
+                return value
+            return items if isinstance(value, list) else tuple(items)
+        return value
+
+    def _dumps(self, value: Any, payloads: dict[str, bytes]) -> tuple[str, bytes]:
+        return self.serde.dumps_typed(self._offload(value, payloads))
+
+    def _loads(self, value_type: str, value: bytes) -> Any:
+        return self._restore(self.serde.loads_typed((value_type, value)))
+
+    def _store_payloads(self, thread_id: str, payloads: dict[str, bytes]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO payloads (hash, data) VALUES (?, ?)", payloads.items()
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO payload_refs (thread_id, hash) VALUES (?, ?)",
+            [(thread_id, digest) for digest in payloads],
+        )
+
+    # Reads
+
+    def _load_tuple(self, row: tuple) -> CheckpointTuple:
+        (
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            parent_id,
+            checkpoint_type,
+            checkpoint_data,
+            metadata_type,
+            metadata_data,
+        ) = row
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+        with self._lock:
+            value_rows = [
+                self._conn.execute(
+                    "SELECT value_type, value FROM channel_values WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (thread_id, checkpoint_ns, channel, str(version)),
+                ).fetchone()
+                for channel, version in checkpoint["channel_versions"].items()
+            ]
+            write_rows = self._conn.execute(
+                "SELECT task_id, channel, value_type, value FROM writes WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+        channel_values = {
+            channel: self._loads(value_row[0], value_row[1])
+            for channel, value_row in zip(checkpoint["channel_versions"], value_rows)
+            if value_row is not None and value_row[0] != "empty"
+        }
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self._loads(value_type, value))
+                for task_id, channel, value_type, value in write_rows
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get a checkpoint, or the latest one for the thread if no ID is given.
+
+        Args:
+            config: Config with thread_id and optionally checkpoint_ns/checkpoint_id
+
+        Returns:
+            The checkpoint tuple, or None if there is no matching checkpoint
+        """
+        configurable = config["configurable"]
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: list[Any] = [configurable["thread_id"], configurable.get("checkpoint_ns", "")]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return self._load_tuple(row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first.
+
+        Args:
+            config: Restrict to this thread (and namespace/checkpoint, if set)
+            filter: Metadata key/value pairs that must all match
+            before: Only checkpoints older than this one
+            limit: Maximum number of checkpoints to return
+
+        Yields:
+            Matching checkpoint tuples
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        if config:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        query = "SELECT * FROM checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._load_tuple(row)
+
+    # Writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and the channel values that changed in it.
+
+        Args:
+            config: Config of the parent checkpoint
+            checkpoint: The checkpoint to save
+            metadata: Metadata for the checkpoint
+            new_versions: Channel versions written by this step
+
+        Returns:
+            Config pointing at the saved checkpoint
+        """
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        data = checkpoint.copy()
+        values: dict[str, Any] = data.pop("channel_values")  # type: ignore[misc]
+        payloads: dict[str, bytes] = {}
+        value_rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                channel,
+                str(version),
+                *(self._dumps(values[channel], payloads) if channel in values else ("empty", b"")),
+            )
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(data)
+        metadata_type, metadata_data = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._store_payloads(thread_id, payloads)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO channel_values VALUES (?, ?, ?, ?, ?, ?)", value_rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_data,
+                    metadata_type,
+                    metadata_data,
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes of a completed task, so it is not rerun on resume.
+
+        Args:
+            config: Config of the checkpoint the task ran from
+            writes: (channel, value) pairs written by the task
+            task_id: Identifier of the task
+            task_path: Path of the task
+        """
+        configurable = config["configurable"]
+        payloads: dict[str, bytes] = {}
+        rows = [
+            (
+                configurable["thread_id"],
+                configurable.get("checkpoint_ns", ""),
+                configurable["checkpoint_id"],
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self._dumps(value, payloads),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._store_payloads(configurable["thread_id"], payloads)
+            # Special writes (errors, interrupts) are replaced; regular ones are
+            # kept, so a task retried after a crash cannot overwrite them
+            for upsert, negative in (("REPLACE", True), ("IGNORE", False)):
+                self._conn.executemany(
+                    f"INSERT OR {upsert} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in rows if (row[4] < 0) == negative],
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes for a thread.
+
+        Out-of-line payloads no other thread references are deleted as well.
+
+        Args:
+            thread_id: The thread to delete
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            hashes = [
+                digest
+                for (digest,) in self._conn.execute(
+                    "SELECT hash FROM payload_refs WHERE thread_id = ?", (thread_id,)
+                )
+            ]
+            for table in ("checkpoints", "channel_values", "writes", "payload_refs"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.executemany(
+                "DELETE FROM payloads WHERE hash = ? "
+                "AND NOT EXISTS (SELECT 1 FROM payload_refs WHERE payload_refs.hash = payloads.hash)",
+                [(digest,) for digest in hashes],
+            )
+
+    # Async API (SQLite calls are short; run them inline)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Async version of get_tuple."""
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async version of list."""
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async version of put."""
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async version of put_writes."""
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async version of delete_thread."""
+        self.delete_thread(thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        """Zero-padded versions, so they sort correctly as text."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}"
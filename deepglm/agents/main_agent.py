@@ -5,33 +5,132 @@ with all tools and middleware.
 """
 
 import logging
+from collections.abc import Callable, Sequence
 
 from deepagents import create_deep_agent
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.tools import BaseTool
+from langchain_core.utils import convert_to_secret_str
 from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
+from deepglm.agents.subagents import OperatorFanOut, resolve_operator_tools
 from deepglm.config import prompts, settings
+from deepglm.middleware import (
+    Endpoint,
+    ModelRouterMiddleware,
+    PerceptionPrefetchMiddleware,
+    PromptCacheMiddleware,
+    ToolConcurrencyMiddleware,
+    TracingMiddleware,
+    compact_tool,
+)
+from deepglm.tools import adb, vision
 from deepglm.tools.internet import internet_search
 
 logger = logging.getLogger(__name__)
 
+# Side-effect-free tools; several calls in one turn run concurrently
+READ_ONLY_TOOLS: list[Callable] = [
+    internet_search,
+    adb.get_devices,
+    adb.get_device_info,
+    adb.get_battery_level,
+    adb.get_focused_activity,
+    adb.list_packages,
+    adb.capture_screen,
+    adb.dump_ui_hierarchy,
+    adb.check_logcat,
+    vision.detect_ui_elements,
+    vision.capture_and_analyze,
+]
 
-def create_android_agent():
+# Tools that change device state; ordered per device within a turn
+MUTATING_TOOLS: list[Callable] = [
+    adb.tap,
+    adb.swipe,
+    adb.scroll_to,
+    adb.input_text,
+    adb.press_key,
+    adb.launch_app,
+]
+
+
+def _build_endpoints(streaming: bool = False) -> list[Endpoint]:
+    """Create one chat model per configured OpenAI-compatible endpoint.
+
+    The primary endpoint comes from OPENAI_BASE_URL/OPENAI_MODEL; entries in
+    OPENAI_BASE_URLS are added after it and may override the model name.
+    Each of those uses its OPENAI_API_KEYS entry, or OPENAI_API_KEY if it
+    has none.
+
+    Args:
+        streaming: Stream responses (with usage), so time to first token
+            can be measured
+    """
+    entries = [(settings.OPENAI_BASE_URL, settings.OPENAI_MODEL, settings.OPENAI_API_KEY)]
+    keys = settings.OPENAI_API_KEYS
+    for i, entry in enumerate(settings.OPENAI_BASE_URLS):
+        base_url, _, model_name = entry.partition("|")
+        api_key = keys[i] if i < len(keys) and keys[i] else settings.OPENAI_API_KEY
+        entries.append((base_url, model_name or settings.OPENAI_MODEL, api_key))
+    return [
+        Endpoint(
+            name=base_url,
+            model=ChatOpenAI(
+                model=model_name,
+                api_key=convert_to_secret_str(api_key),
+                base_url=base_url,
+                streaming=streaming,
+                # None keeps the provider default when not streaming
+                stream_usage=True if streaming else None,
+            ),
+        )
+        for base_url, model_name, api_key in entries
+    ]
+
+
+def create_android_agent(
+    middleware: Sequence[AgentMiddleware] = (),
+    checkpointer: BaseCheckpointSaver | None = None,
+):
     """Create and configure the Android automation agent.
 
     This function sets up the main agent with:
     - Configured LLM model from settings
-    - Available tools (currently only internet_search)
+    - Read-only tools (internet_search, device queries, screen capture)
+    - Mutating device tools (tap, swipe, scroll, input, keys, app launch)
     - System prompt for Android automation
-    - No middleware yet (will be added in Phase 3)
+    - ToolConcurrencyMiddleware, so reads in one turn run in parallel
+      while device actions keep their order per device
+    - PerceptionPrefetchMiddleware, which captures the next observation
+      in the background after every device action
+    - ModelRouterMiddleware when several endpoints are configured
+      (OPENAI_BASE_URLS), routing each call of the agent and of its
+      operators to the fastest healthy one
+    - PromptCacheMiddleware, which warns when the cacheable prompt prefix
+      changes and records the provider's cache-hit tokens per call
+    - TracingMiddleware when TRACE_PATH is set, recording a span per
+      model call, tool call and subagent hop
+    - run_on_devices, which runs android-operator agents on several
+      devices in parallel (see OperatorFanOut)
+
+    Every model call starts with the same bytes: the system prompt from
+    config/prompts.py, then the tool schemas in the fixed order below (the
+    task tool's subagent spec included); only the conversation grows after
+    them, so the provider can serve the prefix from its prompt cache. With
+    COMPACT_TOOL_DESCRIPTIONS the device tools use shortened descriptions.
+
+    Args:
+        middleware: Additional middleware appended after the built-in stack
+            (e.g. for instrumentation in tests and load runs)
+        checkpointer: Saver that persists every graph step (e.g.
+            SqliteCheckpointer); invocations then need a thread_id in
+            config["configurable"] and can be resumed from the last step
 
     Returns:
         Configured agent instance ready for invocation
 
-    Note:
-        As of Phase 1, this agent has limited functionality since
-        ADB tools are placeholder implementations. The agent can
-        perform web research but cannot yet control Android devices.
-
     Example:
         >>> agent = create_android_agent()
         >>> result = agent.invoke({"messages": [{"role": "user", "content": "Hello"}]})
@@ -41,22 +140,56 @@ def create_android_agent():
 
     # Initialize model with configuration from settings
     logger.debug(f"Initializing model: {settings.OPENAI_MODEL}")
-    model = ChatOpenAI(
-        model=settings.OPENAI_MODEL,
-        api_key=settings.OPENAI_API_KEY,
-        base_url=settings.OPENAI_BASE_URL,
-    )
+    endpoints = _build_endpoints(streaming=settings.TRACE_PATH is not None)
+    model = endpoints[0].model
+
+    mutating_names = [t.__name__ for t in MUTATING_TOOLS]
+    agent_middleware: list[AgentMiddleware] = [
+        ToolConcurrencyMiddleware(mutating_tools=mutating_names),
+        PerceptionPrefetchMiddleware(adb.observation_prefetcher, mutating_tools=mutating_names),
+    ]
+    operator_middleware: list[AgentMiddleware] = []
+    if len(endpoints) > 1:
+        logger.debug(f"Routing model calls across {len(endpoints)} endpoints")
+        # Shared with the operators, so they use the same endpoint statistics
+        router = ModelRouterMiddleware(endpoints, hedge_percentile=settings.LLM_HEDGE_PERCENTILE)
+        agent_middleware.append(router)
+        operator_middleware.append(router)
+    # After the router, so usage is recorded per endpoint attempt
+    agent_middleware.append(PromptCacheMiddleware("main agent"))
+    operator_middleware.append(PromptCacheMiddleware("android-operator"))
+    if settings.TRACE_PATH:
+        # Innermost of the built-ins: one span per routed model attempt, and
+        # tool spans exclude time spent waiting for same-device ordering
+        logger.info(f"Writing agent trace to {settings.TRACE_PATH}")
+        tracer = TracingMiddleware(
+            settings.TRACE_PATH,
+            trace_format="chrome" if settings.TRACE_PATH.endswith(".json") else "jsonl",
+            profile_tools=settings.TRACE_PROFILE_TOOLS,
+        )
+        agent_middleware.append(tracer)
+        operator_middleware.append(tracer)
+    agent_middleware.extend(middleware)
 
-    # Collect available tools
-    # Note: ADB tools are not included yet as they're placeholder implementations
-    tools = [internet_search]
+    # Collect available tools; the order is part of the cached prompt prefix
+    operator_functions = resolve_operator_tools()
+    operator_tools: list[BaseTool | Callable] = list(operator_functions)
+    if settings.COMPACT_TOOL_DESCRIPTIONS:
+        operator_tools = [compact_tool(t) for t in operator_functions]
+    fanout = OperatorFanOut(model, operator_tools, mutating_names, middleware=operator_middleware)
+    functions: list[Callable] = [*READ_ONLY_TOOLS, *MUTATING_TOOLS, fanout.as_tool()]
+    tools: list[BaseTool | Callable] = list(functions)
+    if settings.COMPACT_TOOL_DESCRIPTIONS:
+        tools = [compact_tool(t) for t in functions]
     logger.debug(f"Configured {len(tools)} tools")
 
-    # Create the agent with system prompt and tools
+    # Create the agent with system prompt, tools and middleware
     agent = create_deep_agent(
         model=model,
         tools=tools,
         system_prompt=prompts.MAIN_AGENT_PROMPT,
+        middleware=agent_middleware,
+        checkpointer=checkpointer,
     )
 
     logger.info("Android automation agent created successfully")
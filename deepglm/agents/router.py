@@ -0,0 +1,181 @@
+"""Deterministic fast-path intent router.
+
+Many requests are trivial and unambiguous ("open settings", "go home",
+"press back", "battery level?"). Running them through the full deep agent
+costs a multi-second model call just to pick an obvious tool. This router
+recognizes those requests with fixed patterns and executes the matching
+ADB tool directly; anything it does not fully understand falls through to
+the agent.
+"""
+
+import logging
+import re
+from collections.abc import Callable
+
+from deepglm.exceptions import ToolExecutionError
+from deepglm.tools import adb
+
+logger = logging.getLogger(__name__)
+
+# Common app names whose package name does not contain the spoken name
+APP_ALIASES: dict[str, str] = {
+    "camera": "com.android.camera2",
+    "chrome": "com.android.chrome",
+    "clock": "com.google.android.deskclock",
+    "contacts": "com.google.android.contacts",
+    "files": "com.google.android.documentsui",
+    "gmail": "com.google.android.gm",
+    "maps": "com.google.android.apps.maps",
+    "messages": "com.google.android.apps.messaging",
+    "phone": "com.google.android.dialer",
+    "photos": "com.google.android.apps.photos",
+    "play store": "com.android.vending",
+    "settings": "com.android.settings",
+}
+
+# Package name segments that never identify an app on their own
+_GENERIC_SEGMENTS = {"com", "org", "net", "android", "google", "apps", "app", "mobile"}
+
+_POLITE_RE = re.compile(r"^(?:please\s+|can you\s+|could you\s+)+|\s*(?:please)?[.!?]*$")
+_OPEN_RE = re.compile(r"^(?:open|launch|start|run)\s+(?:the\s+)?(?P<app>.+?)(?:\s+app)?$")
+_HOME_RE = re.compile(r"^(?:(?:go|return|navigate)\s+(?:to\s+)?(?:the\s+)?|press\s+)?home(?:\s+screen)?$")
+_BACK_RE = re.compile(r"^(?:(?:press|hit|tap)\s+(?:the\s+)?back(?:\s+button)?|go\s+back|back)$")
+_BATTERY_RE = re.compile(
+    r"^(?:(?:what(?:'s|\s+is)|show|get|check)\s+(?:me\s+)?(?:the\s+)?)?"
+    r"battery(?:\s+(?:level|percentage|status))?$"
+)
+
+
+def _normalize(query: str) -> str:
+    """Lowercase, collapse whitespace and strip politeness and punctuation."""
+    text = " ".join(query.lower().split())
+    return _POLITE_RE.sub("", text)
+
+
+def build_package_index(packages: list[str]) -> dict[str, list[str]]:
+    """Map spoken app names to the installed packages that could mean them.
+
+    Full package names and each distinctive segment are indexed, so
+    "com.google.android.youtube" is found by "youtube". Aliases from
+    APP_ALIASES are added for installed packages.
+
+    Args:
+        packages: Installed package names
+
+    Returns:
+        Mapping of lowercase name to candidate package names
+    """
+    index: dict[str, list[str]] = {}
+    for package in packages:
+        index.setdefault(package.lower(), []).append(package)
+        for segment in package.lower().split("."):
+            if segment and segment not in _GENERIC_SEGMENTS:
+                index.setdefault(segment, []).append(package)
+    installed = set(packages)
+    for name, package in APP_ALIASES.items():
+        if package in installed:
+            index[name] = [package]
+    return index
+
+
+class IntentRouter:
+    """Route trivial commands straight to ADB tools, bypassing the LLM.
+
+    Args:
+        device_id: Device to act on. If None, the router only handles a
+            request when exactly one device is connected.
+
+    Example:
+        >>> router = IntentRouter()
+        >>> router.route("go home")
+        'Pressed HOME on emulator-5554.'
+        >>> router.route("Find me a good pizza place") is None
+        True
+    """
+
+    def __init__(self, device_id: str | None = None) -> None:
+        self.device_id = device_id
+        self._package_index: dict[str, dict[str, list[str]]] = {}
+
+    def _resolve_device(self) -> str | None:
+        if self.device_id is not None:
+            return self.device_id
+        devices = adb.get_devices()
+        return devices[0] if len(devices) == 1 else None
+
+    def package_index(self, device_id: str) -> dict[str, list[str]]:
+        """Get the package index for a device, building it on first use."""
+        if device_id not in self._package_index:
+            self._package_index[device_id] = build_package_index(adb.list_packages(device_id))
+        return self._package_index[device_id]
+
+    def resolve_package(self, device_id: str, app: str) -> str | None:
+        """Resolve a spoken app name to exactly one installed package.
+
+        Returns:
+            The package name, or None if the name is unknown or ambiguous
+        """
+        index = self.package_index(device_id)
+        candidates = index.get(app) or index.get(app.replace(" ", ""))
+        if candidates and len(set(candidates)) == 1:
+            return candidates[0]
+        return None
+
+    def match(self, query: str) -> Callable[[str], str | None] | None:
+        """Match a query against the fast-path patterns.
+
+        Returns:
+            Handler taking a device ID and returning a response (or None if
+            the action could not be completed), or None if no pattern matches
+        """
+        text = _normalize(query)
+        if _HOME_RE.match(text):
+            return lambda device_id: self._press(device_id, "KEYCODE_HOME", "HOME")
+        if _BACK_RE.match(text):
+            return lambda device_id: self._press(device_id, "KEYCODE_BACK", "BACK")
+        if _BATTERY_RE.match(text):
+            return self._battery
+        match = _OPEN_RE.match(text)
+        if match:
+            app = match.group("app")
+            return lambda device_id: self._open(device_id, app)
+        return None
+
+    def route(self, query: str) -> str | None:
+        """Handle a query on the fast path if possible.
+
+        Args:
+            query: The user's request
+
+        Returns:
+            Response text if the request was handled, or None if it should
+            fall through to the full agent
+        """
+        handler = self.match(query)
+        if handler is None:
+            return None
+        try:
+            device_id = self._resolve_device()
+            if device_id is None:
+                return None
+            response = handler(device_id)
+        except (ToolExecutionError, OSError) as e:
+            logger.info(f"Fast path failed, falling back to agent: {e}")
+            return None
+        if response is not None:
+            logger.info(f"Handled on fast path: {query!r}")
+        return response
+
+    def _press(self, device_id: str, key_code: str, label: str) -> str | None:
+        if not adb.press_key(device_id, key_code, wait_idle=True):
+            return None
+        return f"Pressed {label} on {device_id}."
+
+    def _battery(self, device_id: str) -> str:
+        return f"Battery level on {device_id} is {adb.get_battery_level(device_id)}%."
+
+    def _open(self, device_id: str, app: str) -> str | None:
+        package = self.resolve_package(device_id, app)
+        if package is None or not adb.launch_app(device_id, package, wait_idle=True):
+            return None
+        return f"Opened {app} ({package}) on {device_id}."
@@ -4,5 +4,18 @@ from deepglm.agents.subagents.android_operator import (  # noqa: F401
     android_operator_subagent,
     get_android_operator_subagent,
 )
+from deepglm.agents.subagents.fanout import (  # noqa: F401
+    DeviceBindingMiddleware,
+    DeviceRun,
+    OperatorFanOut,
+    resolve_operator_tools,
+)
 
-__all__ = ["android_operator_subagent", "get_android_operator_subagent"]
+__all__ = [
+    "android_operator_subagent",
+    "get_android_operator_subagent",
+    "DeviceBindingMiddleware",
+    "DeviceRun",
+    "OperatorFanOut",
+    "resolve_operator_tools",
+]
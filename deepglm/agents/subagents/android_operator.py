@@ -3,8 +3,9 @@
 This module defines the android_operator subagent which will be used
 for executing precise UI operations on Android devices.
 
-Currently this is a specification only - it will be integrated
-into the main agent in Phase 3.
+The main agent runs this spec on several devices in parallel through
+the run_on_devices tool (see fanout.OperatorFanOut); it is not yet
+registered as a deepagents `task` subagent (Phase 3).
 """
 
 from typing import Any, Dict
@@ -14,9 +15,12 @@ from typing import Any, Dict
 ANDROID_OPERATOR_TOOLS = [
     "tools.adb.tap",
     "tools.adb.swipe",
+    "tools.adb.scroll_to",
     "tools.adb.input_text",
     "tools.adb.press_key",
     "tools.adb.capture_screen",
+    "tools.adb.dump_ui_hierarchy",
+    "tools.adb.check_logcat",
     "tools.adb.list_packages",
     "tools.adb.launch_app",
 ]
@@ -33,7 +37,7 @@ Your role is to execute precise UI operations on Android devices efficiently and
 ## Operational Guidelines
 
 1. **Efficiency**: Plan your operation sequence to minimize unnecessary steps
-2. **Verification**: Consider using screen capture to verify operation success when appropriate
+2. **Verification**: Verify each action with capture_screen or dump_ui_hierarchy; the observation is prefetched while you think, so checking is cheap
 3. **Error Recovery**: Have fallback strategies for common failure scenarios
 4. **State Awareness**: Keep track of device state (screen on/off, current app, etc.)
 
@@ -41,18 +45,20 @@ Your role is to execute precise UI operations on Android devices efficiently and
 
 If an operation fails:
 1. Check if the device screen is on
-2. Verify the correct app is open
-3. Ensure coordinates are within screen bounds
-4. Consider retrying with a brief delay
-5. If persistent failure, report the issue clearly
+2. Call check_logcat to see whether the app crashed or stopped responding
+3. Verify the correct app is open
+4. Ensure coordinates are within screen bounds
+5. Retry once the UI has settled (pass wait_idle=True instead of sleeping)
+6. If persistent failure, report the issue clearly
 
 ## Example Tasks
 
 **Open an app and navigate:**
-1. Launch app using package name
-2. Wait for app to load (consider screen verification)
-3. Tap target coordinates
-4. Verify expected UI elements appear
+1. Launch app using package name with wait_idle=True
+2. The call returns once the app's activity is resumed and the screen is stable
+3. If the target is in a list, call scroll_to with its text to get its coordinates
+4. Tap target coordinates
+5. Verify expected UI elements appear
 
 **Input text in a form:**
 1. Tap text field to focus
@@ -80,7 +86,7 @@ def get_android_operator_subagent():
         Dictionary containing the subagent specification
 
     Note:
-        This subagent is not yet integrated into the main agent.
-        It will be added via SubAgentMiddleware in Phase 3.
+        The main agent uses this spec for run_on_devices; it will be
+        added via SubAgentMiddleware in Phase 3.
     """
     return android_operator_subagent
@@ -0,0 +1,200 @@
+"""Parallel android-operator runs across devices.
+
+The deepagents `task` tool hands one description to one subagent, so a goal
+like "do X on all test phones" is carried out device after device.
+`OperatorFanOut` instead starts one android-operator agent per device, runs
+them in parallel threads and aggregates their final answers. Each operator
+is pinned to its device by DeviceBindingMiddleware, and every tool call it
+makes opens its own adb connection.
+
+Example:
+    >>> fanout = OperatorFanOut(model, resolve_operator_tools(), ["tap", "swipe"])
+    >>> runs = fanout.run("Open Settings and enable dark mode", ["emulator-5554", "R58M"])
+    >>> [run.status for run in runs]
+    ['ok', 'ok']
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import BaseTool
+
+from deepglm.agents.subagents.android_operator import android_operator_subagent
+from deepglm.middleware import PerceptionPrefetchMiddleware, ToolConcurrencyMiddleware
+from deepglm.tools import adb
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceBindingMiddleware(AgentMiddleware):
+    """Pin every tool call of an agent to one device.
+
+    Rewrites the device argument of the model's tool calls before they run,
+    so an operator cannot act on another device even if the model names one.
+
+    Args:
+        device_id: The device the agent operates
+        device_arg: Name of the tool argument that identifies the device
+    """
+
+    def __init__(self, device_id: str, device_arg: str = "device_id") -> None:
+        super().__init__()
+        self.device_id = device_id
+        self.device_arg = device_arg
+
+    def after_model(self, state: Any, runtime: Any) -> dict[str, Any] | None:
+        """Set the device argument on the tool calls of the latest AI message."""
+        messages = state.get("messages", [])
+        message = messages[-1] if messages else None
+        if not isinstance(message, AIMessage) or not message.tool_calls:
+            return None
+        if all(c["args"].get(self.device_arg) == self.device_id for c in message.tool_calls):
+            return None
+        calls = [
+            {**call, "args": {**call["args"], self.device_arg: self.device_id}}
+            for call in message.tool_calls
+        ]
+        # Same message ID, so the state update replaces the message in place
+        return {"messages": [message.model_copy(update={"tool_calls": calls})]}
+
+
+@dataclass
+class DeviceRun:
+    """Outcome of one operator run.
+
+    Attributes:
+        device_id: The device the operator ran on
+        status: "ok" or "error"
+        output: The operator's final answer, or the error message
+        seconds: Wall time of the run
+    """
+
+    device_id: str
+    status: str
+    output: str
+    seconds: float
+
+
+def resolve_operator_tools() -> list[Callable]:
+    """The android-operator's tools as functions of deepglm.tools.adb."""
+    return [getattr(adb, ref.rsplit(".", 1)[-1]) for ref in android_operator_subagent["tools"]]
+
+
+class OperatorFanOut:
+    """Run android-operator agents on several devices in parallel.
+
+    Args:
+        model: Chat model for the operators
+        tools: Operator tools (see resolve_operator_tools)
+        mutating_tools: Names of tools that change device state
+        middleware: Extra middleware for every operator (e.g. tracing)
+        max_workers: Maximum operators running at once
+        recursion_limit: Graph step limit per operator run
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        tools: Sequence[BaseTool | Callable],
+        mutating_tools: Iterable[str],
+        middleware: Sequence[AgentMiddleware] = (),
+        max_workers: int = 8,
+        recursion_limit: int = 200,
+    ) -> None:
+        self.model = model
+        self.tools = list(tools)
+        self.mutating_tools = list(mutating_tools)
+        self.middleware = list(middleware)
+        self.max_workers = max_workers
+        self.recursion_limit = recursion_limit
+        self._operators: dict[str, Any] = {}
+
+    def _operator(self, device_id: str) -> Any:
+        """Build (once per device) an operator agent bound to the device."""
+        if device_id not in self._operators:
+            self._operators[device_id] = create_agent(
+                self.model,
+                # Same system prompt for every device, so operators share the
+                # provider's prompt cache; the device goes in the task message
+                system_prompt=android_operator_subagent["system_prompt"],
+                tools=self.tools,
+                middleware=[
+                    DeviceBindingMiddleware(device_id),
+                    ToolConcurrencyMiddleware(mutating_tools=self.mutating_tools),
+                    PerceptionPrefetchMiddleware(
+                        adb.observation_prefetcher, mutating_tools=self.mutating_tools
+                    ),
+                    *self.middleware,
+                ],
+            )
+        return self._operators[device_id]
+
+    def _run_one(self, task: str, device_id: str) -> DeviceRun:
+        message = HumanMessage(
+            f"[device:{device_id}] {task}\n\n"
+            f"You operate device {device_id} only; use it as device_id for every tool."
+        )
+        start = time.monotonic()
+        try:
+            result = self._operator(device_id).invoke(
+                {"messages": [message]}, {"recursion_limit": self.recursion_limit}
+            )
+            output = result["messages"][-1].text.strip()
+            return DeviceRun(device_id, "ok", output, time.monotonic() - start)
+        except Exception as e:
+            logger.warning(f"Operator on {device_id} failed: {e}")
+            return DeviceRun(device_id, "error", f"{type(e).__name__}: {e}", time.monotonic() - start)
+
+    def run(self, task: str, device_ids: Sequence[str]) -> list[DeviceRun]:
+        """Carry out a task on every device at once.
+
+        Args:
+            task: What each operator should do
+            device_ids: Devices to run on (duplicates are ignored)
+
+        Returns:
+            One DeviceRun per device, in the order given
+        """
+        devices = list(dict.fromkeys(device_ids))
+        if not devices:
+            return []
+        # Build the agents up front; graph compilation is not worth racing
+        for device_id in devices:
+            self._operator(device_id)
+        logger.info(f"Running operators on {len(devices)} devices")
+        with ThreadPoolExecutor(max_workers=min(len(devices), self.max_workers)) as executor:
+            return list(executor.map(lambda device_id: self._run_one(task, device_id), devices))
+
+    def as_tool(self) -> Callable[[str, list[str]], str]:
+        """The fan-out as an agent tool named run_on_devices."""
+
+        def run_on_devices(task: str, device_ids: list[str]) -> str:
+            """Run an android operator on several devices in parallel.
+
+            Use this when the same goal has to be carried out on more than one
+            device; it takes about as long as the slowest device instead of
+            the sum of all of them.
+
+            Args:
+                task: Complete instructions for one device; each operator sees
+                    only this text
+                device_ids: Devices to run on (e.g. ["emulator-5554", "R58M"])
+
+            Returns:
+                Each device's status, duration and final report
+            """
+            runs = self.run(task, device_ids)
+            return "\n\n".join(
+                f"[{run.device_id}] {run.status} in {run.seconds:.1f}s\n{run.output}"
+                for run in runs
+            )
+
+        return run_on_devices
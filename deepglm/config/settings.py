@@ -23,9 +23,36 @@ class Settings:
         OPENAI_API_KEY: API key for OpenAI-compatible LLM service
         OPENAI_BASE_URL: Base URL for the API endpoint
         OPENAI_MODEL: Model identifier to use
+        OPENAI_BASE_URLS: Additional OpenAI-compatible endpoints to route across,
+            each "base_url" or "base_url|model"
+        OPENAI_API_KEYS: API keys for OPENAI_BASE_URLS, in the same order;
+            missing or empty entries use OPENAI_API_KEY
+        LLM_HEDGE_PERCENTILE: Latency percentile (0-1) after which a hedged
+            request is sent to a second endpoint; hedging is off if unset
+        COMPACT_TOOL_DESCRIPTIONS: Send only the summary and return value of
+            each device tool's docstring, with argument descriptions in the
+            parameter schema, to keep the cached prompt prefix small
         VISION_MODEL: Optional vision model for screen analysis
+        TEMPLATE_DIR: Directory of PNG templates for local UI element
+            detection (defaults to '.deepglm/templates')
         TAVILY_API_KEY: API key for Tavily search service
         ADB_PATH: Path to adb executable (defaults to 'adb')
+        ADB_SERVER_HOST: Host of the adb server (defaults to '127.0.0.1')
+        ADB_SERVER_PORT: Port of the adb server (defaults to 5037)
+        ADB_MAX_ACTIONS_PER_SECOND: Most input actions sent to one device per
+            second; 0 (the default) means no limit
+        SYNC_MANIFEST_DIR: Directory for per-device push_dir/pull_dir manifest
+            caches (defaults to '.deepglm/sync')
+        CHECKPOINT_DB: SQLite file for agent checkpoints used by main.py
+            (defaults to '.deepglm/checkpoints.db')
+        SCREENSHOT_DIR: Directory of the screenshot store (defaults to
+            '.deepglm/screenshots')
+        SCREENSHOT_MAX_MB: Size budget of the screenshot store in MiB
+        SCREENSHOT_MAX_AGE_HOURS: Age after which unused screenshots are evicted
+        TRACE_PATH: Optional file to write agent spans to; ".json" files get
+            the Chrome trace format, anything else JSONL
+        TRACE_PROFILE_TOOLS: Tool names to run under the sampling profiler
+            when tracing
     """
 
     def __init__(self) -> None:
@@ -37,8 +64,40 @@ class Settings:
         self.TAVILY_API_KEY: str = os.environ.get("TAVILY_API_KEY", "")
 
         # Optional variables
+        self.OPENAI_BASE_URLS: list[str] = [
+            url.strip()
+            for url in os.environ.get("OPENAI_BASE_URLS", "").split(",")
+            if url.strip()
+        ]
+        # Positional, so empty entries are kept
+        keys = os.environ.get("OPENAI_API_KEYS", "")
+        self.OPENAI_API_KEYS: list[str] = [key.strip() for key in keys.split(",")] if keys else []
+        hedge = os.environ.get("LLM_HEDGE_PERCENTILE")
+        self.LLM_HEDGE_PERCENTILE: float | None = float(hedge) if hedge else None
+        self.COMPACT_TOOL_DESCRIPTIONS: bool = os.environ.get(
+            "COMPACT_TOOL_DESCRIPTIONS", ""
+        ).lower() in ("1", "true", "yes")
         self.VISION_MODEL: str | None = os.environ.get("VISION_MODEL")
+        self.TEMPLATE_DIR: str = os.environ.get("TEMPLATE_DIR", ".deepglm/templates")
         self.ADB_PATH: str = os.environ.get("ADB_PATH", "adb")
+        self.ADB_SERVER_HOST: str = os.environ.get("ADB_SERVER_HOST", "127.0.0.1")
+        self.ADB_SERVER_PORT: int = int(os.environ.get("ADB_SERVER_PORT", "5037"))
+        self.ADB_MAX_ACTIONS_PER_SECOND: float = float(
+            os.environ.get("ADB_MAX_ACTIONS_PER_SECOND", "0")
+        )
+        self.SYNC_MANIFEST_DIR: str = os.environ.get("SYNC_MANIFEST_DIR", ".deepglm/sync")
+        self.CHECKPOINT_DB: str = os.environ.get("CHECKPOINT_DB", ".deepglm/checkpoints.db")
+        self.SCREENSHOT_DIR: str = os.environ.get("SCREENSHOT_DIR", ".deepglm/screenshots")
+        self.SCREENSHOT_MAX_MB: int = int(os.environ.get("SCREENSHOT_MAX_MB", "2048"))
+        self.SCREENSHOT_MAX_AGE_HOURS: float = float(
+            os.environ.get("SCREENSHOT_MAX_AGE_HOURS", "168")
+        )
+        self.TRACE_PATH: str | None = os.environ.get("TRACE_PATH") or None
+        self.TRACE_PROFILE_TOOLS: list[str] = [
+            name.strip()
+            for name in os.environ.get("TRACE_PROFILE_TOOLS", "").split(",")
+            if name.strip()
+        ]
 
         # Validate required variables
         required_vars = {
@@ -1,7 +1,24 @@
-"""Middleware module for DeepGLM Android Automation Agent.
+"""Middleware module for DeepGLM Android Automation Agent."""
 
-This module is reserved for future middleware implementations that will be added in Phase 3.
-"""
-
-__all__ = []
+from deepglm.middleware.concurrency import ToolConcurrencyMiddleware  # noqa: F401
+from deepglm.middleware.model_router import Endpoint, ModelRouterMiddleware  # noqa: F401
+from deepglm.middleware.prefetch import PerceptionPrefetchMiddleware  # noqa: F401
+from deepglm.middleware.prompt_cache import (  # noqa: F401
+    CacheUsage,
+    PromptCacheMiddleware,
+    compact_tool,
+)
+from deepglm.middleware.tracing import SamplingProfiler, Span, TracingMiddleware  # noqa: F401
 
+__all__ = [
+    "ToolConcurrencyMiddleware",
+    "Endpoint",
+    "ModelRouterMiddleware",
+    "PerceptionPrefetchMiddleware",
+    "CacheUsage",
+    "PromptCacheMiddleware",
+    "compact_tool",
+    "SamplingProfiler",
+    "Span",
+    "TracingMiddleware",
+]
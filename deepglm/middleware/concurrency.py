@@ -0,0 +1,249 @@
+"""Tool concurrency middleware.
+
+When the model emits several tool calls in one turn, the agent's tool node
+already runs them concurrently. That is what we want for side-effect-free
+reads (battery level, package lists, screenshots, web search), but device
+actions such as tap or swipe must reach the device in the order the model
+emitted them.
+
+This middleware holds each mutating call until the earlier calls for the
+same device in that turn have finished, and holds reads on a device until
+the actions emitted before them are done. Reads on other devices and
+device-independent tools run freely. A turn's wall time is then bounded by
+the slowest read plus the device's own action sequence, instead of the sum
+of every call.
+
+Calls that already have a result are left out of the ordering: when a turn
+is resumed from a checkpoint, only its unfinished calls run again and the
+finished ones exist only as the checkpoint's pending writes. No call waits
+longer than `wait_timeout` for an earlier one.
+"""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import CheckpointTuple
+from langgraph.constants import CONF, CONFIG_KEY_CHECKPOINTER
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Turn:
+    """Ordering state for the device calls of one model turn.
+
+    Attributes:
+        waits_for: Maps each device call id to the ids of the earlier calls
+            on the same device it has to wait for
+        done: Completion events keyed by call id
+        remaining: Number of device calls that have not finished yet
+    """
+
+    waits_for: dict[str, list[str]]
+    done: dict[str, Any] = field(default_factory=dict)
+    remaining: int = 0
+
+
+class ToolConcurrencyMiddleware(AgentMiddleware):
+    """Serialize mutating tool calls per device while reads run in parallel.
+
+    A read on a device waits for the mutating calls emitted before it on that
+    device (so it sees their effect), and a mutating call waits for every
+    earlier call on its device. Reads on other devices, or without a device,
+    are not held back.
+
+    Args:
+        mutating_tools: Names of tools that change device state
+        device_arg: Name of the tool argument that identifies the device
+        wait_timeout: Longest time in seconds a call waits for an earlier one
+            before it runs anyway
+
+    Example:
+        >>> middleware = ToolConcurrencyMiddleware(mutating_tools=["tap", "swipe"])
+        >>> agent = create_deep_agent(model=model, tools=tools, middleware=[middleware])
+    """
+
+    def __init__(
+        self,
+        mutating_tools: Iterable[str],
+        device_arg: str = "device_id",
+        wait_timeout: float = 120.0,
+    ) -> None:
+        super().__init__()
+        self.mutating_tools = frozenset(mutating_tools)
+        self.device_arg = device_arg
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._turns: dict[tuple[str, ...], _Turn] = {}
+
+    def _device_of(self, tool_call: ToolCall) -> str | None:
+        """Device of a call; None for reads that do not name a device."""
+        device = tool_call.get("args", {}).get(self.device_arg)
+        if device is None and tool_call["name"] not in self.mutating_tools:
+            return None
+        return str(device or "")
+
+    def _plan(self, calls: list[ToolCall]) -> dict[str, list[str]]:
+        """Work out which earlier calls each device call has to wait for."""
+        last_action: dict[str, str] = {}
+        reads_since: dict[str, list[str]] = {}
+        waits_for: dict[str, list[str]] = {}
+        for call in calls:
+            device = self._device_of(call)
+            if device is None:
+                continue
+            call_id = str(call["id"])
+            earlier = [last_action[device]] if device in last_action else []
+            if call["name"] in self.mutating_tools:
+                waits_for[call_id] = earlier + reads_since.pop(device, [])
+                last_action[device] = call_id
+            else:
+                waits_for[call_id] = earlier
+                reads_since.setdefault(device, []).append(call_id)
+        return waits_for
+
+    def _turn_calls(self, request: ToolCallRequest) -> tuple[tuple[str, ...], list[ToolCall]] | None:
+        """The calls of the turn containing this call that are still unanswered."""
+        call_id = request.tool_call.get("id")
+        messages = request.state.get("messages", []) if isinstance(request.state, dict) else []
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, AIMessage) and any(
+                c.get("id") == call_id for c in message.tool_calls
+            ):
+                break
+        else:
+            return None
+        answered = {m.tool_call_id for m in messages[index + 1:] if isinstance(m, ToolMessage)}
+        calls = [c for c in message.tool_calls if c.get("id") not in answered]
+        return tuple(str(c.get("id")) for c in message.tool_calls), calls
+
+    @staticmethod
+    def _checkpoint(request: ToolCallRequest) -> tuple[Any, RunnableConfig] | None:
+        """Checkpointer and config of the checkpoint the turn runs from."""
+        runtime = request.runtime
+        configurable = runtime.config.get(CONF, {}) if runtime is not None else {}
+        checkpointer = configurable.get(CONFIG_KEY_CHECKPOINTER)
+        namespace = str(configurable.get("checkpoint_ns", "")).rpartition("|")[0]
+        checkpoint_id = configurable.get("checkpoint_map", {}).get(namespace)
+        if checkpointer is None or checkpoint_id is None:
+            return None
+        config: RunnableConfig = {
+            CONF: {
+                "thread_id": configurable.get("thread_id"),
+                "checkpoint_ns": namespace,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+        return checkpointer, config
+
+    @staticmethod
+    def _written(saved: CheckpointTuple | None) -> set[str]:
+        """Ids of the calls whose results are saved as pending writes."""
+        written = set()
+        for _, _, value in (saved.pending_writes or []) if saved is not None else []:
+            for message in value if isinstance(value, list) else [value]:
+                if isinstance(message, ToolMessage):
+                    written.add(message.tool_call_id)
+        return written
+
+    def _start_turn(
+        self,
+        key: tuple[str, ...],
+        calls: list[ToolCall],
+        written: set[str],
+        event_factory: Callable[[], Any],
+    ) -> _Turn:
+        """Create the ordering state for a turn, or return the one another call created."""
+        waits_for = self._plan([c for c in calls if c.get("id") not in written])
+        turn = _Turn(
+            waits_for=waits_for,
+            done={call_id: event_factory() for call_id in waits_for},
+            remaining=len(waits_for),
+        )
+        with self._lock:
+            return self._turns.setdefault(key, turn)
+
+    def _find_turn(self, key: tuple[str, ...]) -> _Turn | None:
+        with self._lock:
+            return self._turns.get(key)
+
+    def _timed_out(self, call_id: str, earlier: str) -> None:
+        logger.warning(
+            f"Tool call {call_id} waited {self.wait_timeout}s for {earlier}; running it anyway"
+        )
+
+    def _finish(self, key: tuple[str, ...], turn: _Turn, call_id: str) -> None:
+        turn.done[call_id].set()
+        with self._lock:
+            turn.remaining -= 1
+            if turn.remaining == 0:
+                self._turns.pop(key, None)
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        """Run each device call once the earlier calls it depends on are done."""
+        if self._device_of(request.tool_call) is None:
+            return handler(request)
+        found = self._turn_calls(request)
+        if found is None:
+            return handler(request)
+        key, calls = found
+        turn = self._find_turn(key)
+        if turn is None:
+            # Calls finished before a resume are saved as pending writes only
+            checkpoint = self._checkpoint(request)
+            saved = checkpoint[0].get_tuple(checkpoint[1]) if checkpoint else None
+            turn = self._start_turn(key, calls, self._written(saved), threading.Event)
+        call_id = str(request.tool_call["id"])
+        if call_id not in turn.done:
+            return handler(request)
+        try:
+            for earlier in turn.waits_for.get(call_id, []):
+                if not turn.done[earlier].wait(self.wait_timeout):
+                    self._timed_out(call_id, earlier)
+            return handler(request)
+        finally:
+            self._finish(key, turn, call_id)
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        """Async version of wrap_tool_call."""
+        if self._device_of(request.tool_call) is None:
+            return await handler(request)
+        found = self._turn_calls(request)
+        if found is None:
+            return await handler(request)
+        key, calls = found
+        turn = self._find_turn(key)
+        if turn is None:
+            checkpoint = self._checkpoint(request)
+            saved = await checkpoint[0].aget_tuple(checkpoint[1]) if checkpoint else None
+            turn = self._start_turn(key, calls, self._written(saved), asyncio.Event)
+        call_id = str(request.tool_call["id"])
+        if call_id not in turn.done:
+            return await handler(request)
+        try:
+            for earlier in turn.waits_for.get(call_id, []):
+                try:
+                    await asyncio.wait_for(turn.done[earlier].wait(), self.wait_timeout)
+                except TimeoutError:
+                    self._timed_out(call_id, earlier)
+            return await handler(request)
+        finally:
+            self._finish(key, turn, call_id)
@@ -0,0 +1,284 @@
+"""Multi-endpoint model routing middleware.
+
+Routes each model call to the fastest healthy OpenAI-compatible endpoint,
+based on a per-endpoint latency EWMA and error rate. Calls that fail
+because of the endpoint (connection errors, timeouts, 5xx, 408 and 429)
+fail over to the next endpoint, and an optional hedged request is sent to a
+second endpoint when the first one exceeds a latency percentile, so one slow
+provider does not stall the whole device. Errors caused by the request
+itself, such as a 400, are raised at once and do not count against the
+endpoint.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from openai import APIConnectionError
+
+logger = logging.getLogger(__name__)
+
+# Client errors that still say the endpoint, not the request, is the problem
+_ENDPOINT_STATUSES = frozenset({408, 429})
+
+
+def is_endpoint_error(error: BaseException) -> bool:
+    """Whether an error is the endpoint's fault, so another endpoint may succeed.
+
+    Transport errors, timeouts and 5xx, 408 and 429 responses are; other
+    responses (e.g. 400 for a malformed request) would fail anywhere.
+    """
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status in _ENDPOINT_STATUSES
+    return isinstance(error, (APIConnectionError, TimeoutError, OSError))
+
+
+@dataclass
+class Endpoint:
+    """Health and latency statistics for one model endpoint.
+
+    Attributes:
+        name: Endpoint label used in logs (usually the base URL)
+        model: Chat model bound to this endpoint
+        latency_ewma: Exponentially weighted mean latency in seconds,
+            or None until the first successful call
+        error_rate: Exponentially weighted fraction of failed calls
+        latencies: Recent successful call latencies, for percentiles
+        unhealthy_until: Monotonic time until which the endpoint is skipped
+    """
+
+    name: str
+    model: BaseChatModel
+    latency_ewma: float | None = None
+    error_rate: float = 0.0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    unhealthy_until: float = 0.0
+
+    def percentile(self, q: float) -> float | None:
+        """Latency at quantile `q` (0-1) of recent calls, or None if no samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ModelRouterMiddleware(AgentMiddleware):
+    """Route model calls across several endpoints by latency and health.
+
+    Endpoints are ranked by latency EWMA; endpoints that have not served a
+    call yet rank first so every endpoint gets measured. An endpoint whose
+    error rate exceeds `max_error_rate` is skipped for `cooldown` seconds.
+
+    Args:
+        endpoints: Endpoints to route across, in preference order
+        alpha: EWMA smoothing factor for latency and error rate
+        hedge_percentile: If set (e.g. 0.95), send a second request to the
+            next endpoint once the first exceeds this latency percentile
+        min_hedge_samples: Samples required before hedging is enabled
+        max_error_rate: Error rate above which an endpoint is marked unhealthy
+        cooldown: Seconds an unhealthy endpoint is skipped
+
+    Example:
+        >>> router = ModelRouterMiddleware(
+        ...     [Endpoint("a", ChatOpenAI(base_url=url_a)), Endpoint("b", ChatOpenAI(base_url=url_b))],
+        ...     hedge_percentile=0.95,
+        ... )
+        >>> agent = create_deep_agent(model=router.endpoints[0].model, middleware=[router])
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        alpha: float = 0.2,
+        hedge_percentile: float | None = None,
+        min_hedge_samples: int = 10,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+    ) -> None:
+        super().__init__()
+        if not endpoints:
+            raise ValueError("ModelRouterMiddleware requires at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.alpha = alpha
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_samples = min_hedge_samples
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._executor = ContextThreadPoolExecutor(thread_name_prefix="deepglm-hedge")
+
+    def ranked(self) -> list[Endpoint]:
+        """Endpoints in routing order: healthy first, then by latency EWMA."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(
+                self.endpoints,
+                key=lambda e: (e.unhealthy_until > now, e.latency_ewma or 0.0),
+            )
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        """Update endpoint statistics after a successful call."""
+        with self._lock:
+            endpoint.latencies.append(latency)
+            if endpoint.latency_ewma is None:
+                endpoint.latency_ewma = latency
+            else:
+                endpoint.latency_ewma += self.alpha * (latency - endpoint.latency_ewma)
+            endpoint.error_rate *= 1 - self.alpha
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """Update endpoint statistics after a failed call."""
+        with self._lock:
+            endpoint.error_rate += self.alpha * (1 - endpoint.error_rate)
+            if endpoint.error_rate > self.max_error_rate:
+                endpoint.unhealthy_until = time.monotonic() + self.cooldown
+                logger.warning(
+                    f"Endpoint {endpoint.name} marked unhealthy "
+                    f"(error rate {endpoint.error_rate:.2f})"
+                )
+
+    def _hedge_delay(self, endpoint: Endpoint) -> float | None:
+        if self.hedge_percentile is None or len(endpoint.latencies) < self.min_hedge_samples:
+            return None
+        with self._lock:
+            return endpoint.percentile(self.hedge_percentile)
+
+    def _call(
+        self,
+        endpoint: Endpoint,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        start = time.monotonic()
+        try:
+            response = handler(request.override(model=endpoint.model))
+        except Exception as e:
+            if is_endpoint_error(e):
+                self.record_failure(endpoint)
+            raise
+        self.record_success(endpoint, time.monotonic() - start)
+        return response
+
+    async def _acall(
+        self,
+        endpoint: Endpoint,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        start = time.monotonic()
+        try:
+            response = await handler(request.override(model=endpoint.model))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_endpoint_error(e):
+                self.record_failure(endpoint)
+            raise
+        self.record_success(endpoint, time.monotonic() - start)
+        return response
+
+    def _hedged(
+        self,
+        primary: Endpoint,
+        untried: list[Endpoint],
+        delay: float,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Call `primary`, adding a call to a backup if it is slower than `delay`.
+
+        The backup is the next untried endpoint; it is removed from `untried`
+        once it is called, so failover does not retry it. The first
+        successful response wins. A losing thread cannot be cancelled; it
+        finishes in the background and only updates stats.
+        """
+        pending: set[Future[ModelResponse]] = {
+            self._executor.submit(self._call, primary, request, handler)
+        }
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            backup = untried.pop(0)
+            logger.info(f"Hedging request from {primary.name} to {backup.name} after {delay:.2f}s")
+            pending.add(self._executor.submit(self._call, backup, request, handler))
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future.result()
+                if not is_endpoint_error(error):
+                    raise error
+        assert error is not None
+        raise error
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Send the call to the best endpoint, failing over on endpoint errors.
+
+        Each endpoint is called at most once per model call, whether as the
+        primary or as a hedge. Other errors are raised at once.
+        """
+        untried = self.ranked()
+        error: BaseException | None = None
+        while untried:
+            endpoint = untried.pop(0)
+            delay = self._hedge_delay(endpoint) if untried else None
+            try:
+                if delay is not None:
+                    return self._hedged(endpoint, untried, delay, request, handler)
+                return self._call(endpoint, request, handler)
+            except Exception as e:
+                if not is_endpoint_error(e):
+                    raise
+                logger.warning(f"Model call to {endpoint.name} failed: {e}")
+                error = e
+        assert error is not None
+        raise error
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async version of wrap_model_call; hedged losers are cancelled."""
+        untried = self.ranked()
+        error: BaseException | None = None
+        while untried:
+            endpoint = untried.pop(0)
+            delay = self._hedge_delay(endpoint) if untried else None
+            tasks = [asyncio.ensure_future(self._acall(endpoint, request, handler))]
+            try:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    backup = untried.pop(0)
+                    logger.info(f"Hedging request from {endpoint.name} to {backup.name}")
+                    tasks.append(asyncio.ensure_future(self._acall(backup, request, handler)))
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        failure = task.exception()
+                        if failure is None:
+                            return task.result()
+                        if not is_endpoint_error(failure):
+                            raise failure
+                        error = failure
+                logger.warning(f"Model call to {endpoint.name} failed: {error}")
+            finally:
+                for task in tasks:
+                    task.cancel()
+        assert error is not None
+        raise error
@@ -0,0 +1,73 @@
+"""Perception prefetch middleware.
+
+Starts capturing the next observation (screenshot and UI hierarchy) in the
+background as soon as a mutating device action returns. The capture runs
+while the model is deciding what to do next, so the act-then-verify loop no
+longer pays observation latency serially between every action and the next
+decision. If the model acts again instead of looking, the prefetched
+observation is discarded.
+"""
+
+from collections.abc import Awaitable, Callable, Iterable
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
+
+from deepglm.tools.prefetch import ObservationPrefetcher
+
+
+class PerceptionPrefetchMiddleware(AgentMiddleware):
+    """Prefetch observations after mutating device actions.
+
+    Args:
+        prefetcher: Prefetcher shared with the observation tools
+        mutating_tools: Names of tools that change device state
+        device_arg: Name of the tool argument that identifies the device
+    """
+
+    def __init__(
+        self,
+        prefetcher: ObservationPrefetcher,
+        mutating_tools: Iterable[str],
+        device_arg: str = "device_id",
+    ) -> None:
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.mutating_tools = frozenset(mutating_tools)
+        self.device_arg = device_arg
+
+    def _device_of(self, request: ToolCallRequest) -> str | None:
+        if request.tool_call["name"] not in self.mutating_tools:
+            return None
+        device_id = request.tool_call.get("args", {}).get(self.device_arg)
+        return str(device_id) if device_id else None
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        """Invalidate before a device action and prefetch once it returns."""
+        device_id = self._device_of(request)
+        if device_id is None:
+            return handler(request)
+        self.prefetcher.invalidate(device_id)
+        result = handler(request)
+        self.prefetcher.schedule(device_id)
+        return result
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        """Async version of wrap_tool_call."""
+        device_id = self._device_of(request)
+        if device_id is None:
+            return await handler(request)
+        self.prefetcher.invalidate(device_id)
+        result = await handler(request)
+        self.prefetcher.schedule(device_id)
+        return result
@@ -0,0 +1,172 @@
+"""Prompt-cache-aware request layout.
+
+OpenAI-compatible providers cache the longest prefix a request shares with
+earlier ones and bill and serve those tokens faster. Every model call of an
+agent starts with the same system prompt and tool schemas, followed by the
+conversation, which only grows at the end; as long as those leading bytes do
+not change, each step re-reads the prefix from the cache.
+
+PromptCacheMiddleware watches that prefix: it warns when the system prompt or
+tool schemas change between calls (a change invalidates the cache for all
+later steps) and records the cache-hit tokens the provider reports per call.
+compact_tool shortens tool descriptions to make the prefix itself smaller.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import weakref
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage
+from langchain_core.tools import BaseTool, tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+logger = logging.getLogger(__name__)
+
+_SECTIONS = ("Args:", "Returns:", "Raises:", "Example:", "Examples:", "Note:")
+
+
+def compact_description(docstring: str) -> str:
+    """Summary paragraph and Returns section of a Google-style docstring.
+
+    Extended explanations, Raises and Example sections are dropped; argument
+    descriptions belong in the parameter schema instead.
+    """
+    text = inspect.cleandoc(docstring)
+    summary = " ".join(text.split("\n\n", 1)[0].split())
+    returns = []
+    in_returns = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped in _SECTIONS or (not line.startswith(" ") and stripped.endswith(":")):
+            in_returns = stripped == "Returns:"
+        elif in_returns and stripped:
+            returns.append(stripped)
+    return f"{summary} Returns: {' '.join(returns)}" if returns else summary
+
+
+def compact_tool(func: Callable) -> BaseTool:
+    """Wrap a function as a tool with a compact description.
+
+    Argument descriptions from the docstring's Args section go into the
+    parameter schema; the description keeps the summary and Returns.
+    """
+    compact = tool(func, parse_docstring=True)
+    compact.description = compact_description(func.__doc__ or "")
+    return compact
+
+
+@dataclass
+class CacheUsage:
+    """Prompt tokens of one model call.
+
+    Attributes:
+        prompt_tokens: Input tokens of the call
+        cached_tokens: Input tokens the provider served from its prompt cache
+    """
+
+    prompt_tokens: int
+    cached_tokens: int
+
+
+class PromptCacheMiddleware(AgentMiddleware):
+    """Guard the cacheable prompt prefix and report cache hits.
+
+    Args:
+        name: Label for log messages (e.g. the agent name)
+        max_calls: Calls kept in `calls`
+
+    Attributes:
+        calls: CacheUsage of the most recent model calls
+        prefix_changes: Calls whose system prompt or tools differed from the
+            previous call's
+    """
+
+    def __init__(self, name: str = "agent", max_calls: int = 1000) -> None:
+        super().__init__()
+        self.label = name
+        self.calls: deque[CacheUsage] = deque(maxlen=max_calls)
+        self.prefix_changes = 0
+        self._prefix: str | None = None
+        self._schemas: dict[int, tuple[weakref.ref[BaseTool], str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of recent prompt tokens that were served from the cache."""
+        prompt = sum(call.prompt_tokens for call in self.calls)
+        return sum(call.cached_tokens for call in self.calls) / prompt if prompt else 0.0
+
+    def _schema(self, item: BaseTool | dict) -> str:
+        if not isinstance(item, BaseTool):
+            return json.dumps(convert_to_openai_tool(item), sort_keys=True)
+        # Tool objects are reused across calls; serialize each once. Tools are
+        # unhashable, so entries are keyed by id() and hold a weak reference
+        # that both confirms the identity and drops the entry with the tool.
+        key = id(item)
+        entry = self._schemas.get(key)
+        if entry is not None and entry[0]() is item:
+            return entry[1]
+        schema = json.dumps(convert_to_openai_tool(item), sort_keys=True)
+
+        def forget(ref: weakref.ref[BaseTool]) -> None:
+            if self._schemas.get(key, (None,))[0] is ref:
+                self._schemas.pop(key, None)
+
+        self._schemas[key] = (weakref.ref(item, forget), schema)
+        return schema
+
+    def _check_prefix(self, request: ModelRequest) -> None:
+        digest = hashlib.sha256((request.system_prompt or "").encode())
+        for item in request.tools or []:
+            digest.update(self._schema(item).encode())
+        prefix = digest.hexdigest()
+        with self._lock:
+            changed = self._prefix is not None and prefix != self._prefix
+            self._prefix = prefix
+            if changed:
+                self.prefix_changes += 1
+        if changed:
+            logger.warning(
+                f"Prompt prefix of {self.label} changed; the provider's prompt cache is cold "
+                "again (keep the system prompt and tools fixed, append dynamic content)"
+            )
+
+    def _record(self, response: ModelResponse) -> None:
+        message = next((m for m in response.result if isinstance(m, AIMessage)), None)
+        usage: Mapping[str, Any] = (
+            message.usage_metadata if message is not None else None
+        ) or {}
+        prompt_tokens = usage.get("input_tokens") or 0
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        self.calls.append(CacheUsage(prompt_tokens, cached_tokens))
+        logger.debug(f"{self.label} model call: {cached_tokens}/{prompt_tokens} prompt tokens cached")
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Check the prompt prefix and record the call's cache hits."""
+        self._check_prefix(request)
+        response = handler(request)
+        self._record(response)
+        return response
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async version of wrap_model_call."""
+        self._check_prefix(request)
+        response = await handler(request)
+        self._record(response)
+        return response
@@ -0,0 +1,388 @@
+"""Tracing and profiling middleware.
+
+Records a span for every model call, tool call and subagent hop so a slow
+task can be broken down into model, device and vision time. Spans carry
+wall-clock timing, the thread they ran on, and call details:
+
+- model: latency, time to first token (when the model streams),
+  prompt/completion token counts and prompt tokens served from the
+  provider's prompt cache
+- tool: tool name, source module (adb, internet, vision), device and status
+- subagent: `task` tool calls, with the subagent type
+
+Spans are kept in memory and, when a path is given, appended to a JSONL file
+or a Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev).
+Tools listed in `profile_tools` are additionally run under a sampling
+profiler whose collapsed stacks are attached to the span.
+"""
+
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
+
+logger = logging.getLogger(__name__)
+
+# deepagents runs subagents through this tool
+SUBAGENT_TOOL = "task"
+
+
+@dataclass
+class Span:
+    """A timed unit of agent work.
+
+    Attributes:
+        name: Model name or tool name
+        kind: "model", "tool" or "subagent"
+        span_id: Unique span identifier
+        parent_id: ID of the enclosing span (e.g. the subagent hop), if any
+        start: Wall-clock start time in seconds since the epoch
+        duration: Duration in seconds
+        thread_id: Native ID of the thread the span ran on
+        attributes: Call details (tokens, device, status, ...)
+        error: Exception message if the call raised
+    """
+
+    name: str
+    kind: str
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: str | None = None
+    start: float = field(default_factory=time.time)
+    duration: float = 0.0
+    thread_id: int = field(default_factory=threading.get_native_id)
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+
+class _FirstTokenTimer(BaseCallbackHandler):
+    """Note when a streaming model emits its first token."""
+
+    def __init__(self) -> None:
+        self.first_token_at: float | None = None
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+
+_token_timer: contextvars.ContextVar[_FirstTokenTimer | None] = contextvars.ContextVar(
+    "deepglm_first_token_timer", default=None
+)
+register_configure_hook(_token_timer, inheritable=True)
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "deepglm_current_span", default=None
+)
+
+
+class SamplingProfiler:
+    """Sample the stack of one thread at a fixed interval.
+
+    Samples are aggregated as collapsed stacks ("outer;inner" -> count), the
+    input format of flamegraph tools.
+
+    Args:
+        interval: Seconds between samples
+        max_depth: Innermost frames to keep per sample
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 32) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target = 0
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            names: list[str] = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class TracingMiddleware(AgentMiddleware):
+    """Record spans for model calls, tool calls and subagent hops.
+
+    Args:
+        path: File to append spans to; None keeps them in memory only
+        trace_format: "jsonl" (one span per line) or "chrome" (Chrome trace
+            event array)
+        profile_tools: Tool names to run under a SamplingProfiler
+        profile_interval: Sampling interval for profiled tools in seconds
+        max_spans: Spans kept in memory for `spans`
+
+    Subagents only produce nested spans if this middleware is also in their
+    middleware list; otherwise each hop is a single "subagent" span.
+
+    Example:
+        >>> tracer = TracingMiddleware("trace.json", trace_format="chrome")
+        >>> agent = create_android_agent(middleware=[tracer])
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        trace_format: str = "jsonl",
+        profile_tools: Iterable[str] = (),
+        profile_interval: float = 0.005,
+        max_spans: int = 10000,
+    ) -> None:
+        super().__init__()
+        if trace_format not in ("jsonl", "chrome"):
+            raise ValueError(f"Unknown trace format: {trace_format}")
+        self.path = path
+        self.trace_format = trace_format
+        self.profile_tools = frozenset(profile_tools)
+        self.profile_interval = profile_interval
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self._file = open(path, "a", buffering=1, encoding="utf-8")
+            if trace_format == "chrome" and self._file.tell() == 0:
+                # The closing bracket is optional in the Chrome trace format
+                self._file.write("[\n")
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _emit(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if self._file is None:
+                return
+            if self.trace_format == "chrome":
+                event = {
+                    "name": span.name,
+                    "cat": span.kind,
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": 1,
+                    "tid": span.thread_id,
+                    "args": {
+                        **span.attributes,
+                        "span_id": span.span_id,
+                        "parent_id": span.parent_id,
+                        "error": span.error,
+                    },
+                }
+                self._file.write(json.dumps(event, default=str) + ",\n")
+            else:
+                self._file.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def _start(self, name: str, kind: str, **attributes: Any) -> Span:
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            kind=kind,
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+    # Model calls
+
+    def _model_span(self, request: ModelRequest) -> Span:
+        model = request.model
+        name = getattr(model, "model_name", None) or getattr(model, "model", None)
+        return self._start(
+            str(name or type(model).__name__),
+            "model",
+            base_url=getattr(model, "openai_api_base", None),
+            messages=len(request.messages),
+        )
+
+    def _finish_model(
+        self,
+        span: Span,
+        started: float,
+        timer: _FirstTokenTimer,
+        response: ModelResponse | None,
+    ) -> None:
+        span.duration = time.perf_counter() - started
+        if timer.first_token_at is not None:
+            span.attributes["ttft"] = timer.first_token_at - started
+        if response is not None:
+            message = next((m for m in response.result if isinstance(m, AIMessage)), None)
+            usage: Mapping[str, Any] = (
+                message.usage_metadata if message is not None else None
+            ) or {}
+            span.attributes["prompt_tokens"] = usage.get("input_tokens")
+            span.attributes["completion_tokens"] = usage.get("output_tokens")
+            span.attributes["cached_tokens"] = (usage.get("input_token_details") or {}).get(
+                "cache_read"
+            )
+            span.attributes["tool_calls"] = len(message.tool_calls) if message else 0
+        self._emit(span)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Time the model call, its first token and its token usage."""
+        span = self._model_span(request)
+        timer = _FirstTokenTimer()
+        token = _token_timer.set(timer)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = handler(request)
+            return response
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _token_timer.reset(token)
+            self._finish_model(span, started, timer, response)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async version of wrap_model_call."""
+        span = self._model_span(request)
+        timer = _FirstTokenTimer()
+        token = _token_timer.set(timer)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await handler(request)
+            return response
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _token_timer.reset(token)
+            self._finish_model(span, started, timer, response)
+
+    # Tool calls and subagent hops
+
+    def _tool_span(self, request: ToolCallRequest) -> Span:
+        call = request.tool_call
+        args = call.get("args", {})
+        func = getattr(request.tool, "func", None) or getattr(request.tool, "coroutine", None)
+        module = getattr(func, "__module__", "") or ""
+        if call["name"] == SUBAGENT_TOOL:
+            return self._start(call["name"], "subagent", subagent=args.get("subagent_type"))
+        return self._start(
+            call["name"],
+            "tool",
+            module=module.rsplit(".", 1)[-1] or None,
+            device_id=args.get("device_id"),
+        )
+
+    def _finish_tool(
+        self,
+        span: Span,
+        started: float,
+        result: ToolMessage | Command | None,
+        profiler: SamplingProfiler | None,
+    ) -> None:
+        span.duration = time.perf_counter() - started
+        if isinstance(result, ToolMessage):
+            span.attributes["status"] = result.status
+        if profiler is not None:
+            span.attributes["profile"] = dict(profiler.stacks.most_common(20))
+        self._emit(span)
+
+    def wrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], ToolMessage | Command],
+    ) -> ToolMessage | Command:
+        """Time the tool call, profiling it if it is a hot tool."""
+        span = self._tool_span(request)
+        token = _current_span.set(span)
+        profiler = None
+        if request.tool_call["name"] in self.profile_tools:
+            profiler = SamplingProfiler(self.profile_interval)
+        started = time.perf_counter()
+        result = None
+        try:
+            if profiler is None:
+                result = handler(request)
+            else:
+                with profiler:
+                    result = handler(request)
+            return result
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish_tool(span, started, result, profiler)
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        """Async version of wrap_tool_call (sampling profiler not applied)."""
+        span = self._tool_span(request)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await handler(request)
+            return result
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish_tool(span, started, result, None)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Aggregate recorded spans by kind and name.
+
+        Returns:
+            Mapping "kind:name" -> {"count", "total", "max"} in seconds
+        """
+        totals: dict[str, dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(
+                f"{span.kind}:{span.name}", {"count": 0, "total": 0.0, "max": 0.0}
+            )
+            entry["count"] += 1
+            entry["total"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        return totals
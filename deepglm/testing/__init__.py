@@ -0,0 +1,6 @@
+"""Test doubles for running DeepGLM without devices or model providers."""
+
+from deepglm.testing.fake_adb import FakeAdbServer, FakeDevice  # noqa: F401
+from deepglm.testing.mock_openai import MockOpenAIServer  # noqa: F401
+
+__all__ = ["FakeAdbServer", "FakeDevice", "MockOpenAIServer"]
@@ -0,0 +1,608 @@
+"""Fake adb server for tests and benchmarks.
+
+`FakeAdbServer` speaks the adb host and transport protocol on a local TCP
+port, so the real `deepglm.tools.adb` code paths (socket I/O, framing,
+parsing) run unchanged without a device. Each `FakeDevice` emulates the
+shell commands the tools use: `input`, `getprop`, `dumpsys`, `pm`, `date`,
+`monkey`, `screencap`, `uiautomator dump`, `ime`, ADBKeyBoard broadcasts
+and `sha256sum`, plus a file system reachable through the `sync:` service
+and a `logcat -B` stream. Latency and payload sizes are configurable, so
+benchmarks can model slow devices and large screens.
+
+Example:
+    >>> with FakeAdbServer([FakeDevice("emulator-5554")]) as server:
+    ...     client = AdbClient(port=server.port)
+    ...     client.shell("emulator-5554", "getprop ro.product.model")
+    'Fake Pixel\\n'
+"""
+
+import base64
+import hashlib
+import posixpath
+import re
+import shlex
+import socketserver
+import stat
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# Layout of the scrollable list (FakeDevice.list_rows)
+_TOOLBAR_HEIGHT = 200
+_LIST_ROW_HEIGHT = 150
+
+
+def encode_png(width: int, height: int, rgba: bytes, level: int = 1) -> bytes:
+    """Encode raw RGBA pixels as a PNG image.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        rgba: width * height * 4 bytes of pixel data
+        level: zlib compression level
+
+    Returns:
+        PNG file bytes
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    stride = width * 4
+    rows = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows, level))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _split_sequence(command: str) -> list[str]:
+    """Split a command list at "; " outside quotes, escapes and parentheses."""
+    parts = []
+    depth, quote, start, i = 0, "", 0, 0
+    while i < len(command):
+        char = command[i]
+        if char == "\\":
+            i += 2
+            continue
+        if quote:
+            quote = "" if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "()":
+            depth += 1 if char == "(" else -1
+        elif depth == 0 and command.startswith("; ", i):
+            parts.append(command[start:i])
+            start = i + 2
+            i += 1
+        i += 1
+    parts.append(command[start:])
+    return parts
+
+
+@dataclass
+class FakeDevice:
+    """An emulated Android device.
+
+    Attributes:
+        serial: Device serial reported by host:devices
+        state: Device state ("device", "offline", "unauthorized")
+        width: Screen width in pixels
+        height: Screen height in pixels
+        latency: Seconds to wait before answering each service request
+        package_count: Number of extra packages reported by `pm list packages`
+        hierarchy_nodes: Number of nodes in the `uiautomator dump` output
+        list_rows: If set, the hierarchy is instead a scrollable list of this
+            many rows ("Row 0", "Row 1", ...) that `input swipe` scrolls
+        list_row_height: Height of each list row in pixels
+        scroll_offset: Pixels the list is scrolled by
+        clock_offset: Seconds the device clock is ahead of the host's (log
+            timestamps and `date` use it)
+        battery_level: Value reported by `dumpsys battery`
+        props: System properties reported by `getprop`
+        resumed_activity: Component reported as the resumed activity
+        files: Device file system as path -> (content, mode, mtime)
+        commands: Shell commands received, in order
+        sync_requests: Sync protocol requests received, as (ID, path)
+        logs: Binary logcat entries written with log()
+        input_methods: Installed IMEs reported by `ime list -a -s`
+        current_ime: Selected IME
+        typed: Text typed through `input text` or an ADBKeyBoard broadcast
+    """
+
+    serial: str
+    state: str = "device"
+    width: int = 1080
+    height: int = 2400
+    latency: float = 0.0
+    package_count: int = 200
+    hierarchy_nodes: int = 50
+    list_rows: int = 0
+    list_row_height: int = _LIST_ROW_HEIGHT
+    scroll_offset: int = 0
+    clock_offset: float = 0.0
+    battery_level: int = 80
+    props: dict[str, str] = field(
+        default_factory=lambda: {
+            "ro.product.model": "Fake Pixel",
+            "ro.product.manufacturer": "DeepGLM",
+            "ro.build.version.release": "14",
+            "ro.build.version.sdk": "34",
+        }
+    )
+    resumed_activity: str = "com.google.android.apps.nexuslauncher/.NexusLauncherActivity"
+    files: dict[str, tuple[bytes, int, int]] = field(default_factory=dict)
+    commands: list[str] = field(default_factory=list)
+    sync_requests: list[tuple[str, str]] = field(default_factory=list)
+    logs: list[bytes] = field(default_factory=list)
+    input_methods: list[str] = field(
+        default_factory=lambda: ["com.google.android.inputmethod.latin/.LatinIME"]
+    )
+    current_ime: str = "com.google.android.inputmethod.latin/.LatinIME"
+    typed: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._logged = threading.Condition()
+        self._frame_id = 0
+        self._png_cache: tuple[int, bytes] | None = None
+
+    @property
+    def packages(self) -> list[str]:
+        """Installed packages: a few well-known apps plus generated ones."""
+        base = [
+            "com.android.settings",
+            "com.android.chrome",
+            "com.google.android.youtube",
+            "com.google.android.apps.nexuslauncher",
+        ]
+        return base + [f"com.example.app{i}" for i in range(self.package_count)]
+
+    def frame(self) -> bytes:
+        """Raw RGBA pixels for the current screen; changes after each input."""
+        shade = (self._frame_id * 37) % 256
+        return bytes((shade, shade, shade, 255)) * (self.width * self.height)
+
+    def touch(self) -> None:
+        """Advance the screen content, as any input event would."""
+        with self._lock:
+            self._frame_id += 1
+
+    def log(self, message: str, tag: str = "FakeApp", level: int = 4, pid: int = 1000) -> None:
+        """Write a log entry, delivered to open logcat streams.
+
+        Args:
+            message: Log message
+            tag: Log tag
+            level: Android priority (2 verbose ... 6 error, 7 fatal)
+            pid: Process ID of the writer
+        """
+        payload = bytes([level]) + tag.encode() + b"\0" + message.encode() + b"\0"
+        now = time.time() + self.clock_offset
+        header = struct.pack(
+            "<HHiIIIII", len(payload), 28, pid, pid, int(now), int(now % 1 * 1e9), 0, 10000
+        )
+        with self._logged:
+            self.logs.append(header + payload)
+            self._logged.notify_all()
+
+    def logs_since(self, when: float) -> int:
+        """Index of the first log entry written at or after `when`."""
+        with self._logged:
+            for i, entry in enumerate(self.logs):
+                sec, nsec = struct.unpack_from("<II", entry, 12)
+                if sec + nsec / 1e9 >= when:
+                    return i
+            return len(self.logs)
+
+    def stream_logs(
+        self, send: Callable[[bytes], None], stopped: Callable[[], bool], start: int
+    ) -> None:
+        """Send entries from index start on, then new ones as they are logged."""
+        sent = start
+        while not stopped():
+            with self._logged:
+                self._logged.wait_for(lambda: len(self.logs) > sent, timeout=0.1)
+                pending = self.logs[sent:]
+            if pending:
+                send(b"".join(pending))
+                sent += len(pending)
+
+    def screencap_png(self) -> bytes:
+        """PNG of the current frame, cached until the screen changes."""
+        with self._lock:
+            frame_id = self._frame_id
+            if self._png_cache is not None and self._png_cache[0] == frame_id:
+                return self._png_cache[1]
+        png = encode_png(self.width, self.height, self.frame())
+        with self._lock:
+            self._png_cache = (frame_id, png)
+        return png
+
+    def hierarchy(self) -> str:
+        """uiautomator XML with `hierarchy_nodes` clickable nodes or the list."""
+        if self.list_rows:
+            return self._list_hierarchy()
+        row_height = max(1, self.height // max(1, self.hierarchy_nodes))
+        nodes = "".join(
+            f'<node index="{i}" text="Item {i}" resource-id="com.example:id/item_{i}" '
+            f'class="android.widget.TextView" package="com.example" clickable="true" '
+            f'bounds="[0,{i * row_height}][{self.width},{(i + 1) * row_height}]" />'
+            for i in range(self.hierarchy_nodes)
+        )
+        return (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+            f'<hierarchy rotation="0"><node index="0" class="android.widget.FrameLayout" '
+            f'bounds="[0,0][{self.width},{self.height}]">{nodes}</node></hierarchy>'
+        )
+
+    def _list_hierarchy(self) -> str:
+        """A toolbar above a RecyclerView showing the rows at the scroll offset."""
+        top = _TOOLBAR_HEIGHT
+        rows = []
+        for i in range(self.list_rows):
+            y = top + i * self.list_row_height - self.scroll_offset
+            if y + self.list_row_height <= top or y >= self.height:
+                continue
+            rows.append(
+                f'<node index="{i}" text="Row {i}" resource-id="com.example:id/title" '
+                f'class="android.widget.TextView" package="com.example" clickable="true" '
+                f'bounds="[0,{max(top, y)}][{self.width},'
+                f'{min(self.height, y + self.list_row_height)}]" />'
+            )
+        return (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+            f'<hierarchy rotation="0"><node index="0" class="android.widget.FrameLayout" '
+            f'bounds="[0,0][{self.width},{self.height}]">'
+            f'<node index="0" text="Rows" class="android.widget.TextView" '
+            f'bounds="[0,0][{self.width},{top}]" />'
+            f'<node index="1" resource-id="com.example:id/list" '
+            f'class="androidx.recyclerview.widget.RecyclerView" scrollable="true" '
+            f'bounds="[0,{top}][{self.width},{self.height}]">{"".join(rows)}</node>'
+            "</node></hierarchy>"
+        )
+
+    def scroll(self, dy: int) -> None:
+        """Scroll the list by dy pixels, stopping at either end."""
+        end = max(0, _TOOLBAR_HEIGHT + self.list_rows * self.list_row_height - self.height)
+        self.scroll_offset = min(end, max(0, self.scroll_offset + dy))
+
+    def run(self, command: str) -> bytes:
+        """Execute a shell command (or a "; "-separated list) and return its output."""
+        self.commands.append(command)
+        return self._sequence(command)[0]
+
+    def _sequence(self, command: str) -> tuple[bytes, int]:
+        output, status = b"", 0
+        for part in _split_sequence(command):
+            if part.startswith("(") and part.endswith(")"):
+                # Subshell: its exit only ends the group
+                result, status = self._sequence(part[1:-1].strip())
+            elif part == "echo" or part.startswith("echo "):
+                text = part[5:].strip("'").replace("$?", str(status))
+                result = f"{text}\n".encode()
+            elif part == "exit" or part.startswith("exit "):
+                return output, int(part[5:] or status)
+            else:
+                result, status = self._execute(part)
+            output += result
+        return output, status
+
+    def _execute(self, command: str) -> tuple[bytes, int]:
+        if " && " in command:
+            output = b""
+            for part in command.split(" && "):
+                result, status = self._execute(part)
+                output += result
+                if status:
+                    return output, status
+            return output, 0
+        if command == "date +%s.%N":
+            return f"{time.time() + self.clock_offset:.9f}\n".encode(), 0
+        if command.startswith("input text "):
+            text = re.sub(r"\\(.)", r"\1", command[len("input text "):].replace("%s", " "))
+            self.typed.append(text)
+            self.touch()
+            return b"", 0
+        if command.startswith("input swipe "):
+            _, y1, _, y2 = (int(v) for v in command.split()[2:6])
+            self.scroll(y1 - y2)
+            self.touch()
+            return b"", 0
+        if command.startswith("input "):
+            self.touch()
+            return b"", 0
+        if command == "ime list -a -s":
+            return "".join(f"{ime}\n" for ime in self.input_methods).encode(), 0
+        if command == "settings get secure default_input_method":
+            return f"{self.current_ime}\n".encode(), 0
+        if command.startswith(("ime enable ", "ime set ")):
+            ime = command.split()[2]
+            if ime not in self.input_methods:
+                return f"Unknown input method {ime} cannot be selected\n".encode(), 255
+            if command.startswith("ime set "):
+                self.current_ime = ime
+            return f"Input method {ime} selected\n".encode(), 0
+        if command.startswith("am broadcast -a ADB_INPUT_B64 --es msg "):
+            if self.current_ime == "com.android.adbkeyboard/.AdbIME":
+                self.typed.append(base64.b64decode(command.split()[-1]).decode("utf-8"))
+                self.touch()
+            return b"Broadcasting: Intent { act=ADB_INPUT_B64 }\nBroadcast completed: result=0\n", 0
+        if command == "getprop":
+            return "".join(f"[{k}]: [{v}]\n" for k, v in self.props.items()).encode(), 0
+        if command.startswith("getprop "):
+            return f"{self.props.get(command.split()[1], '')}\n".encode(), 0
+        if command == "dumpsys battery":
+            return f"Current Battery Service state:\n  level: {self.battery_level}\n".encode(), 0
+        if command.startswith("dumpsys window"):
+            return b"  mAppTransitionState=APP_STATE_IDLE\n", 0
+        if command.startswith("dumpsys activity activities"):
+            return (
+                f"  topResumedActivity=ActivityRecord{{1 u0 {self.resumed_activity} t1}}\n"
+            ).encode(), 0
+        if command == "pm list packages":
+            return "".join(f"package:{p}\n" for p in self.packages).encode(), 0
+        if command.startswith("monkey -p "):
+            package = command.split()[2]
+            if package not in self.packages:
+                return b"** No activities found to run, monkey aborted.\n", 252
+            self.resumed_activity = f"{package}/.MainActivity"
+            self.touch()
+            return b"Events injected: 1\n", 0
+        if command == "screencap -p":
+            return self.screencap_png(), 0
+        if command == "screencap":
+            header = struct.pack("<IIII", self.width, self.height, 1, 0)
+            return header + self.frame(), 0
+        if command == "uiautomator dump /dev/tty":
+            return (self.hierarchy() + "UI hierchary dumped to: /dev/tty\n").encode(), 0
+        if command.startswith("sha256sum "):
+            lines = []
+            for path in shlex.split(command)[1:]:
+                if path in self.files:
+                    lines.append(f"{hashlib.sha256(self.files[path][0]).hexdigest()}  {path}\n")
+            return "".join(lines).encode(), 0
+        name = command.split()[0] if command.split() else ""
+        return f"/system/bin/sh: {name}: not found\n".encode(), 127
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serve one adb client connection."""
+
+    server: "_Server"
+
+    def handle(self) -> None:
+        device: FakeDevice | None = None
+        while True:
+            request = self._read_request()
+            if request is None:
+                return
+            if request.startswith("host:transport:") or request == "host:transport-any":
+                device = self._select(request)
+                if device is None:
+                    return
+                self._okay()
+                continue
+            if request.startswith("host:"):
+                self._host(request)
+                return
+            if device is None:
+                self._fail("no device selected")
+                return
+            time.sleep(device.latency)
+            if request.startswith("exec:logcat -B"):
+                # -T <epoch seconds>: start from the first entry logged at or after it
+                match = re.search(r"-T (\d+(?:\.\d+)?)", request)
+                start = device.logs_since(float(match.group(1))) if match else len(device.logs)
+                self._okay()
+                try:
+                    device.stream_logs(
+                        self.request.sendall, lambda: self.server.stopping, start
+                    )
+                except OSError:
+                    pass
+                return
+            if request.startswith(("shell:", "exec:")):
+                self._okay()
+                self.request.sendall(device.run(request.split(":", 1)[1]))
+                return
+            if request == "sync:":
+                self._okay()
+                self._sync(device)
+                return
+            self._fail(f"unsupported service {request}")
+            return
+
+    def _sync(self, device: FakeDevice) -> None:
+        """Serve sync protocol requests until QUIT or disconnect."""
+        while True:
+            header = self._read_exact(8)
+            if header is None:
+                return
+            command = header[:4].decode()
+            length = struct.unpack("<I", header[4:])[0]
+            if command == "QUIT":
+                return
+            path = (self._read_exact(length) or b"").decode()
+            device.sync_requests.append((command, path))
+            if command == "STAT":
+                self._sync_stat(device, path)
+            elif command == "LIST":
+                self._sync_list(device, path)
+            elif command == "SEND":
+                self._sync_send(device, path)
+            elif command == "RECV":
+                self._sync_recv(device, path)
+            else:
+                return
+
+    def _sync_stat(self, device: FakeDevice, path: str) -> None:
+        path = path.rstrip("/") or "/"
+        if path in device.files:
+            data, mode, mtime = device.files[path]
+            reply = struct.pack("<III", mode, len(data), mtime)
+        elif any(f.startswith(path + "/") for f in device.files):
+            reply = struct.pack("<III", stat.S_IFDIR | 0o771, 4096, 0)
+        else:
+            reply = struct.pack("<III", 0, 0, 0)
+        self.request.sendall(b"STAT" + reply)
+
+    def _sync_list(self, device: FakeDevice, path: str) -> None:
+        prefix = path.rstrip("/") + "/"
+        entries: dict[str, tuple[int, int, int]] = {}
+        for file, (data, mode, mtime) in device.files.items():
+            if file.startswith(prefix):
+                name, _, rest = file[len(prefix):].partition("/")
+                entries[name] = (stat.S_IFDIR | 0o771, 4096, 0) if rest else (mode, len(data), mtime)
+        out = b""
+        for name, (mode, size, mtime) in [(".", (stat.S_IFDIR | 0o771, 4096, 0)), *entries.items()]:
+            encoded = name.encode()
+            out += b"DENT" + struct.pack("<IIII", mode, size, mtime, len(encoded)) + encoded
+        self.request.sendall(out + b"DONE" + bytes(16))
+
+    def _sync_send(self, device: FakeDevice, spec: str) -> None:
+        path, _, mode = spec.rpartition(",")
+        chunks = []
+        while True:
+            header = self._read_exact(8)
+            if header is None:
+                return
+            kind, value = header[:4], struct.unpack("<I", header[4:])[0]
+            if kind == b"DONE":
+                break
+            chunks.append(self._read_exact(value) or b"")
+        device.files[posixpath.normpath(path)] = (b"".join(chunks), int(mode), value)
+        self.request.sendall(b"OKAY" + bytes(4))
+
+    def _sync_recv(self, device: FakeDevice, path: str) -> None:
+        if path not in device.files:
+            message = b"No such file or directory"
+            self.request.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+            return
+        data = device.files[path][0]
+        out = b""
+        for start in range(0, len(data), 65536):
+            chunk = data[start:start + 65536]
+            out += b"DATA" + struct.pack("<I", len(chunk)) + chunk
+        self.request.sendall(out + b"DONE" + bytes(4))
+
+    def _read_request(self) -> str | None:
+        header = self._read_exact(4)
+        if header is None:
+            return None
+        body = self._read_exact(int(header, 16))
+        return body.decode() if body is not None else None
+
+    def _read_exact(self, size: int) -> bytes | None:
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _okay(self) -> None:
+        self.request.sendall(b"OKAY")
+
+    def _fail(self, message: str) -> None:
+        data = message.encode()
+        self.request.sendall(b"FAIL" + b"%04x" % len(data) + data)
+
+    def _reply(self, body: str) -> None:
+        data = body.encode()
+        self.request.sendall(b"OKAY" + b"%04x" % len(data) + data)
+
+    def _select(self, request: str) -> FakeDevice | None:
+        devices = self.server.devices
+        if request == "host:transport-any":
+            online = [d for d in devices.values() if d.state == "device"]
+            if len(online) != 1:
+                self._fail("more than one device/emulator" if online else "no devices/emulators found")
+                return None
+            return online[0]
+        serial = request[len("host:transport:"):]
+        device = devices.get(serial)
+        if device is None:
+            self._fail(f"device '{serial}' not found")
+            return None
+        if device.state != "device":
+            self._fail(f"device {device.state}")
+            return None
+        return device
+
+    def _host(self, request: str) -> None:
+        if request == "host:version":
+            self._reply("0029")
+        elif request == "host:devices":
+            self._reply("".join(f"{d.serial}\t{d.state}\n" for d in self.server.devices.values()))
+        else:
+            match = re.match(r"host-serial:([^:]+):get-state", request)
+            device = self.server.devices.get(match.group(1)) if match else None
+            if device is None:
+                self._fail(f"unsupported service {request}")
+            else:
+                self._reply(device.state)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    devices: dict[str, FakeDevice]
+    stopping = False
+
+
+class FakeAdbServer:
+    """Local stand-in for the adb server.
+
+    Args:
+        devices: Emulated devices to expose
+        port: TCP port to listen on (0 picks a free port)
+
+    The server runs in a background thread between start() and stop(),
+    or for the duration of a `with` block.
+    """
+
+    def __init__(self, devices: list[FakeDevice], port: int = 0) -> None:
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.devices = {d.serial: d for d in devices}
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return self._server.server_address[1]
+
+    @property
+    def devices(self) -> dict[str, FakeDevice]:
+        """Emulated devices keyed by serial."""
+        return self._server.devices
+
+    def start(self) -> "FakeAdbServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        self._server.stopping = True
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeAdbServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
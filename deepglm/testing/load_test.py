@@ -0,0 +1,322 @@
+"""End-to-end load-test harness for the Android agent.
+
+Drives `create_android_agent` against `MockOpenAIServer` and a
+`FakeAdbServer` with N concurrent tasks, and reports where step time goes:
+
+- model time: wall time inside model calls, of which provider time is
+  what the mock server spent (the rest is tool binding and the HTTP client)
+- device time: wall time inside tool calls (parallel calls counted once)
+- framework overhead: everything else (LangGraph/deepagents/middleware)
+
+It also reports RSS growth per task and throughput at each concurrency
+level, so scaling past a few dozen sessions can be checked without
+devices or a model provider.
+
+Usage:
+    python -m deepglm.testing.load_test --concurrency 1 8 32 --model-latency 0.2
+"""
+
+import argparse
+import contextvars
+import gc
+import logging
+import os
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware
+
+from deepglm.config import settings
+from deepglm.testing.fake_adb import FakeAdbServer, FakeDevice
+from deepglm.testing.mock_openai import MockOpenAIServer
+
+logger = logging.getLogger(__name__)
+
+# A representative device task: parallel reads, two actions, a check, a reply
+DEFAULT_SCRIPT: list[str | list[dict[str, Any]]] = [
+    [
+        {"name": "get_battery_level", "args": {"device_id": "{device_id}"}},
+        {"name": "list_packages", "args": {"device_id": "{device_id}"}},
+    ],
+    [
+        {
+            "name": "launch_app",
+            "args": {"device_id": "{device_id}", "package_name": "com.android.settings"},
+        }
+    ],
+    [{"name": "tap", "args": {"device_id": "{device_id}", "x": 540, "y": 1200}}],
+    [{"name": "dump_ui_hierarchy", "args": {"device_id": "{device_id}"}}],
+    "Opened Settings and tapped the first entry.",
+]
+
+
+@dataclass
+class _TaskStats:
+    model_seconds: float = 0.0
+    model_calls: int = 0
+    tool_intervals: list[tuple[float, float]] = field(default_factory=list)
+
+    def tool_seconds(self) -> float:
+        """Length of the union of tool call intervals."""
+        total = 0.0
+        end = float("-inf")
+        for start, stop in sorted(self.tool_intervals):
+            if stop <= end:
+                continue
+            total += stop - max(start, end)
+            end = stop
+        return total
+
+
+_current_task: contextvars.ContextVar[_TaskStats | None] = contextvars.ContextVar(
+    "deepglm_load_task", default=None
+)
+
+
+class _StepTimer(AgentMiddleware):
+    """Attribute model and tool wall time to the running load-test task."""
+
+    def wrap_model_call(self, request, handler):
+        stats = _current_task.get()
+        start = time.perf_counter()
+        try:
+            return handler(request)
+        finally:
+            if stats is not None:
+                stats.model_seconds += time.perf_counter() - start
+                stats.model_calls += 1
+
+    def wrap_tool_call(self, request, handler):
+        stats = _current_task.get()
+        start = time.perf_counter()
+        try:
+            return handler(request)
+        finally:
+            if stats is not None:
+                stats.tool_intervals.append((start, time.perf_counter()))
+
+
+@dataclass
+class LoadReport:
+    """Results for one concurrency level.
+
+    Attributes:
+        concurrency: Number of tasks in flight at once
+        tasks: Tasks completed
+        errors: Tasks that raised
+        steps: Model calls made across all tasks
+        wall_seconds: Wall time for the whole level
+        tasks_per_second: Completed tasks per second
+        model_ms_per_step: Mean model time per step
+        provider_ms_per_step: Mean server-side model time per step
+        device_ms_per_step: Mean tool/device time per step
+        overhead_ms_per_step: Mean framework overhead per step
+        rss_growth_kib_per_task: Resident memory growth divided by tasks
+    """
+
+    concurrency: int
+    tasks: int
+    errors: int
+    steps: int
+    wall_seconds: float
+    tasks_per_second: float
+    model_ms_per_step: float
+    provider_ms_per_step: float
+    device_ms_per_step: float
+    overhead_ms_per_step: float
+    rss_growth_kib_per_task: float | None
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _run_task(agent, device_id: str, index: int) -> tuple[_TaskStats, float]:
+    stats = _TaskStats()
+    token = _current_task.set(stats)
+    start = time.perf_counter()
+    try:
+        agent.invoke(
+            {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": f"Task {index}: open Settings [device:{device_id}]",
+                    }
+                ]
+            }
+        )
+    finally:
+        _current_task.reset(token)
+    return stats, time.perf_counter() - start
+
+
+def run_level(
+    agent,
+    model_server: MockOpenAIServer,
+    device_ids: Sequence[str],
+    concurrency: int,
+    tasks: int,
+) -> LoadReport:
+    """Run `tasks` agent invocations with `concurrency` in flight at once.
+
+    Task i runs on device_ids[i % concurrency], so concurrent tasks never
+    share a device.
+    """
+    gc.collect()
+    rss_before = _rss_bytes()
+    provider_before = model_server.busy_seconds
+    results: list[tuple[_TaskStats, float]] = []
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _run_task,
+                agent,
+                device_ids[i % concurrency],
+                i,
+            )
+            for i in range(tasks)
+        ]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors += 1
+                logger.warning(f"Load-test task failed: {e}")
+    wall = time.perf_counter() - start
+    provider = model_server.busy_seconds - provider_before
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    steps = sum(s.model_calls for s, _ in results) or 1
+    model = sum(s.model_seconds for s, _ in results)
+    device = sum(s.tool_seconds() for s, _ in results)
+    overhead = sum(task_wall for _, task_wall in results) - model - device
+    return LoadReport(
+        concurrency=concurrency,
+        tasks=len(results),
+        errors=errors,
+        steps=sum(s.model_calls for s, _ in results),
+        wall_seconds=wall,
+        tasks_per_second=len(results) / wall if wall else 0.0,
+        model_ms_per_step=model / steps * 1000,
+        provider_ms_per_step=provider / steps * 1000,
+        device_ms_per_step=device / steps * 1000,
+        overhead_ms_per_step=overhead / steps * 1000,
+        rss_growth_kib_per_task=(
+            (rss_after - rss_before) / 1024 / max(1, len(results))
+            if rss_before is not None and rss_after is not None
+            else None
+        ),
+    )
+
+
+def run_load_test(
+    concurrency_levels: Sequence[int] = (1, 4, 16),
+    tasks_per_level: int | None = None,
+    script: list[str | list[dict[str, Any]]] | None = None,
+    model_latency: float = 0.05,
+    tokens_per_second: float = 0.0,
+    device_latency: float = 0.0,
+    agent_factory: Callable[..., Any] | None = None,
+) -> list[LoadReport]:
+    """Run the agent under increasing concurrency against mock backends.
+
+    Args:
+        concurrency_levels: Numbers of concurrent tasks to measure
+        tasks_per_level: Tasks per level (defaults to 2x the concurrency)
+        script: Mock model script (defaults to DEFAULT_SCRIPT)
+        model_latency: Mock model time to first token in seconds
+        tokens_per_second: Mock generation rate (0 = instant)
+        device_latency: Fake device latency per adb request in seconds
+        agent_factory: Agent factory accepting `middleware=`; defaults to
+            create_android_agent
+
+    Returns:
+        One LoadReport per concurrency level
+    """
+    if agent_factory is None:
+        from deepglm.agents.main_agent import create_android_agent
+
+        agent_factory = create_android_agent
+
+    devices = [
+        FakeDevice(f"fake-{i}", width=270, height=600, latency=device_latency)
+        for i in range(max(concurrency_levels))
+    ]
+    saved = (settings.OPENAI_BASE_URL, settings.OPENAI_BASE_URLS, settings.ADB_SERVER_PORT)
+    with (
+        MockOpenAIServer(
+            script or DEFAULT_SCRIPT, latency=model_latency, tokens_per_second=tokens_per_second
+        ) as model_server,
+        FakeAdbServer(devices) as adb_server,
+    ):
+        settings.OPENAI_BASE_URL = model_server.url
+        settings.OPENAI_BASE_URLS = []
+        settings.ADB_SERVER_PORT = adb_server.port
+        try:
+            agent = agent_factory(middleware=[_StepTimer()])
+            device_ids = [d.serial for d in devices]
+            return [
+                run_level(agent, model_server, device_ids, level, tasks_per_level or 2 * level)
+                for level in concurrency_levels
+            ]
+        finally:
+            settings.OPENAI_BASE_URL, settings.OPENAI_BASE_URLS, settings.ADB_SERVER_PORT = saved
+
+
+def format_reports(reports: Sequence[LoadReport]) -> str:
+    """Format reports as a table, with scaling relative to the first level."""
+    base = reports[0].tasks_per_second / reports[0].concurrency if reports else 0.0
+    lines = [
+        f"{'conc':>5}{'tasks':>7}{'err':>5}{'tasks/s':>9}{'scaling':>9}"
+        f"{'model ms':>10}{'provider ms':>13}{'device ms':>11}{'overhead ms':>13}"
+        f"{'RSS KiB/task':>14}"
+    ]
+    for r in reports:
+        scaling = r.tasks_per_second / (base * r.concurrency) if base else 0.0
+        rss = f"{r.rss_growth_kib_per_task:.1f}" if r.rss_growth_kib_per_task is not None else "n/a"
+        lines.append(
+            f"{r.concurrency:>5}{r.tasks:>7}{r.errors:>5}{r.tasks_per_second:>9.2f}{scaling:>9.2f}"
+            f"{r.model_ms_per_step:>10.1f}{r.provider_ms_per_step:>13.1f}"
+            f"{r.device_ms_per_step:>11.1f}"
+            f"{r.overhead_ms_per_step:>13.1f}{rss:>14}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load-test the DeepGLM agent with mock backends")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--tasks", type=int, default=None, help="tasks per level")
+    parser.add_argument("--model-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--device-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    for name in ("deepglm", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    reports = run_load_test(
+        concurrency_levels=args.concurrency,
+        tasks_per_level=args.tasks,
+        model_latency=args.model_latency,
+        tokens_per_second=args.tokens_per_second,
+        device_latency=args.device_latency,
+    )
+    print(format_reports(reports))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Scripted mock of an OpenAI-compatible chat completions server.
+
+`MockOpenAIServer` answers `POST /v1/chat/completions` with canned responses
+from a script, so agents can be driven end to end without a model provider.
+The script is indexed by the number of assistant messages already in the
+request, which makes the server stateless and safe for many concurrent
+conversations. Latency and token rate are configurable, and both plain and
+streaming (SSE) responses are supported.
+
+Like real providers, the server caches prompt prefixes: the usage of every
+response reports, as `prompt_tokens_details.cached_tokens`, how much of the
+prompt (tool schemas, then messages) it shares with earlier requests, in
+blocks of 64 tokens at 4 characters per token.
+
+Script steps are either a string (final assistant text) or a list of tool
+calls as `{"name": ..., "args": {...}}`. String values in tool arguments
+may use `{device_id}`, which is filled from a `[device:<id>]` tag in the
+first user message.
+
+Example:
+    >>> script = [
+    ...     [{"name": "get_battery_level", "args": {"device_id": "{device_id}"}}],
+    ...     "The battery is fine.",
+    ... ]
+    >>> with MockOpenAIServer(script, latency=0.2) as server:
+    ...     model = ChatOpenAI(model="mock", api_key="x", base_url=server.url)
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_DEVICE_TAG_RE = re.compile(r"\[device:([^\]]+)\]")
+
+# Prompt cache granularity, in characters (64 tokens of 4 characters)
+_CACHE_BLOCK = 256
+
+
+def _fill(value: Any, device_id: str) -> Any:
+    """Substitute {device_id} in string values of tool arguments."""
+    if isinstance(value, str):
+        return value.replace("{device_id}", device_id)
+    if isinstance(value, dict):
+        return {k: _fill(v, device_id) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, device_id) for v in value]
+    return value
+
+
+def _text(content: Any) -> str:
+    """Flatten OpenAI message content (string or parts) to text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return ""
+
+
+class MockOpenAIServer:
+    """Local chat completions server that replays a script.
+
+    Args:
+        script: Responses by step; see the module docstring
+        latency: Seconds before the first token of every response
+        tokens_per_second: Generation rate for completion tokens (0 = instant)
+        final_text: Response once the script is exhausted
+
+    Attributes:
+        requests: Number of completion requests served
+        busy_seconds: Total simulated model time across all requests
+        cached_tokens: Total prompt tokens served from the prompt cache
+    """
+
+    def __init__(
+        self,
+        script: list[str | list[dict[str, Any]]],
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        final_text: str = "Done.",
+    ) -> None:
+        self.script = script
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.final_text = final_text
+        self.requests = 0
+        self.busy_seconds = 0.0
+        self.cached_tokens = 0
+        self._prefixes: set[int] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to an OpenAI client."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        """Start serving in a background thread."""
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self, body: dict) -> dict:
+        """Build the assistant message for a request.
+
+        Returns:
+            Dict with "content" (str or None), "tool_calls" (list) and
+            "completion_tokens" (int)
+        """
+        messages = body.get("messages", [])
+        step = sum(1 for m in messages if m.get("role") == "assistant")
+        first_user: dict[str, Any] = next((m for m in messages if m.get("role") == "user"), {})
+        match = _DEVICE_TAG_RE.search(_text(first_user.get("content")))
+        device_id = match.group(1) if match else ""
+
+        item = self.script[step] if step < len(self.script) else self.final_text
+        if isinstance(item, str):
+            return {"content": item, "tool_calls": [], "completion_tokens": len(item.split())}
+        tool_calls: list[dict[str, Any]] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(_fill(call.get("args", {}), device_id)),
+                },
+            }
+            for call in item
+        ]
+        tokens = sum(len(c["function"]["arguments"]) // 4 + 1 for c in tool_calls)
+        return {"content": None, "tool_calls": tool_calls, "completion_tokens": tokens}
+
+    def cache_prompt(self, body: dict) -> tuple[int, int]:
+        """Count a request's prompt tokens and how many of them were cached.
+
+        Returns:
+            Tuple of (prompt_tokens, cached_tokens)
+        """
+        prompt = json.dumps([body.get("tools", []), body.get("messages", [])])
+        blocks = [hash(prompt[:end]) for end in range(_CACHE_BLOCK, len(prompt), _CACHE_BLOCK)]
+        with self._lock:
+            hits = 0
+            while hits < len(blocks) and blocks[hits] in self._prefixes:
+                hits += 1
+            self._prefixes.update(blocks)
+            self.cached_tokens += hits * _CACHE_BLOCK // 4
+        return len(prompt) // 4, hits * _CACHE_BLOCK // 4
+
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.busy_seconds += seconds
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                start = time.monotonic()
+                reply = mock.respond(body)
+                prompt_tokens, cached_tokens = mock.cache_prompt(body)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": reply["completion_tokens"],
+                    "total_tokens": prompt_tokens + reply["completion_tokens"],
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                }
+                time.sleep(mock.latency)
+                if body.get("stream"):
+                    self._stream(body, reply, usage)
+                else:
+                    if mock.tokens_per_second:
+                        time.sleep(reply["completion_tokens"] / mock.tokens_per_second)
+                    self._complete(body, reply, usage)
+                mock._record(time.monotonic() - start)
+
+            def _complete(self, body: dict, reply: dict, usage: dict) -> None:
+                message: dict[str, Any] = {"role": "assistant", "content": reply["content"]}
+                if reply["tool_calls"]:
+                    message["tool_calls"] = reply["tool_calls"]
+                payload = json.dumps(
+                    {
+                        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": message,
+                                "finish_reason": "tool_calls" if reply["tool_calls"] else "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body: dict, reply: dict, usage: dict) -> None:
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+                def send(delta: dict, finish: str | None = None, extra: dict | None = None):
+                    chunk = {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                        **(extra or {}),
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+
+                delay = 1 / mock.tokens_per_second if mock.tokens_per_second else 0.0
+                send({"role": "assistant", "content": ""})
+                if reply["tool_calls"]:
+                    time.sleep(delay * reply["completion_tokens"])
+                    send(
+                        {
+                            "tool_calls": [
+                                {"index": i, **call} for i, call in enumerate(reply["tool_calls"])
+                            ]
+                        }
+                    )
+                else:
+                    for word in reply["content"].split(" "):
+                        send({"content": word + " "})
+                        time.sleep(delay)
+                send({}, finish="tool_calls" if reply["tool_calls"] else "stop")
+                if body.get("stream_options", {}).get("include_usage"):
+                    self.wfile.write(
+                        f"data: {json.dumps({'id': chunk_id, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n".encode()
+                    )
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
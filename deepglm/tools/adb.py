@@ -1,27 +1,60 @@
 """ADB command wrappers for Android device control.
 
 This module provides functions for interacting with Android devices via ADB.
-All functions are currently placeholder implementations that raise NotImplementedError.
-They will be implemented in Phase 2 of the project.
+Commands are sent to the adb server through `deepglm.tools.adb_client`.
+Functions that are not yet implemented raise NotImplementedError; they will
+be filled in as the remaining Phase 2 work lands.
 
 The functions include type hints and detailed docstrings to guide future implementation.
 """
 
-from typing import List
+import base64
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+
+from deepglm.config import settings
+from deepglm.exceptions import ToolExecutionError
+from deepglm.tools.adb_client import AdbClient
+from deepglm.tools.command_queue import CommandQueue
+from deepglm.tools.hierarchy import (
+    Selector,
+    UINode,
+    content_keys,
+    inside,
+    parse_hierarchy,
+    scroll_area,
+)
+from deepglm.tools.logcat import LogcatMonitor, LogcatReport
+from deepglm.tools.prefetch import Observation, ObservationPrefetcher
+from deepglm.tools.screenshots import ScreenshotStore
+from deepglm.tools.sync import DirectorySync, SyncResult
+
+logger = logging.getLogger(__name__)
 
 
 # Type aliases for future implementation
+@dataclass
 class DeviceInfo:
     """Information about an Android device.
 
-    Attributes will include:
+    Attributes:
         device_id: Unique device identifier
         model: Device model name
+        manufacturer: Device manufacturer
         android_version: Android OS version
+        sdk_version: Android API level
         status: Device status (online/offline)
     """
 
-    pass
+    device_id: str
+    model: str
+    manufacturer: str
+    android_version: str
+    sdk_version: int
+    status: str = "online"
 
 
 class PackageInfo:
@@ -36,50 +69,88 @@ class PackageInfo:
     pass
 
 
+# Transport Helpers
+
+
+def _client() -> AdbClient:
+    """Get an adb client configured from settings."""
+    return AdbClient()
+
+
+# Shared per-device queue; coalesces, throttles and batches device commands
+command_queue = CommandQueue(
+    lambda device_id, command: _client().shell(device_id, command),
+    lambda device_id, command: _client().exec_out(device_id, command),
+    max_actions_per_second=settings.ADB_MAX_ACTIONS_PER_SECOND,
+)
+
+
+def _shell(device_id: str, command: str) -> str:
+    """Run a shell command on the device and return its output."""
+    return command_queue.shell(device_id, command)
+
+
+def _exec_out(device_id: str, command: str) -> bytes:
+    """Run a command on the device and return its raw binary output."""
+    return command_queue.exec_out(device_id, command)
+
+
+def _run(device_id: str, command: str) -> tuple[bool, str]:
+    """Run a shell command and report whether it exited with status 0.
+
+    The legacy `shell:` service does not carry exit codes, so the status is
+    echoed after the command output and parsed back out.
+
+    Returns:
+        Tuple of (succeeded, output without the status marker)
+    """
+    output = _shell(device_id, f"{command}; echo :$?")
+    body, _, status = output.rstrip().rpartition(":")
+    return status.strip() == "0", body
+
+
 # Device Information Functions
 
 
 def get_devices() -> List[str]:
     """Get list of connected Android device IDs.
 
+    Only devices in the "device" state are returned; offline and
+    unauthorized devices are skipped.
+
     Returns:
         List of device IDs (e.g., ["emulator-5554", "192.168.1.100:5555"])
+    """
+    return [serial for serial, state in _client().devices() if state == "device"]
 
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
 
-    Future Implementation:
-        - Call `adb devices` command
-        - Parse output to extract device IDs
-        - Return list of connected devices
-        - Handle case where no devices are connected
-    """
-    raise NotImplementedError(
-        "get_devices() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
-    )
+_GETPROP_RE = re.compile(r"^\[([^\]]+)\]: \[(.*)\]$", re.MULTILINE)
+
+
+def _parse_getprop(output: str) -> dict[str, str]:
+    """Parse `getprop` output lines of the form `[key]: [value]`."""
+    return dict(_GETPROP_RE.findall(output))
 
 
 def get_device_info(device_id: str) -> DeviceInfo:
     """Get detailed information about a specific device.
 
+    All properties are read with a single `getprop` call.
+
     Args:
         device_id: The device identifier (e.g., "emulator-5554")
 
     Returns:
         DeviceInfo object with device details
-
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
-
-    Future Implementation:
-        - Call `adb -s {device_id} shell getprop` for device properties
-        - Extract model, Android version, and other info
-        - Return structured DeviceInfo object
     """
-    raise NotImplementedError(
-        "get_device_info() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
+    props = _parse_getprop(_shell(device_id, "getprop"))
+    sdk = props.get("ro.build.version.sdk", "")
+    return DeviceInfo(
+        device_id=device_id,
+        model=props.get("ro.product.model", ""),
+        manufacturer=props.get("ro.product.manufacturer", ""),
+        android_version=props.get("ro.build.version.release", ""),
+        sdk_version=int(sdk) if sdk.isdigit() else 0,
     )
 
 
@@ -93,40 +164,47 @@ def get_battery_level(device_id: str) -> int:
         Battery percentage (0-100)
 
     Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
+        ToolExecutionError: If the battery level cannot be read
     """
-    raise NotImplementedError(
-        "get_battery_level() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
-    )
+    match = re.search(r"^\s*level: (\d+)", _shell(device_id, "dumpsys battery"), re.MULTILINE)
+    if match is None:
+        raise ToolExecutionError(f"Could not read battery level on {device_id}")
+    return int(match.group(1))
 
 
 # Input Event Functions
 
 
-def tap(device_id: str, x: int, y: int) -> bool:
+def _begin_action(device_id: str) -> None:
+    """Mark the device log, so check_logcat can see what the action caused."""
+    logcat_monitor.mark(device_id)
+
+
+def _finish_action(device_id: str, ok: bool, action: str, wait_idle: bool) -> bool:
+    """Log a failed action or optionally wait for the UI to settle after it."""
+    if not ok:
+        logger.warning(f"{action} failed on {device_id}")
+        return False
+    if wait_idle and not wait_for_idle(device_id):
+        logger.warning(f"UI on {device_id} did not settle after {action}")
+    return True
+
+
+def tap(device_id: str, x: int, y: int, wait_idle: bool = False) -> bool:
     """Simulate a tap event at screen coordinates.
 
     Args:
         device_id: The device identifier
         x: X coordinate in pixels
         y: Y coordinate in pixels
+        wait_idle: If True, return only once the UI has settled (see wait_for_idle)
 
     Returns:
         True if successful, False otherwise
-
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
-
-    Future Implementation:
-        - Execute: `adb -s {device_id} shell input tap {x} {y}`
-        - Check return code for success
-        - Handle device offline errors
     """
-    raise NotImplementedError(
-        "tap() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
-    )
+    _begin_action(device_id)
+    ok, _ = _run(device_id, f"input tap {int(x)} {int(y)}")
+    return _finish_action(device_id, ok, "tap", wait_idle)
 
 
 def swipe(
@@ -136,6 +214,7 @@ def swipe(
     x2: int,
     y2: int,
     duration_ms: int = 300,
+    wait_idle: bool = False,
 ) -> bool:
     """Simulate a swipe gesture from one point to another.
 
@@ -146,82 +225,694 @@ def swipe(
         x2: End X coordinate
         y2: End Y coordinate
         duration_ms: Duration of swipe in milliseconds
+        wait_idle: If True, return only once the UI has settled (see wait_for_idle)
 
     Returns:
         True if successful, False otherwise
-
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
     """
-    raise NotImplementedError(
-        "swipe() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
+    _begin_action(device_id)
+    ok, _ = _run(
+        device_id,
+        f"input swipe {int(x1)} {int(y1)} {int(x2)} {int(y2)} {int(duration_ms)}",
     )
+    return _finish_action(device_id, ok, "swipe", wait_idle)
+
+
+# Characters that must be backslash-escaped for `input text` in the device shell
+_INPUT_TEXT_SPECIAL = set("\\\"'`$&|;<>()[]{}*?~#!")
+
+
+def _escape_input_text(text: str) -> str:
+    """Escape text for `input text`, which reads spaces as %s."""
+    escaped = []
+    for ch in text:
+        if ch == " ":
+            escaped.append("%s")
+        elif ch in _INPUT_TEXT_SPECIAL:
+            escaped.append("\\" + ch)
+        else:
+            escaped.append(ch)
+    return "".join(escaped)
+
+
+# ADBKeyBoard (https://github.com/senzhk/ADBKeyBoard) types any unicode text it
+# receives in a broadcast, in one step instead of one key event per character
+_TEXT_IME = "com.android.adbkeyboard/.AdbIME"
+# ASCII text longer than this goes through the IME when it is installed
+_IME_MIN_LENGTH = 32
+# Characters per `input text` call and per IME broadcast
+_INPUT_TEXT_CHUNK = 256
+_IME_CHUNK = 600
+# Keep each shell command line short enough for older adbd versions
+_MAX_SHELL_COMMAND = 4000
 
+# IME IDs as reported by `settings get secure default_input_method`
+_IME_ID_RE = re.compile(r"^[\w.]+/[\w.]+$")
 
-def input_text(device_id: str, text: str) -> bool:
+# device -> whether the text IME is installed
+_text_ime_installed: dict[str, bool] = {}
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _select_text_ime(device_id: str) -> str | None:
+    """Switch the device to the text IME if it is installed.
+
+    Whether the IME is installed is checked once per device; the active IME
+    is read on every call, since the user or an app may have changed it.
+
+    Returns:
+        The previously active IME (pass it to _restore_ime), or None if the
+        text IME is not installed or could not be selected
+    """
+    if device_id not in _text_ime_installed:
+        installed = _TEXT_IME in _shell(device_id, "ime list -a -s").split()
+        _text_ime_installed[device_id] = installed
+    if not _text_ime_installed[device_id]:
+        return None
+    previous = _shell(device_id, "settings get secure default_input_method").strip()
+    if previous == _TEXT_IME:
+        return previous
+    if not _run(device_id, f"ime enable {_TEXT_IME} && ime set {_TEXT_IME}")[0]:
+        logger.warning(f"Could not select {_TEXT_IME} on {device_id}")
+        return None
+    return previous
+
+
+def _restore_ime(device_id: str, previous: str) -> None:
+    """Switch back to the IME that was active before _select_text_ime."""
+    if previous == _TEXT_IME:
+        return
+    if not _IME_ID_RE.match(previous):
+        logger.warning(f"Not restoring unrecognized input method {previous!r} on {device_id}")
+        return
+    if not _run(device_id, f"ime set {previous}")[0]:
+        logger.warning(f"Could not restore input method {previous} on {device_id}")
+
+
+def _run_batched(device_id: str, commands: list[str]) -> bool:
+    """Run commands joined with && in as few shell calls as the length limit allows."""
+    batches: list[list[str]] = [[]]
+    length = 0
+    for command in commands:
+        if batches[-1] and length + len(command) > _MAX_SHELL_COMMAND:
+            batches.append([])
+            length = 0
+        batches[-1].append(command)
+        length += len(command) + len(" && ")
+    for batch in batches:
+        if not batch:
+            continue
+        ok, output = _run(device_id, " && ".join(batch))
+        if not ok:
+            logger.debug(f"Text input failed on {device_id}: {output.strip()}")
+            return False
+    return True
+
+
+def input_text(device_id: str, text: str, wait_idle: bool = False) -> bool:
     """Input text into the currently focused field.
 
+    Short ASCII text is typed with one `input text` call. Longer text and
+    any non-ASCII text (accents, CJK, emoji) are sent through the
+    ADBKeyBoard IME when it is installed, which types each chunk in a
+    single step; long text is split into chunks either way. The device's
+    previous keyboard is selected again afterwards.
+
     Args:
         device_id: The device identifier
-        text: The text to input (spaces and special chars must be escaped)
+        text: The text to input (spaces and shell special characters are escaped)
+        wait_idle: If True, return only once the UI has settled (see wait_for_idle)
 
     Returns:
         True if successful, False otherwise
 
     Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
+        ToolExecutionError: If the text is not ASCII and the device has no
+            ADBKeyBoard IME to type it with
     """
-    raise NotImplementedError(
-        "input_text() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
-    )
-
-
-def press_key(device_id: str, key_code: str) -> bool:
+    _begin_action(device_id)
+    ascii_only = text.isascii()
+    if not ascii_only or len(text) > _IME_MIN_LENGTH:
+        previous = _select_text_ime(device_id)
+        if previous is not None:
+            commands = [
+                "am broadcast -a ADB_INPUT_B64 --es msg "
+                + base64.b64encode(chunk.encode("utf-8")).decode("ascii")
+                for chunk in _chunks(text, _IME_CHUNK)
+            ]
+            try:
+                ok = _run_batched(device_id, commands)
+            finally:
+                _restore_ime(device_id, previous)
+            return _finish_action(device_id, ok, "input_text", wait_idle)
+        if not ascii_only:
+            raise ToolExecutionError(
+                f"Typing non-ASCII text needs the ADBKeyBoard IME ({_TEXT_IME}), "
+                f"which is not installed on {device_id}"
+            )
+    commands = [
+        f"input text {_escape_input_text(chunk)}" for chunk in _chunks(text, _INPUT_TEXT_CHUNK)
+    ]
+    ok = _run_batched(device_id, commands)
+    return _finish_action(device_id, ok, "input_text", wait_idle)
+
+
+# Arguments that go into device shell commands unquoted
+_KEY_CODE_RE = re.compile(r"^(KEYCODE_[A-Z0-9_]+|\d+)$")
+_PACKAGE_NAME_RE = re.compile(r"^[A-Za-z]\w*(\.[A-Za-z]\w*)+$")
+
+
+def press_key(device_id: str, key_code: str, wait_idle: bool = False) -> bool:
     """Press a hardware key (e.g., HOME, BACK, ENTER).
 
     Args:
         device_id: The device identifier
         key_code: Key code (e.g., "KEYCODE_HOME", "KEYCODE_BACK")
+        wait_idle: If True, return only once the UI has settled (see wait_for_idle)
 
     Returns:
         True if successful, False otherwise
 
     Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
+        ToolExecutionError: If key_code is not a KEYCODE_* name or a number
     """
-    raise NotImplementedError(
-        "press_key() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
+    if not _KEY_CODE_RE.match(key_code):
+        raise ToolExecutionError(f"Invalid key code: {key_code!r}")
+    _begin_action(device_id)
+    ok, _ = _run(device_id, f"input keyevent {key_code}")
+    return _finish_action(device_id, ok, "press_key", wait_idle)
+
+
+# UI Stabilization Functions
+
+# Single round trip that reports the resumed activity and animation state
+_UI_STATE_COMMAND = (
+    "dumpsys activity activities | grep -E 'ResumedActivity'; "
+    "echo '--'; "
+    "dumpsys window | grep -E 'mAppTransitionState|mAnimating=true|isAnimating=true'"
+)
+
+_RESUMED_ACTIVITY_RE = re.compile(
+    r"(?:mResumedActivity|topResumedActivity|ResumedActivity)[:=]\s*"
+    r"ActivityRecord\{\S+ \S+ (\S+)"
+)
+
+
+def _parse_ui_state(output: str) -> tuple[str | None, bool]:
+    """Parse the output of _UI_STATE_COMMAND.
+
+    Returns:
+        Tuple of (focused activity component or None, animations running)
+    """
+    activities, _, window = output.partition("--")
+    match = _RESUMED_ACTIVITY_RE.search(activities)
+    activity = match.group(1) if match else None
+    animating = (
+        "APP_STATE_RUNNING" in window
+        or "mAnimating=true" in window
+        or "isAnimating=true" in window
     )
+    return activity, animating
+
+
+def get_focused_activity(device_id: str) -> str | None:
+    """Get the component of the currently resumed activity.
+
+    Args:
+        device_id: The device identifier
+
+    Returns:
+        Activity component (e.g., "com.android.settings/.Settings"), or None
+        if no activity is resumed
+    """
+    activity, _ = _parse_ui_state(_shell(device_id, _UI_STATE_COMMAND))
+    return activity
+
+
+def _capture_raw_screen(device_id: str) -> tuple[int, int, bytes]:
+    """Capture the screen as raw RGBA pixels.
+
+    Raw capture skips PNG encoding on the device, which makes it much cheaper
+    than `screencap -p` for frame comparisons and local image analysis.
+
+    Returns:
+        (width, height, pixels) with the screencap header removed
+    """
+    data = _exec_out(device_id, "screencap")
+    if len(data) < 12:
+        raise ToolExecutionError(f"screencap returned {len(data)} bytes on {device_id}")
+    width = int.from_bytes(data[0:4], "little")
+    height = int.from_bytes(data[4:8], "little")
+    header = len(data) - width * height * 4
+    # Android O+ appends a colorspace field, growing the header from 12 to 16 bytes
+    if header not in (12, 16):
+        header = 12
+    return width, height, data[header:]
+
+
+def _capture_raw_frame(device_id: str) -> bytes:
+    """Capture the screen as raw RGBA pixels without the screencap header."""
+    return _capture_raw_screen(device_id)[2]
+
+
+def _frame_diff(previous: bytes, current: bytes, samples: int = 32768) -> float:
+    """Estimate the fraction of bytes that changed between two frames.
+
+    Compares an evenly strided sample of the frames rather than every byte.
+    An odd stride makes the sample walk across all color channels.
+
+    Returns:
+        Fraction in [0, 1]; 1.0 if the frames have different sizes
+    """
+    if len(previous) != len(current):
+        return 1.0
+    if not current:
+        return 0.0
+    step = max(1, len(current) // samples) | 1
+    a = previous[::step]
+    b = current[::step]
+    changed = sum(1 for x, y in zip(a, b) if x != y)
+    return changed / len(a)
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float = 10.0,
+    interval: float = 0.05,
+    max_interval: float = 0.5,
+    backoff: float = 1.5,
+) -> bool:
+    """Poll a condition with adaptive backoff until it holds or time runs out.
+
+    Polling starts fast so short transitions are detected quickly, then backs
+    off geometrically to avoid hammering a device that is still busy.
+
+    Args:
+        condition: Callable returning True once the awaited state is reached
+        timeout: Maximum time to wait in seconds
+        interval: Initial delay between polls in seconds
+        max_interval: Upper bound for the delay between polls
+        backoff: Factor applied to the delay after each unsuccessful poll
+
+    Returns:
+        True if the condition was met, False on timeout
+
+    Example:
+        >>> wait_until(lambda: get_focused_activity("emulator-5554") is not None)
+        True
+    """
+    deadline = time.monotonic() + timeout
+    delay = interval
+    while True:
+        if condition():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * backoff, max_interval)
+
+
+def wait_for_idle(
+    device_id: str,
+    timeout: float = 10.0,
+    package_name: str | None = None,
+    settle_polls: int = 2,
+    diff_threshold: float = 0.002,
+    cancelled: Callable[[], bool] | None = None,
+) -> bool:
+    """Wait until the device UI is stable.
+
+    The screen is considered settled when all of the following hold for
+    `settle_polls` consecutive polls:
+    - consecutive frames differ by at most `diff_threshold`
+    - the resumed activity (from `dumpsys activity`) has not changed
+    - no window animation or app transition is running
+
+    This replaces fixed sleeps after actions: it returns as soon as the UI
+    settles instead of always waiting for a worst-case delay.
+
+    Args:
+        device_id: The device identifier
+        timeout: Maximum time to wait in seconds
+        package_name: If given, also wait until this package's activity is resumed
+        settle_polls: Number of consecutive converged polls required
+        diff_threshold: Maximum fraction of changed frame bytes to count as stable
+        cancelled: Checked before each poll; once it returns True the wait
+            stops and returns False
+
+    Returns:
+        True if the UI settled, False on timeout or cancellation
+    """
+    last: dict = {"frame": None, "activity": None, "stable": 0}
+
+    def settled() -> bool:
+        activity, animating = _parse_ui_state(_shell(device_id, _UI_STATE_COMMAND))
+        frame = _capture_raw_frame(device_id)
+        converged = (
+            last["frame"] is not None
+            and activity == last["activity"]
+            and _frame_diff(last["frame"], frame) <= diff_threshold
+        )
+        last["frame"], last["activity"] = frame, activity
+        on_target = package_name is None or (
+            activity is not None and activity.split("/", 1)[0] == package_name
+        )
+        if animating or not converged or not on_target:
+            last["stable"] = 0
+            return False
+        last["stable"] += 1
+        return bool(last["stable"] >= settle_polls)
+
+    if cancelled is None:
+        return wait_until(settled, timeout=timeout)
+    return wait_until(lambda: cancelled() or settled(), timeout=timeout) and not cancelled()
 
 
 # Screen Capture Functions
 
 
-def capture_screen(device_id: str, save_path: str) -> str:
-    """Capture the device screen and save to file.
+def _capture_png(device_id: str) -> bytes:
+    """Capture the screen as PNG bytes streamed from `screencap -p`."""
+    data = _exec_out(device_id, "screencap -p")
+    if not data.startswith(b"\x89PNG"):
+        raise ToolExecutionError(f"screencap did not return a PNG on {device_id}")
+    return data
+
+
+def _dump_hierarchy(device_id: str) -> str:
+    """Dump the UI hierarchy XML via uiautomator without a device temp file."""
+    output = _exec_out(device_id, "uiautomator dump /dev/tty").decode("utf-8", errors="replace")
+    end = output.rfind("</hierarchy>")
+    if end == -1:
+        raise ToolExecutionError(f"uiautomator dump failed on {device_id}: {output.strip()}")
+    return output[output.find("<?xml"):end + len("</hierarchy>")]
+
+
+def _observe(device_id: str, current: Callable[[], bool]) -> Observation | None:
+    """Wait briefly for the UI to settle, then capture screen and hierarchy.
+
+    Stops between steps, returning None, once a new action made the capture stale.
+    """
+    settled = wait_for_idle(device_id, timeout=3.0, cancelled=lambda: not current())
+    if not current():
+        return None
+    screen_png = _capture_png(device_id)
+    if not current():
+        return None
+    return Observation(
+        screen_png=screen_png,
+        hierarchy=_dump_hierarchy(device_id),
+        settled=settled,
+    )
+
+
+# Shared prefetcher; PerceptionPrefetchMiddleware schedules captures after actions
+observation_prefetcher = ObservationPrefetcher(_observe)
+
+# Shared screenshot store; frames are deduplicated and written in the background
+screenshot_store = ScreenshotStore(
+    settings.SCREENSHOT_DIR,
+    max_bytes=settings.SCREENSHOT_MAX_MB * 1024 * 1024,
+    max_age=settings.SCREENSHOT_MAX_AGE_HOURS * 3600,
+)
+
+
+def capture_screen(device_id: str) -> str:
+    """Capture the device screen and save it as a PNG file.
+
+    The PNG is streamed straight from `screencap -p` over `exec:`, so no
+    temporary file is written on the device and no separate pull is needed.
+    If a capture was prefetched after the last action and is still valid,
+    it is used instead of capturing again. Identical frames share one file.
 
     Args:
         device_id: The device identifier
-        save_path: Local file path to save the screenshot
 
     Returns:
-        Path to the saved screenshot file
+        Path to the screenshot file (under SCREENSHOT_DIR)
 
     Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
+        ToolExecutionError: If the device did not return a PNG image or the
+            file could not be written
+    """
+    observation = observation_prefetcher.take(device_id, "screen")
+    data = observation.screen_png if observation is not None else _capture_png(device_id)
+    try:
+        return screenshot_store.save(data)
+    except OSError as e:
+        raise ToolExecutionError(f"Failed to save screenshot of {device_id}: {e}") from e
+
+
+def dump_ui_hierarchy(device_id: str) -> str:
+    """Get the current UI hierarchy as uiautomator XML.
+
+    Uses the prefetched hierarchy from the last action if it is still valid.
+
+    Args:
+        device_id: The device identifier
 
-    Future Implementation:
-        - Execute: `adb -s {device_id} shell screencap -p /sdcard/screenshot.png`
-        - Pull file: `adb -s {device_id} pull /sdcard/screenshot.png {save_path}`
-        - Clean up device temp file
-        - Return actual save path
+    Returns:
+        UI hierarchy XML with node bounds, text, resource IDs and classes
+
+    Raises:
+        ToolExecutionError: If uiautomator could not dump the hierarchy
     """
-    raise NotImplementedError(
-        "capture_screen() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
+    observation = observation_prefetcher.take(device_id, "hierarchy")
+    if observation is not None:
+        return observation.hierarchy
+    return _dump_hierarchy(device_id)
+
+
+# Navigation Functions
+
+# Fraction of the scroll area moved per swipe: start, bounds
+_SCROLL_STEP = 0.5
+_SCROLL_STEP_RANGE = (0.25, 0.8)
+# Finger speed in px/ms; slow enough that the list does not fling
+_SCROLL_SPEED = 1.5
+_SCROLL_DIRECTIONS = ("down", "up", "left", "right")
+
+
+def _find_visible(
+    nodes: list[UINode], selector: Selector, area: tuple[int, int, int, int] | None
+) -> UINode | None:
+    """First node matching the selector whose center is inside the area."""
+    for node in nodes:
+        if selector.matches(node) and (area is None or inside(node.center, area)):
+            return node
+    return None
+
+
+def _max_scroll_step(
+    nodes: list[UINode], area: tuple[int, int, int, int], direction: str
+) -> float:
+    """Largest step after which the biggest visible item is still partly on screen.
+
+    Consecutive views then always share an item, even when items are
+    taller than the rest of the overlap.
+    """
+    left, top, right, bottom = area
+    vertical = direction in ("down", "up")
+    extent = bottom - top if vertical else right - left
+    sizes = [
+        node.bounds[3] - node.bounds[1] if vertical else node.bounds[2] - node.bounds[0]
+        for node in nodes
+        if node.bounds != area
+        and left <= node.bounds[0] <= node.bounds[2] <= right
+        and top <= node.bounds[1] <= node.bounds[3] <= bottom
+    ]
+    if not sizes or extent <= 0:
+        return _SCROLL_STEP_RANGE[1]
+    return 1 - max(sizes) / extent
+
+
+def _scroll_once(
+    device_id: str, area: tuple[int, int, int, int], direction: str, step: float
+) -> bool:
+    """Swipe across the middle of the area to move its content by step.
+
+    Returns once the UI has settled, so a hierarchy dump sees where the
+    content came to rest.
+    """
+    left, top, right, bottom = area
+    x, y = (left + right) // 2, (top + bottom) // 2
+    if direction in ("down", "up"):
+        half = int((bottom - top) * step / 2)
+        sign = 1 if direction == "down" else -1
+        x1, y1, x2, y2 = x, y + sign * half, x, y - sign * half
+    else:
+        half = int((right - left) * step / 2)
+        sign = 1 if direction == "right" else -1
+        x1, y1, x2, y2 = x + sign * half, y, x - sign * half, y
+    duration_ms = max(300, int(2 * half / _SCROLL_SPEED))
+    return swipe(device_id, x1, y1, x2, y2, duration_ms, wait_idle=True)
+
+
+def scroll_to(
+    device_id: str, selector: str, direction: str = "down", max_swipes: int = 20
+) -> tuple[int, int] | None:
+    """Scroll the largest scrollable view until an element is visible.
+
+    Each swipe waits for the UI to settle and is followed by a hierarchy
+    dump that is compared with the previous one: the swipe distance grows
+    while consecutive views overlap heavily and shrinks when they barely
+    overlap. It never exceeds the view minus its tallest visible item, so
+    consecutive views always overlap and no item is skipped. When a swipe
+    leaves the content unchanged the end of the list has been reached.
+
+    Args:
+        device_id: The device identifier
+        selector: Element to look for, e.g. "Battery", "text=Battery",
+            "id=title; text=Battery", "desc=More options" or
+            "class=android.widget.Switch"
+        direction: Direction to scroll the content: "down", "up", "left" or "right"
+        max_swipes: Give up after this many swipes
+
+    Returns:
+        (x, y) center of the element, ready for tap; None if the end of the
+        list was reached without finding it
+
+    Raises:
+        ToolExecutionError: If the selector or direction is invalid, or a
+            swipe or hierarchy dump failed
+    """
+    if direction not in _SCROLL_DIRECTIONS:
+        raise ToolExecutionError(f"Invalid scroll direction: {direction!r}")
+    try:
+        target = Selector(selector)
+        nodes = parse_hierarchy(dump_ui_hierarchy(device_id))
+    except ValueError as e:
+        raise ToolExecutionError(str(e)) from e
+
+    if not nodes:
+        raise ToolExecutionError(f"Empty UI hierarchy on {device_id}")
+    # Views that scroll without saying so (e.g. WebViews) get the whole screen
+    area = scroll_area(nodes) or nodes[0].bounds
+    found = _find_visible(nodes, target, area)
+    if found is not None:
+        return found.center
+
+    low, high = _SCROLL_STEP_RANGE
+    step = _SCROLL_STEP
+    keys = content_keys(nodes, area)
+    for swipes in range(1, max_swipes + 1):
+        step = max(low, min(step, _max_scroll_step(nodes, area, direction)))
+        if not _scroll_once(device_id, area, direction, step):
+            raise ToolExecutionError(f"Swipe failed on {device_id} while scrolling")
+        try:
+            nodes = parse_hierarchy(_dump_hierarchy(device_id))
+        except ValueError as e:
+            raise ToolExecutionError(str(e)) from e
+        found = _find_visible(nodes, target, area)
+        if found is not None:
+            logger.info(f"Found {target} on {device_id} after {swipes} swipes")
+            return found.center
+        previous, keys = keys, content_keys(nodes, area)
+        if keys == previous:
+            logger.info(f"Reached the end of the list on {device_id} without {target}")
+            return None
+        overlap = len(keys & previous) / len(keys) if keys else 0.0
+        if overlap > 0.6:
+            step = min(high, step * 1.5)
+        elif overlap < 0.2:
+            step = max(low, step / 2)
+    logger.info(f"Gave up looking for {target} on {device_id} after {max_swipes} swipes")
+    return None
+
+
+# File Transfer Functions
+
+# Shared directory sync; keeps a manifest of known file hashes per device
+directory_sync = DirectorySync(lambda: _client(), manifest_dir=settings.SYNC_MANIFEST_DIR)
+
+
+def push_dir(device_id: str, local_dir: str, remote_dir: str) -> SyncResult:
+    """Copy a local directory tree to the device, sending only changed files.
+
+    A file is sent if its size differs from the device copy, or its mtime
+    differs and its SHA-256 does too. Files go over parallel, pipelined adb
+    sync connections and keep their local mtime on the device.
+
+    Args:
+        device_id: The device identifier
+        local_dir: Local source directory
+        remote_dir: Destination directory on the device (e.g. "/sdcard/fixtures")
+
+    Returns:
+        SyncResult listing transferred files and the number skipped
+
+    Raises:
+        ToolExecutionError: If the directory is missing or a file was rejected
+    """
+    return directory_sync.push_dir(device_id, local_dir, remote_dir)
+
+
+def pull_dir(device_id: str, remote_dir: str, local_dir: str) -> SyncResult:
+    """Copy a directory tree from the device, receiving only changed files.
+
+    Args:
+        device_id: The device identifier
+        remote_dir: Source directory on the device
+        local_dir: Local destination directory
+
+    Returns:
+        SyncResult listing transferred files and the number skipped
+
+    Raises:
+        ToolExecutionError: If a file could not be read from the device
+    """
+    return directory_sync.pull_dir(device_id, remote_dir, local_dir)
+
+
+# Log Functions
+
+# Shared logcat streams; device actions mark them (see _begin_action)
+logcat_monitor = LogcatMonitor(lambda: AdbClient(timeout=None))
+
+
+def check_logcat(
+    device_id: str,
+    package_name: str | None = None,
+    tag: str | None = None,
+    min_level: str = "W",
+    contains: str | None = None,
+    since_last_action: bool = True,
+    limit: int = 20,
+) -> LogcatReport:
+    """Check the device log for crashes, ANRs and matching entries.
+
+    Answers from a log stream that is kept in memory, so it is fast and
+    returns only what matches instead of the whole log.
+
+    Args:
+        device_id: The device identifier
+        package_name: Only report crashes and ANRs of this package
+        tag: Only entries with this log tag (e.g. "ActivityManager")
+        min_level: Lowest level of entries to return: V, D, I, W, E or F (or
+            its name, e.g. "warning")
+        contains: Only entries whose message contains this text
+        since_last_action: Only look at what was logged after the last
+            tap, swipe, input_text, press_key or launch_app on the device
+        limit: Maximum number of entries to return (the newest are kept)
+
+    Returns:
+        LogcatReport with crashes/ANRs found and the matching entries
+
+    Raises:
+        ToolExecutionError: If min_level is not a log level
+    """
+    return logcat_monitor.check(
+        device_id,
+        package_name=package_name,
+        tag=tag,
+        min_level=min_level,
+        contains=contains,
+        since_last_action=since_last_action,
+        limit=limit,
     )
 
 
@@ -236,33 +927,43 @@ def list_packages(device_id: str) -> List[str]:
 
     Returns:
         List of package names (e.g., ["com.android.settings", "com.example.app"])
-
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
     """
-    raise NotImplementedError(
-        "list_packages() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
-    )
+    output = _shell(device_id, "pm list packages")
+    return [
+        line[len("package:"):].strip()
+        for line in output.splitlines()
+        if line.startswith("package:")
+    ]
 
 
-def launch_app(device_id: str, package_name: str) -> bool:
+def launch_app(device_id: str, package_name: str, wait_idle: bool = False) -> bool:
     """Launch an app by package name.
 
     Args:
         device_id: The device identifier
         package_name: Package name (e.g., "com.example.app")
+        wait_idle: If True, return only once the app's activity is resumed
+            and the UI has settled (see wait_for_idle)
 
     Returns:
         True if successful, False otherwise
 
     Raises:
-        NotImplementedError: This function is not yet implemented (Phase 2)
+        ToolExecutionError: If package_name is not a valid package name
     """
-    raise NotImplementedError(
-        "launch_app() is not yet implemented. "
-        "This will be implemented in Phase 2 with actual ADB integration."
+    if not _PACKAGE_NAME_RE.match(package_name):
+        raise ToolExecutionError(f"Invalid package name: {package_name!r}")
+    _begin_action(device_id)
+    _, output = _run(
+        device_id,
+        f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1",
     )
+    if "Events injected: 1" not in output:
+        logger.warning(f"launch_app failed on {device_id}: {output.strip()}")
+        return False
+    if wait_idle and not wait_for_idle(device_id, package_name=package_name):
+        logger.warning(f"UI on {device_id} did not settle after launching {package_name}")
+    return True
 
 
 def force_stop_app(device_id: str, package_name: str) -> bool:
@@ -0,0 +1,413 @@
+"""Minimal client for the ADB host protocol.
+
+This module talks to the local adb server directly over its TCP socket
+(default 127.0.0.1:5037) instead of spawning an `adb` process per command.
+It implements just enough of the host and transport protocol for the tools
+in `deepglm.tools.adb`:
+
+- `host:*` service requests (e.g. `host:devices`)
+- `host:transport:<serial>` to bind a connection to a device
+- `shell:<command>` and `exec:<command>` streams
+- `sync:` file transfer sessions (STAT, LIST, SEND, RECV)
+
+Protocol reference: each request is a 4-digit hex length followed by the
+payload; the server answers `OKAY` or `FAIL` + hex length + message. Inside
+a sync session, messages are a 4-byte ID plus a little-endian uint32.
+"""
+
+import logging
+import socket
+import stat
+import struct
+import subprocess
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from deepglm.config.settings import settings
+from deepglm.exceptions import ToolExecutionError
+
+logger = logging.getLogger(__name__)
+
+# Default socket timeout in seconds for adb server connections
+DEFAULT_TIMEOUT = 30.0
+
+# Maximum payload of one sync DATA message
+SYNC_DATA_MAX = 64 * 1024
+
+
+class AdbConnection:
+    """A single socket connection to the adb server.
+
+    A connection starts in host mode. After `transport()` succeeds, the next
+    request is routed to the selected device; after a stream service such as
+    `shell:` is opened, the socket carries that service's raw output.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self._sock = sock
+
+    def send_request(self, payload: str) -> None:
+        """Send a length-prefixed request and check the server status.
+
+        Args:
+            payload: Service request, e.g. "host:devices" or "shell:ls"
+
+        Raises:
+            ToolExecutionError: If the server answers FAIL
+        """
+        data = payload.encode("utf-8")
+        self._sock.sendall(b"%04x" % len(data) + data)
+        self.check_status()
+
+    def check_status(self) -> None:
+        """Read a 4-byte status and raise if it is not OKAY."""
+        status = self.read_exact(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise ToolExecutionError(f"adb: {self.read_string()}")
+        raise ToolExecutionError(f"adb: unexpected response {status!r}")
+
+    def read_string(self) -> str:
+        """Read a hex-length-prefixed string from the server."""
+        length = int(self.read_exact(4), 16)
+        return self.read_exact(length).decode("utf-8", errors="replace")
+
+    def read_exact(self, size: int) -> bytes:
+        """Read exactly `size` bytes.
+
+        Raises:
+            ToolExecutionError: If the connection closes early
+        """
+        buf = bytearray(size)
+        view = memoryview(buf)
+        received = 0
+        while received < size:
+            n = self._sock.recv_into(view[received:], size - received)
+            if n == 0:
+                raise ToolExecutionError("adb: connection closed unexpectedly")
+            received += n
+        return bytes(buf)
+
+    def read_all(self) -> bytes:
+        """Read until the server closes the stream."""
+        chunks = []
+        while True:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def sendall(self, data: bytes) -> None:
+        """Write raw bytes to the connection."""
+        self._sock.sendall(data)
+
+    def shutdown(self) -> None:
+        """Shut the socket down, waking any thread blocked reading from it."""
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """Close the underlying socket."""
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self) -> "AdbConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class SyncEntry:
+    """A file or directory reported by the sync protocol.
+
+    Attributes:
+        name: Entry name (a path for stat(), a bare name for list())
+        mode: Unix mode bits including the file type
+        size: Size in bytes
+        mtime: Modification time in whole seconds
+    """
+
+    name: str
+    mode: int
+    size: int
+    mtime: int
+
+    @property
+    def is_dir(self) -> bool:
+        """Whether the entry is a directory."""
+        return stat.S_ISDIR(self.mode)
+
+
+class SyncConnection:
+    """A `sync:` session for file transfer on one device.
+
+    One session serves any number of requests in sequence. SEND replies are
+    not read by send(); call read_ack() once per file, so several files can
+    be written back to back without waiting a round trip for each.
+    """
+
+    def __init__(self, conn: AdbConnection) -> None:
+        self._conn = conn
+
+    def _request(self, command: bytes, path: str) -> None:
+        data = path.encode("utf-8")
+        self._conn.sendall(command + struct.pack("<I", len(data)) + data)
+
+    def _read_header(self) -> tuple[bytes, int]:
+        header = self._conn.read_exact(8)
+        return header[:4], struct.unpack("<I", header[4:])[0]
+
+    def _fail(self, length: int, path: str) -> ToolExecutionError:
+        message = self._conn.read_exact(length).decode("utf-8", errors="replace")
+        return ToolExecutionError(f"adb sync failed for {path}: {message}")
+
+    def stat(self, path: str) -> SyncEntry | None:
+        """Stat a remote path.
+
+        Returns:
+            The entry, or None if the path does not exist
+        """
+        self._request(b"STAT", path)
+        reply = self._conn.read_exact(16)
+        if reply[:4] != b"STAT":
+            raise ToolExecutionError(f"adb sync: unexpected reply {reply[:4]!r} to STAT")
+        mode, size, mtime = struct.unpack("<III", reply[4:])
+        return SyncEntry(path, mode, size, mtime) if mode else None
+
+    def list(self, path: str) -> list[SyncEntry]:
+        """List a remote directory (without "." and "..").
+
+        A missing directory lists as empty.
+        """
+        self._request(b"LIST", path)
+        entries: list[SyncEntry] = []
+        while True:
+            reply = self._conn.read_exact(20)
+            if reply[:4] == b"DONE":
+                return entries
+            if reply[:4] != b"DENT":
+                raise ToolExecutionError(f"adb sync: unexpected reply {reply[:4]!r} to LIST")
+            mode, size, mtime, name_length = struct.unpack("<IIII", reply[4:])
+            name = self._conn.read_exact(name_length).decode("utf-8", errors="replace")
+            if name not in (".", ".."):
+                entries.append(SyncEntry(name, mode, size, mtime))
+
+    def send(self, path: str, source: BinaryIO, mode: int, mtime: int) -> int:
+        """Stream a file to the device; its reply is read later by read_ack().
+
+        Args:
+            path: Remote destination path (parent directories are created)
+            source: Binary file object to read the content from
+            mode: Unix mode of the remote file
+            mtime: Modification time to set on the remote file
+
+        Returns:
+            Number of bytes sent
+        """
+        self._request(b"SEND", f"{path},{mode}")
+        sent = 0
+        while chunk := source.read(SYNC_DATA_MAX):
+            self._conn.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+            sent += len(chunk)
+        self._conn.sendall(b"DONE" + struct.pack("<I", mtime))
+        return sent
+
+    def read_ack(self, path: str) -> None:
+        """Read the reply to a previous send().
+
+        Raises:
+            ToolExecutionError: If the device rejected the file
+        """
+        command, length = self._read_header()
+        if command == b"FAIL":
+            raise self._fail(length, path)
+        if command != b"OKAY":
+            raise ToolExecutionError(f"adb sync: unexpected reply {command!r} to SEND")
+
+    def recv(self, path: str, target: BinaryIO) -> int:
+        """Copy a remote file into a binary file object.
+
+        Returns:
+            Number of bytes received
+
+        Raises:
+            ToolExecutionError: If the file cannot be read
+        """
+        self._request(b"RECV", path)
+        received = 0
+        while True:
+            command, length = self._read_header()
+            if command == b"DONE":
+                return received
+            if command == b"FAIL":
+                raise self._fail(length, path)
+            if command != b"DATA":
+                raise ToolExecutionError(f"adb sync: unexpected reply {command!r} to RECV")
+            target.write(self._conn.read_exact(length))
+            received += length
+
+    def close(self) -> None:
+        """End the session and close the connection."""
+        try:
+            self._conn.sendall(b"QUIT" + struct.pack("<I", 0))
+        except OSError:
+            pass
+        self._conn.close()
+
+    def __enter__(self) -> "SyncConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AdbClient:
+    """Client for the adb server's host protocol.
+
+    Args:
+        host: adb server host (defaults to settings.ADB_SERVER_HOST)
+        port: adb server port (defaults to settings.ADB_SERVER_PORT)
+        timeout: Socket timeout in seconds; None blocks indefinitely (e.g.
+            for log streams that can stay quiet)
+
+    Example:
+        >>> client = AdbClient()
+        >>> client.shell("emulator-5554", "getprop ro.product.model")
+        'sdk_gphone64_x86_64\\n'
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        timeout: float | None = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.host = host or settings.ADB_SERVER_HOST
+        self.port = port or settings.ADB_SERVER_PORT
+        self.timeout = timeout
+        self._server_started = False
+
+    def connect(self) -> AdbConnection:
+        """Open a new connection to the adb server.
+
+        If the server is not running, it is started once via `adb start-server`
+        using settings.ADB_PATH.
+
+        Raises:
+            ToolExecutionError: If the server cannot be reached
+        """
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except ConnectionRefusedError:
+            if self._server_started:
+                raise ToolExecutionError(
+                    f"adb server is not reachable at {self.host}:{self.port}"
+                ) from None
+            self._start_server()
+            return self.connect()
+        except OSError as e:
+            raise ToolExecutionError(
+                f"adb server is not reachable at {self.host}:{self.port}: {e}"
+            ) from e
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return AdbConnection(sock)
+
+    def _start_server(self) -> None:
+        """Start the local adb server with the configured adb executable."""
+        self._server_started = True
+        logger.info(f"Starting adb server with {settings.ADB_PATH}")
+        try:
+            subprocess.run(
+                [settings.ADB_PATH, "-P", str(self.port), "start-server"],
+                check=True,
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            raise ToolExecutionError(f"Failed to start adb server: {e}") from e
+
+    def host_command(self, service: str) -> str:
+        """Run a `host:` service that returns a length-prefixed string.
+
+        Args:
+            service: Service name without the prefix, e.g. "devices"
+
+        Returns:
+            The service response body
+        """
+        with self.connect() as conn:
+            conn.send_request(f"host:{service}")
+            return conn.read_string()
+
+    def devices(self) -> list[tuple[str, str]]:
+        """List devices known to the adb server.
+
+        Returns:
+            List of (serial, state) tuples, e.g. [("emulator-5554", "device")]
+        """
+        body = self.host_command("devices")
+        devices = []
+        for line in body.splitlines():
+            serial, _, state = line.partition("\t")
+            if serial:
+                devices.append((serial, state.strip()))
+        return devices
+
+    def transport(self, serial: str) -> AdbConnection:
+        """Open a connection bound to a specific device.
+
+        Args:
+            serial: Device serial (e.g., "emulator-5554")
+
+        Returns:
+            Connection ready for a device service request
+        """
+        conn = self.connect()
+        try:
+            conn.send_request(f"host:transport:{serial}")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def open_stream(self, serial: str, service: str) -> AdbConnection:
+        """Open a device service stream such as `shell:` or `exec:`.
+
+        The caller owns the returned connection and must close it.
+        """
+        conn = self.transport(serial)
+        try:
+            conn.send_request(service)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def sync(self, serial: str) -> SyncConnection:
+        """Open a file transfer session on a device.
+
+        The caller owns the returned session and must close it.
+        """
+        return SyncConnection(self.open_stream(serial, "sync:"))
+
+    def exec_out(self, serial: str, command: str) -> bytes:
+        """Run a command on the device and return its raw stdout.
+
+        Uses the `exec:` service, which does not allocate a PTY, so binary
+        output (e.g. `screencap`) is returned unmodified.
+        """
+        with self.open_stream(serial, f"exec:{command}") as conn:
+            return conn.read_all()
+
+    def shell(self, serial: str, command: str) -> str:
+        """Run a shell command on the device and return its output as text."""
+        with self.open_stream(serial, f"shell:{command}") as conn:
+            return conn.read_all().decode("utf-8", errors="replace")
@@ -0,0 +1,299 @@
+"""Per-device command queue in front of the adb transport.
+
+Agent paths that run concurrently (parallel read-only tools, prefetching,
+operators fanned out over devices) often send overlapping commands to the
+same device. Every command that goes through the queue waits in a FIFO per
+device. A worker thread drains the FIFO in batches:
+
+- a read (see `read_prefixes`; compound commands never count) identical to one already queued since the
+  last action shares that read's result instead of running again (e.g.
+  back-to-back screenshots or duplicate `getprop` calls)
+- consecutive identical key presses (`input keyevent KEYCODE_BACK`) are sent
+  as one `input keyevent` with repeated key codes
+- queued shell commands are joined into a single `shell:` round trip, each
+  in its own subshell so that `cd`, `exit` or a trailing `&` in one command
+  does not affect the others, and their outputs split apart again
+- actions (anything that is not a read) are spaced to at most
+  `max_actions_per_second` per device; commands behind a throttled action
+  wait for it, so the order per device is kept
+
+Example:
+    >>> queue = CommandQueue(client.shell, client.exec_out, max_actions_per_second=5)
+    >>> queue.shell("emulator-5554", "getprop ro.product.model")
+    'Pixel 8\\n'
+    >>> queue.stats()["emulator-5554"].coalesced
+    0
+"""
+
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from deepglm.exceptions import ToolExecutionError
+
+logger = logging.getLogger(__name__)
+
+# Commands without side effects on the device
+READ_PREFIXES = (
+    "getprop",
+    "dumpsys ",
+    "pm list ",
+    "screencap",
+    "uiautomator dump",
+    "ime list",
+    "sha256sum ",
+    "ls ",
+    "cat ",
+    "stat ",
+)
+
+# Shell syntax that can chain or redirect into a side effect after a read prefix
+_COMPOUND_RE = re.compile(r"[;|>`\n&]|\$\(")
+
+# Key presses as sent by adb._run, optionally with the exit status echo
+_KEYEVENT_RE = re.compile(r"^input keyevent ((?:\w+ )*\w+)((?:; echo :\$\?)?)$")
+
+
+@dataclass
+class QueueStats:
+    """Queue metrics for one device.
+
+    Attributes:
+        depth: Commands currently waiting
+        max_depth: Highest depth seen
+        submitted: Commands submitted
+        coalesced: Commands answered by another command's result
+        batches: Service requests sent to the device; each carries one
+            batch of commands
+        throttled_seconds: Total time actions waited for the rate limit
+    """
+
+    depth: int = 0
+    max_depth: int = 0
+    submitted: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    throttled_seconds: float = 0.0
+
+
+@dataclass
+class _Command:
+    service: str
+    command: str
+    action: bool
+    futures: list[Future[Any]] = field(default_factory=lambda: [Future()])
+
+
+@dataclass
+class _Device:
+    pending: deque[_Command] = field(default_factory=deque)
+    stats: QueueStats = field(default_factory=QueueStats)
+    running: bool = False
+    next_action_at: float = 0.0
+
+
+class CommandQueue:
+    """Queue, coalesce, throttle and batch commands per device.
+
+    Args:
+        shell: Runs a shell command on a device and returns its text output
+        exec_out: Runs a command over `exec:` and returns its raw output
+        max_actions_per_second: Action rate limit per device; 0 disables it
+        max_batch: Most commands flushed in one batch
+        max_command_length: Longest joined shell command line
+        read_prefixes: Command prefixes that identify reads
+    """
+
+    def __init__(
+        self,
+        shell: Callable[[str, str], str],
+        exec_out: Callable[[str, str], bytes],
+        max_actions_per_second: float = 0.0,
+        max_batch: int = 16,
+        max_command_length: int = 4000,
+        read_prefixes: Iterable[str] = READ_PREFIXES,
+    ) -> None:
+        self._shell = shell
+        self._exec_out = exec_out
+        self.max_actions_per_second = max_actions_per_second
+        self.max_batch = max_batch
+        self.max_command_length = max_command_length
+        self.read_prefixes = tuple(read_prefixes)
+        self._lock = threading.Lock()
+        self._devices: dict[str, _Device] = {}
+
+    # Submission
+
+    def shell(self, device_id: str, command: str) -> str:
+        """Run a shell command through the queue and return its output."""
+        output: str = self._submit(device_id, "shell", command).result()
+        return output
+
+    def exec_out(self, device_id: str, command: str) -> bytes:
+        """Run an `exec:` command through the queue and return its raw output."""
+        output: bytes = self._submit(device_id, "exec", command).result()
+        return output
+
+    def is_read(self, command: str) -> bool:
+        """Whether a command only reads device state.
+
+        Commands that chain, pipe, redirect or substitute (`;`, `&&`, `|`,
+        `>`, backticks) count as actions even behind a read prefix.
+        """
+        return command.startswith(self.read_prefixes) and not _COMPOUND_RE.search(command)
+
+    def _submit(self, device_id: str, service: str, command: str) -> Future[Any]:
+        action = not self.is_read(command)
+        with self._lock:
+            device = self._devices.setdefault(device_id, _Device())
+            device.stats.submitted += 1
+            if not action:
+                # Share the result of the same read queued since the last action
+                for queued in reversed(device.pending):
+                    if queued.action:
+                        break
+                    if queued.service == service and queued.command == command:
+                        future: Future[Any] = Future()
+                        queued.futures.append(future)
+                        device.stats.coalesced += 1
+                        return future
+            queued = _Command(service, command, action)
+            device.pending.append(queued)
+            device.stats.depth = len(device.pending)
+            device.stats.max_depth = max(device.stats.max_depth, device.stats.depth)
+            if not device.running:
+                device.running = True
+                threading.Thread(
+                    target=self._drain,
+                    args=(device_id, device),
+                    name=f"deepglm-queue-{device_id}",
+                    daemon=True,
+                ).start()
+            return queued.futures[0]
+
+    # Metrics
+
+    def stats(self) -> dict[str, QueueStats]:
+        """Snapshot of the metrics of every device seen so far."""
+        with self._lock:
+            return {
+                device_id: QueueStats(**vars(device.stats))
+                for device_id, device in self._devices.items()
+            }
+
+    def depth(self, device_id: str) -> int:
+        """Commands currently waiting for a device."""
+        with self._lock:
+            device = self._devices.get(device_id)
+            return len(device.pending) if device is not None else 0
+
+    # Draining
+
+    def _take_batch(self, device: _Device) -> tuple[list[_Command], float]:
+        """Pop the next batch, or return how long to wait for the rate limit."""
+        interval = 1.0 / self.max_actions_per_second if self.max_actions_per_second else 0.0
+        batch: list[_Command] = []
+        length = 0
+        now = time.monotonic()
+        next_action_at = device.next_action_at
+        while device.pending and len(batch) < self.max_batch:
+            command = device.pending[0]
+            if command.service == "exec" and batch:
+                break
+            merged = self._merged_keyevents(batch[-1], command) if batch else None
+            if merged is not None:
+                device.pending.popleft()
+                batch[-1].command = merged
+                batch[-1].futures.extend(command.futures)
+                device.stats.coalesced += 1
+                continue
+            if command.action and next_action_at > now:
+                if batch:
+                    break
+                return [], next_action_at - now
+            if batch and length + len(command.command) > self.max_command_length:
+                break
+            device.pending.popleft()
+            if command.action:
+                next_action_at = max(next_action_at, now) + interval
+            batch.append(command)
+            length += len(command.command) + 48
+            if command.service == "exec":
+                break
+        device.next_action_at = next_action_at
+        device.stats.depth = len(device.pending)
+        return batch, 0.0
+
+    @staticmethod
+    def _merged_keyevents(previous: _Command, command: _Command) -> str | None:
+        """A repeated key press folded into the previous one, if it is one."""
+        before = _KEYEVENT_RE.match(previous.command)
+        after = _KEYEVENT_RE.match(command.command)
+        if before is None or after is None or before.group(2) != after.group(2):
+            return None
+        codes = before.group(1).split()
+        if set(codes) != {after.group(1)}:
+            return None
+        return f"input keyevent {' '.join([*codes, after.group(1)])}{after.group(2)}"
+
+    def _drain(self, device_id: str, device: _Device) -> None:
+        while True:
+            with self._lock:
+                batch, wait = self._take_batch(device)
+                if not batch and not wait:
+                    device.running = False
+                    return
+                if wait:
+                    device.stats.throttled_seconds += wait
+            if wait:
+                time.sleep(wait)
+                continue
+            self._flush(device_id, device, batch)
+
+    def _flush(self, device_id: str, device: _Device, batch: list[_Command]) -> None:
+        with self._lock:
+            device.stats.batches += 1
+        try:
+            if batch[0].service == "exec":
+                results: list[Any] = [self._exec_out(device_id, batch[0].command)]
+            elif len(batch) == 1:
+                results = [self._shell(device_id, batch[0].command)]
+            else:
+                results = self._shell_batch(device_id, [c.command for c in batch])
+        except Exception as e:
+            for command in batch:
+                for future in command.futures:
+                    future.set_exception(e)
+            return
+        for command, result in zip(batch, results):
+            for future in command.futures:
+                future.set_result(result)
+
+    def _shell_batch(self, device_id: str, commands: list[str]) -> list[str]:
+        """Run several shell commands in one round trip and split the output."""
+        token = uuid.uuid4().hex[:12]
+        markers = [f"__deepglm_{token}_{i}__" for i in range(len(commands))]
+        # The newline before ")" keeps a trailing comment from swallowing it
+        joined = "; ".join(f"( {c}\n); echo; echo {m}" for c, m in zip(commands, markers))
+        logger.debug(f"Sending {len(commands)} queued commands to {device_id} at once")
+        output = self._shell(device_id, joined)
+        results = []
+        start = 0
+        for marker in markers:
+            end = output.find(marker, start)
+            if end == -1:
+                raise ToolExecutionError(f"Batched shell output from {device_id} is incomplete")
+            # Drop the newline echoed before the marker (a PTY may send \r\n)
+            segment = output[start:end]
+            segment = segment[:-2] if segment.endswith("\r\n") else segment[:-1]
+            results.append(segment)
+            start = end + len(marker)
+            start += 2 if output.startswith("\r\n", start) else 1
+        return results
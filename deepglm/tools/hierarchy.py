@@ -0,0 +1,156 @@
+"""UI hierarchy parsing and element selectors.
+
+Parses `uiautomator dump` XML into flat `UINode` records and matches them
+against selector strings, so tools can locate elements (and notice whether
+the content of a list changed) without sending the XML to the model.
+
+Selector syntax:
+    "Wi-Fi"                 text or content description contains "Wi-Fi"
+                            (case-insensitive)
+    "text=Wi-Fi"            text is exactly "Wi-Fi"
+    "desc=Navigate up"      content description is exactly "Navigate up"
+    "id=title"              resource ID is "title" or ends with ":id/title"
+    "class=android.widget.Switch"
+    "id=title; text=Battery"
+                            all conditions must match
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+_SELECTOR_KEYS = ("text", "desc", "id", "class")
+
+
+@dataclass(frozen=True)
+class UINode:
+    """One node of the UI hierarchy.
+
+    Attributes:
+        text: Displayed text
+        desc: Content description
+        resource_id: Resource ID (e.g. "com.android.settings:id/title")
+        class_name: Widget class
+        bounds: Box as (left, top, right, bottom) in screen pixels
+        clickable: Whether the node handles taps
+        scrollable: Whether the node scrolls
+    """
+
+    text: str
+    desc: str
+    resource_id: str
+    class_name: str
+    bounds: tuple[int, int, int, int]
+    clickable: bool = False
+    scrollable: bool = False
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """Tap point in the middle of the node."""
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+    @property
+    def area(self) -> int:
+        left, top, right, bottom = self.bounds
+        return max(0, right - left) * max(0, bottom - top)
+
+    @property
+    def key(self) -> tuple[str, str, str, str]:
+        """Identity of the node regardless of where it is on screen."""
+        return (self.class_name, self.resource_id, self.text, self.desc)
+
+
+def parse_hierarchy(xml: str) -> list[UINode]:
+    """Parse uiautomator XML into nodes in document order.
+
+    Raises:
+        ValueError: If the XML cannot be parsed
+    """
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid UI hierarchy XML: {e}") from e
+    nodes = []
+    for element in root.iter("node"):
+        match = _BOUNDS_RE.match(element.get("bounds", ""))
+        if match is None:
+            continue
+        left, top, right, bottom = (int(v) for v in match.groups())
+        nodes.append(
+            UINode(
+                text=element.get("text", ""),
+                desc=element.get("content-desc", ""),
+                resource_id=element.get("resource-id", ""),
+                class_name=element.get("class", ""),
+                bounds=(left, top, right, bottom),
+                clickable=element.get("clickable") == "true",
+                scrollable=element.get("scrollable") == "true",
+            )
+        )
+    return nodes
+
+
+class Selector:
+    """Match UI nodes against a selector string (see the module docstring).
+
+    Raises:
+        ValueError: If the selector is empty or uses an unknown key
+    """
+
+    def __init__(self, spec: str) -> None:
+        self.spec = spec
+        self.conditions: list[tuple[str, str]] = []
+        for part in spec.split(";"):
+            part = part.strip()
+            key, sep, value = part.partition("=")
+            if sep and key.strip() in _SELECTOR_KEYS:
+                self.conditions.append((key.strip(), value.strip()))
+            elif part:
+                self.conditions.append(("any", part.lower()))
+        if not self.conditions:
+            raise ValueError(f"Empty selector: {spec!r}")
+
+    def matches(self, node: UINode) -> bool:
+        """Whether the node satisfies every condition."""
+        for key, value in self.conditions:
+            if key == "any":
+                ok = value in node.text.lower() or value in node.desc.lower()
+            elif key == "text":
+                ok = node.text == value
+            elif key == "desc":
+                ok = node.desc == value
+            elif key == "id":
+                ok = node.resource_id == value or node.resource_id.endswith(f":id/{value}")
+            else:
+                ok = node.class_name == value
+            if not ok:
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"Selector({self.spec!r})"
+
+
+def scroll_area(nodes: list[UINode]) -> tuple[int, int, int, int] | None:
+    """Bounds of the largest scrollable node, or None if nothing scrolls."""
+    scrollable = [node for node in nodes if node.scrollable and node.area]
+    return max(scrollable, key=lambda node: node.area).bounds if scrollable else None
+
+
+def inside(point: tuple[int, int], bounds: tuple[int, int, int, int]) -> bool:
+    """Whether a point lies within bounds."""
+    x, y = point
+    left, top, right, bottom = bounds
+    return left <= x < right and top <= y < bottom
+
+
+def content_keys(nodes: list[UINode], bounds: tuple[int, int, int, int]) -> set[tuple]:
+    """Keys of the nodes with their center inside bounds.
+
+    Comparing the keys before and after a scroll tells how far the content
+    moved; identical keys mean it did not move at all.
+    """
+    return {node.key for node in nodes if inside(node.center, bounds) and node.bounds != bounds}
@@ -0,0 +1,643 @@
+"""Streaming logcat ingestion with an indexed in-memory ring buffer.
+
+`LogcatMonitor` keeps one `logcat -B` stream open per device and parses the
+binary entries into a `LogBuffer`: a bounded, column-oriented ring buffer
+with per-tag, per-pid and per-level indexes. Questions such as "did the app
+crash since my last action?" are answered from memory in microseconds,
+instead of running `logcat -d` and reading megabytes of text.
+
+Binary entry layout (struct logger_entry, little-endian): uint16 payload
+length, uint16 header size (0 for the 20-byte v1 header), int32 pid,
+uint32 tid, uint32 sec, uint32 nsec, then optional lid/uid fields. The
+payload of a text entry is a priority byte, a NUL-terminated tag and a
+NUL-terminated message.
+"""
+
+import bisect
+import logging
+import re
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from deepglm.exceptions import ToolExecutionError
+from deepglm.tools.adb_client import AdbClient, AdbConnection
+
+logger = logging.getLogger(__name__)
+
+LEVELS = {2: "V", 3: "D", 4: "I", 5: "W", 6: "E", 7: "F"}
+LEVEL_PRIORITIES = {name: priority for priority, name in LEVELS.items()}
+
+# Buffers to stream; "crash" carries Java and native crash reports. Streams
+# are opened with `-T <epoch seconds>` to replay entries since that time.
+LOGCAT_COMMAND = "logcat -B -b main,system,crash"
+
+# How long a new stream may take to replay the entries since its start time
+_REPLAY_SETTLE = 0.1
+
+# Reads the device clock, to convert host times into log timestamps
+_CLOCK_COMMAND = "date +%s.%N"
+_CLOCK_TIMEOUT = 5.0
+
+_V1_HEADER_SIZE = 20
+_HEADER = struct.Struct("<HHiIII")
+
+_JAVA_CRASH_RE = re.compile(r"FATAL EXCEPTION.*?Process: (\S+?),", re.DOTALL)
+_NATIVE_CRASH_RE = re.compile(r">>> (\S+) <<<")
+_ANR_RE = re.compile(r"^ANR in (\S+)")
+
+
+@dataclass
+class LogEntry:
+    """A parsed logcat entry.
+
+    Attributes:
+        seq: Position in the device's stream (increases by one per entry)
+        time: Device wall-clock time in seconds since the epoch
+        pid: Process ID
+        tid: Thread ID
+        level: Priority letter (V, D, I, W, E, F)
+        tag: Log tag
+        message: Log message
+    """
+
+    seq: int
+    time: float
+    pid: int
+    tid: int
+    level: str
+    tag: str
+    message: str
+
+    def format(self) -> str:
+        """Format like `logcat -v time`."""
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(self.time))
+        millis = int(self.time % 1 * 1000)
+        return f"{stamp}.{millis:03d} {self.level}/{self.tag}({self.pid}): {self.message}"
+
+
+def level_priority(level: str) -> int:
+    """Android priority of a log level given as a letter or name.
+
+    Args:
+        level: "W", "w", "warning", "Error", ...
+
+    Raises:
+        ToolExecutionError: If the level is not one of V, D, I, W, E, F
+    """
+    priority = LEVEL_PRIORITIES.get(level.strip()[:1].upper())
+    if priority is None:
+        raise ToolExecutionError(
+            f"Unknown log level {level!r}; use one of {', '.join(LEVEL_PRIORITIES)}"
+        )
+    return priority
+
+
+def parse_entry(header: bytes, body: bytes) -> tuple[float, int, int, int, str, str] | None:
+    """Decode one binary logcat entry.
+
+    Args:
+        header: The first 20 bytes of the entry
+        body: The rest of the entry (extra header fields and payload)
+
+    Returns:
+        (time, pid, tid, priority, tag, message), or None for entries that
+        are not text logs
+    """
+    length, header_size, pid, tid, sec, nsec = _HEADER.unpack(header)
+    payload = body[max(header_size, _V1_HEADER_SIZE) - _V1_HEADER_SIZE:]
+    if len(payload) < 2 or payload[0] not in LEVELS:
+        return None
+    tag_end = payload.find(b"\0", 1)
+    if tag_end == -1:
+        return None
+    tag = payload[1:tag_end].decode("utf-8", errors="replace")
+    message = payload[tag_end + 1:].rstrip(b"\0\n").decode("utf-8", errors="replace")
+    return sec + nsec / 1e9, pid, tid, payload[0], tag, message
+
+
+def read_entry(conn: AdbConnection) -> tuple[float, int, int, int, str, str] | None:
+    """Read and decode the next entry from a `logcat -B` stream."""
+    header = conn.read_exact(_V1_HEADER_SIZE)
+    length, header_size = struct.unpack_from("<HH", header)
+    extra = max(header_size, _V1_HEADER_SIZE) - _V1_HEADER_SIZE
+    return parse_entry(header, conn.read_exact(extra + length))
+
+
+class _Index:
+    """Ascending sequence numbers per key, trimmed lazily as entries expire."""
+
+    __slots__ = ("seqs", "start")
+
+    def __init__(self) -> None:
+        self.seqs = array("q")
+        self.start = 0
+
+    def since(self, seq: int) -> list[int]:
+        return list(self.seqs[bisect.bisect_left(self.seqs, seq, self.start):])
+
+    def trim(self, oldest: int) -> None:
+        self.start = bisect.bisect_left(self.seqs, oldest, self.start)
+        if self.start > 1024 and self.start * 2 > len(self.seqs):
+            del self.seqs[:self.start]
+            self.start = 0
+
+
+class LogBuffer:
+    """Bounded, column-oriented ring buffer of log entries.
+
+    Each field is stored in its own preallocated column (typed arrays for
+    numbers, interned IDs for tags), so memory stays flat at capacity.
+    Tags, pids and levels are indexed for fast filtered queries.
+
+    Args:
+        capacity: Maximum number of entries kept; the oldest are overwritten
+    """
+
+    def __init__(self, capacity: int = 50000) -> None:
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._pids = array("i", bytes(4 * capacity))
+        self._tids = array("i", bytes(4 * capacity))
+        self._levels = array("b", bytes(capacity))
+        self._tag_ids = array("i", bytes(4 * capacity))
+        self._messages: list[str] = [""] * capacity
+        self._tags: list[str] = []
+        self._tag_lookup: dict[str, int] = {}
+        self._by_tag: dict[int, _Index] = {}
+        self._by_pid: dict[int, _Index] = {}
+        self._by_level: dict[int, _Index] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next appended entry will get."""
+        return self._next
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest entry still in the buffer."""
+        return max(0, self._next - self.capacity)
+
+    def __len__(self) -> int:
+        return self._next - self.oldest_seq
+
+    def seq_at(self, when: float) -> int:
+        """Sequence number of the first entry logged at or after `when`.
+
+        Entries arrive in time order, so this is a binary search.
+        """
+        with self._lock:
+            low, high = self.oldest_seq, self._next
+            while low < high:
+                middle = (low + high) // 2
+                if self._times[middle % self.capacity] < when:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+
+    def last_time(self) -> float | None:
+        """Time of the newest entry, or None if the buffer is empty."""
+        with self._lock:
+            return self._times[(self._next - 1) % self.capacity] if self._next else None
+
+    def append(
+        self, when: float, pid: int, tid: int, priority: int, tag: str, message: str
+    ) -> int:
+        """Add an entry, overwriting the oldest one when full.
+
+        Returns:
+            The entry's sequence number
+        """
+        with self._lock:
+            seq = self._next
+            slot = seq % self.capacity
+            tag_id = self._tag_lookup.get(tag)
+            if tag_id is None:
+                tag_id = self._tag_lookup[tag] = len(self._tags)
+                self._tags.append(tag)
+            self._times[slot] = when
+            self._pids[slot] = pid
+            self._tids[slot] = tid
+            self._levels[slot] = priority
+            self._tag_ids[slot] = tag_id
+            self._messages[slot] = message
+            for index, key in ((self._by_tag, tag_id), (self._by_pid, pid),
+                               (self._by_level, priority)):
+                if key not in index:
+                    index[key] = _Index()
+                index[key].seqs.append(seq)
+            self._next = seq + 1
+            if seq % 4096 == 0 and seq >= self.capacity:
+                self._trim()
+            return seq
+
+    def _trim(self) -> None:
+        """Drop expired sequence numbers from the indexes."""
+        oldest = self.oldest_seq
+        for index in (self._by_tag, self._by_pid, self._by_level):
+            for key in list(index):
+                index[key].trim(oldest)
+                if index[key].start == len(index[key].seqs):
+                    del index[key]
+
+    def _entry(self, seq: int) -> LogEntry:
+        slot = seq % self.capacity
+        return LogEntry(
+            seq=seq,
+            time=self._times[slot],
+            pid=self._pids[slot],
+            tid=self._tids[slot],
+            level=LEVELS.get(self._levels[slot], "?"),
+            tag=self._tags[self._tag_ids[slot]],
+            message=self._messages[slot],
+        )
+
+    def _select(
+        self,
+        since: int,
+        tag: str | None,
+        pid: int | None,
+        min_level: str | None,
+        contains: str | None,
+    ) -> list[int]:
+        """Sequence numbers of matching entries (caller holds the lock)."""
+        since = max(since, self.oldest_seq)
+        candidates: list[list[int]] = []
+        if tag is not None:
+            tag_id = self._tag_lookup.get(tag)
+            index = self._by_tag.get(tag_id) if tag_id is not None else None
+            candidates.append(index.since(since) if index else [])
+        if pid is not None:
+            index = self._by_pid.get(pid)
+            candidates.append(index.since(since) if index else [])
+        min_priority = level_priority(min_level) if min_level else None
+        if min_priority is not None and min_priority > LEVEL_PRIORITIES["V"]:
+            seqs = []
+            for priority, index in self._by_level.items():
+                if priority >= min_priority:
+                    seqs.extend(index.since(since))
+            candidates.append(sorted(seqs))
+
+        # Scan the most selective index and check the other filters per row
+        rows = min(candidates, key=len) if candidates else range(since, self._next)
+        matches = []
+        for seq in rows:
+            slot = seq % self.capacity
+            if tag is not None and self._tags[self._tag_ids[slot]] != tag:
+                continue
+            if pid is not None and self._pids[slot] != pid:
+                continue
+            if min_priority is not None and self._levels[slot] < min_priority:
+                continue
+            if contains is not None and contains not in self._messages[slot]:
+                continue
+            matches.append(seq)
+        return matches
+
+    def query(
+        self,
+        since: int = 0,
+        tag: str | None = None,
+        pid: int | None = None,
+        min_level: str | None = None,
+        contains: str | None = None,
+        limit: int | None = None,
+    ) -> list[LogEntry]:
+        """Find entries matching all given filters, oldest first.
+
+        Args:
+            since: Only entries with seq >= since
+            tag: Exact tag
+            pid: Process ID
+            min_level: Lowest level to include (e.g. "W" for W, E and F)
+            contains: Substring the message must contain
+            limit: Return at most this many of the newest matches
+
+        Returns:
+            Matching entries
+
+        Raises:
+            ToolExecutionError: If min_level is not a log level
+        """
+        with self._lock:
+            matches = self._select(since, tag, pid, min_level, contains)
+            if limit is not None:
+                matches = matches[-limit:] if limit else []
+            return [self._entry(seq) for seq in matches]
+
+    def count(
+        self,
+        since: int = 0,
+        tag: str | None = None,
+        pid: int | None = None,
+        min_level: str | None = None,
+        contains: str | None = None,
+    ) -> int:
+        """Number of entries query() would return without a limit."""
+        with self._lock:
+            return len(self._select(since, tag, pid, min_level, contains))
+
+
+@dataclass
+class CrashReport:
+    """A crash or ANR found in the log.
+
+    Attributes:
+        kind: "crash", "native_crash" or "anr"
+        package: Package or process name the report names
+        entry: The log entry that reported it
+    """
+
+    kind: str
+    package: str
+    entry: LogEntry
+
+
+@dataclass
+class LogcatReport:
+    """Result of a logcat check.
+
+    Attributes:
+        crashes: Crashes and ANRs found, e.g. "crash in com.example.app: ..."
+        entries: Matching entries, formatted like `logcat -v time`
+        matched: Total number of matching entries (entries may be truncated)
+    """
+
+    crashes: list[str]
+    entries: list[str]
+    matched: int
+
+
+def find_crashes(entries: list[LogEntry]) -> list[CrashReport]:
+    """Detect Java crashes, native crashes and ANRs in log entries."""
+    reports = []
+    for entry in entries:
+        if entry.tag == "AndroidRuntime" and entry.level in ("E", "F"):
+            match = _JAVA_CRASH_RE.search(entry.message)
+            if match:
+                reports.append(CrashReport("crash", match.group(1), entry))
+        elif entry.tag == "DEBUG" and entry.level in ("E", "F"):
+            match = _NATIVE_CRASH_RE.search(entry.message)
+            if match:
+                reports.append(CrashReport("native_crash", match.group(1), entry))
+        elif entry.tag == "ActivityManager" and entry.level == "E":
+            match = _ANR_RE.search(entry.message)
+            if match:
+                reports.append(CrashReport("anr", match.group(1), entry))
+    return reports
+
+
+class _Stream:
+    """Background reader feeding one device's logcat into its buffer.
+
+    The reader exits when the stream ends (e.g. the device went away);
+    LogcatMonitor opens a new one on next use.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], AdbClient],
+        device_id: str,
+        buffer: LogBuffer,
+        start: float,
+    ) -> None:
+        self.client_factory = client_factory
+        self.device_id = device_id
+        self.buffer = buffer
+        self.start = start
+        self.connected = threading.Event()
+        self._conn: AdbConnection | None = None
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"deepglm-logcat-{device_id}", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        # -T takes milliseconds; round down so no entry at the start is missed
+        start = int(self.start * 1000) / 1000
+        try:
+            self._conn = self.client_factory().open_stream(
+                self.device_id, f"exec:{LOGCAT_COMMAND} -T {start:.3f}"
+            )
+        except (ToolExecutionError, OSError) as e:
+            logger.debug(f"Cannot open logcat on {self.device_id}: {e}")
+            return
+        if self._stopped:
+            self._conn.close()
+            return
+        self.connected.set()
+        try:
+            self._read(self._conn)
+        except (ToolExecutionError, OSError) as e:
+            if not self._stopped:
+                logger.debug(f"logcat stream for {self.device_id} ended: {e}")
+        finally:
+            self.connected.clear()
+            self._conn.close()
+
+    def _read(self, conn: AdbConnection) -> None:
+        while not self._stopped:
+            entry = read_entry(conn)
+            if entry is not None:
+                self.buffer.append(*entry)
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._conn is not None:
+            # close() alone may not wake a recv() blocked without a timeout
+            self._conn.shutdown()
+            self._conn.close()
+
+
+class LogcatMonitor:
+    """Per-device logcat streams with action markers.
+
+    mark() records where a device action starts: the stream position if the
+    device's stream is live, else only the host time. A device's stream
+    starts the first time its log is queried, replaying what was logged
+    since its last action, and is reopened on next use if it ended. Checks
+    can then be limited to entries logged after the last action. Host times
+    are moved onto the device clock by an offset measured when the first
+    stream opens, so clock skew does not shift that window.
+
+    Args:
+        client_factory: Callable returning an AdbClient for the streams
+            (use one without a socket timeout; logcat can stay quiet)
+        capacity: Entries kept per device
+    """
+
+    def __init__(self, client_factory: Callable[[], AdbClient], capacity: int = 50000) -> None:
+        self._client_factory = client_factory
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._buffers: dict[str, LogBuffer] = {}
+        self._streams: dict[str, _Stream] = {}
+        # device -> (host time, stream position or None)
+        self._marks: dict[str, tuple[float, int | None]] = {}
+        self._offsets: dict[str, float] = {}
+
+    def _clock_offset(self, device_id: str) -> float:
+        """Seconds the device clock is ahead of the host's; measured once per device."""
+        with self._lock:
+            if device_id in self._offsets:
+                return self._offsets[device_id]
+        client = self._client_factory()
+        client.timeout = _CLOCK_TIMEOUT
+        try:
+            before = time.time()
+            output = client.shell(device_id, _CLOCK_COMMAND)
+            after = time.time()
+            offset = float(output.split()[0]) - (before + after) / 2
+        except (ToolExecutionError, OSError, ValueError, IndexError) as e:
+            logger.debug(f"Cannot read the clock of {device_id}, assuming no skew: {e}")
+            return 0.0
+        if abs(offset) > 1:
+            logger.debug(f"Clock of {device_id} is {offset:+.3f}s off the host's")
+        with self._lock:
+            self._offsets[device_id] = offset
+        return offset
+
+    def _ensure_stream(self, device_id: str) -> tuple[_Stream, bool]:
+        """Get the device's stream, opening one if needed.
+
+        Returns:
+            The stream and whether it was just opened
+        """
+        with self._lock:
+            buffer = self._buffers.get(device_id)
+            if buffer is None:
+                buffer = self._buffers[device_id] = LogBuffer(self.capacity)
+            stream = self._streams.get(device_id)
+            if stream is not None and stream.alive:
+                return stream, False
+        offset = self._clock_offset(device_id)
+        with self._lock:
+            stream = self._streams.get(device_id)
+            if stream is not None and stream.alive:
+                return stream, False
+            # Resume after the newest buffered entry, else replay since the last action
+            last = buffer.last_time()
+            if last is not None:
+                start = last + 0.001
+            else:
+                mark = self._marks.get(device_id)
+                start = (mark[0] if mark is not None else time.time()) + offset
+            stream = self._streams[device_id] = _Stream(
+                self._client_factory, device_id, buffer, start
+            )
+            return stream, True
+
+    def buffer(self, device_id: str, connect_timeout: float = 2.0) -> LogBuffer:
+        """Get a device's buffer, waiting briefly for its stream to connect.
+
+        A new stream also gets a moment to replay the entries since its
+        start time.
+        """
+        stream, opened = self._ensure_stream(device_id)
+        if not stream.connected.wait(connect_timeout):
+            logger.warning(f"logcat stream for {device_id} is not connected")
+        elif opened:
+            deadline = time.monotonic() + connect_timeout
+            seq = -1
+            while seq != stream.buffer.next_seq and time.monotonic() < deadline:
+                seq = stream.buffer.next_seq
+                time.sleep(_REPLAY_SETTLE)
+        return stream.buffer
+
+    def mark(self, device_id: str) -> float:
+        """Record the start of the device's last action.
+
+        Does not open a stream, so actions are never delayed.
+
+        Returns:
+            The marked host time in seconds since the epoch
+        """
+        now = time.time()
+        with self._lock:
+            stream = self._streams.get(device_id)
+            seq = stream.buffer.next_seq if stream and stream.connected.is_set() else None
+            self._marks[device_id] = (now, seq)
+        return now
+
+    def last_mark(self, device_id: str) -> float | None:
+        """Host time of the device's last action, or None if there was none."""
+        with self._lock:
+            mark = self._marks.get(device_id)
+            return mark[0] if mark is not None else None
+
+    def _since_mark(self, device_id: str, buffer: LogBuffer) -> int:
+        """First sequence number logged after the device's last action."""
+        with self._lock:
+            mark = self._marks.get(device_id)
+            offset = self._offsets.get(device_id, 0.0)
+        if mark is None:
+            return 0
+        when, seq = mark
+        return seq if seq is not None else buffer.seq_at(when + offset)
+
+    def check(
+        self,
+        device_id: str,
+        package_name: str | None = None,
+        tag: str | None = None,
+        min_level: str | None = "W",
+        contains: str | None = None,
+        since_last_action: bool = True,
+        limit: int = 20,
+    ) -> LogcatReport:
+        """Look for crashes and matching entries in a device's log.
+
+        Args:
+            device_id: The device identifier
+            package_name: Only report crashes and ANRs of this package
+            tag: Only entries with this tag
+            min_level: Lowest level of entries to return
+            contains: Only entries whose message contains this text
+            since_last_action: Only look at entries logged after the last mark()
+            limit: Maximum number of entries to return (newest are kept)
+
+        Returns:
+            LogcatReport with crashes and formatted entries
+
+        Raises:
+            ToolExecutionError: If min_level is not a log level
+        """
+        if min_level:
+            level_priority(min_level)
+        buffer = self.buffer(device_id)
+        since = self._since_mark(device_id, buffer) if since_last_action else 0
+        severe = buffer.query(since=since, min_level="E")
+        crashes = [
+            f"{report.kind} in {report.package}: {report.entry.message.splitlines()[0]}"
+            for report in find_crashes(severe)
+            if package_name is None or report.package.startswith(package_name)
+        ]
+        entries = buffer.query(
+            since=since, tag=tag, min_level=min_level, contains=contains, limit=limit
+        )
+        return LogcatReport(
+            crashes=crashes,
+            entries=[entry.format() for entry in entries],
+            matched=buffer.count(since=since, tag=tag, min_level=min_level, contains=contains),
+        )
+
+    def stop(self) -> None:
+        """Stop all streams and forget their logs, action marks and clock offsets."""
+        with self._lock:
+            for stream in self._streams.values():
+                stream.stop()
+            self._streams.clear()
+            self._buffers.clear()
+            self._marks.clear()
+            self._offsets.clear()
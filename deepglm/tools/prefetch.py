@@ -0,0 +1,144 @@
+"""Background prefetching of device observations.
+
+After a device action the agent almost always looks at the screen next.
+Instead of capturing only when the model asks, the prefetcher starts the
+capture in the background as soon as the action returns, so the observation
+is usually ready by the time the model has finished thinking.
+
+A prefetched observation is tied to a per-device generation counter. Any
+later action on the device bumps the generation, which discards the
+observation (the screen it shows is about to change). A capture still in
+flight checks its generation between steps and stops once it is stale, so
+it does not load the device while the next action runs.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Observation:
+    """A snapshot of what is on a device's screen.
+
+    Attributes:
+        screen_png: Screenshot as PNG bytes
+        hierarchy: UI hierarchy XML from uiautomator
+        settled: Whether the UI had settled before the capture
+        captured_at: time.monotonic() when the capture finished
+    """
+
+    screen_png: bytes
+    hierarchy: str
+    settled: bool
+    captured_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Slot:
+    generation: int
+    future: Future[Observation | None]
+    served: set[str] = field(default_factory=set)
+
+
+class ObservationPrefetcher:
+    """Capture device observations ahead of time, one slot per device.
+
+    Args:
+        observe: Callable that captures an Observation for a device ID; its
+            second argument returns False once the capture is no longer
+            wanted, and it may then return None early
+        max_age: Seconds after which a prefetched observation is stale
+        wait_timeout: How long take() waits for an in-flight capture
+        max_workers: Number of background capture threads
+
+    Example:
+        >>> prefetcher = ObservationPrefetcher(observe)
+        >>> prefetcher.schedule("emulator-5554")   # right after tap()
+        >>> prefetcher.take("emulator-5554", "screen")  # when the model asks
+    """
+
+    def __init__(
+        self,
+        observe: Callable[[str, Callable[[], bool]], Observation | None],
+        max_age: float = 30.0,
+        wait_timeout: float = 10.0,
+        max_workers: int = 4,
+    ) -> None:
+        self._observe = observe
+        self.max_age = max_age
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="deepglm-prefetch"
+        )
+        self._lock = threading.Lock()
+        self._generation: dict[str, int] = {}
+        self._slots: dict[str, _Slot] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, device_id: str) -> None:
+        """Discard any observation for the device; its screen is changing."""
+        with self._lock:
+            self._generation[device_id] = self._generation.get(device_id, 0) + 1
+            self._slots.pop(device_id, None)
+
+    def schedule(self, device_id: str) -> None:
+        """Start capturing the next observation for the device in the background."""
+        with self._lock:
+            generation = self._generation.get(device_id, 0) + 1
+            self._generation[device_id] = generation
+            future = self._executor.submit(
+                self._observe, device_id, lambda: self._is_current(device_id, generation)
+            )
+            self._slots[device_id] = _Slot(generation=generation, future=future)
+        logger.debug(f"Prefetching observation for {device_id}")
+
+    def _is_current(self, device_id: str, generation: int) -> bool:
+        with self._lock:
+            return self._generation.get(device_id) == generation
+
+    def take(self, device_id: str, kind: str) -> Observation | None:
+        """Get the prefetched observation if it is still valid.
+
+        Each kind (e.g. "screen", "hierarchy") is served once per capture, so
+        asking for the same kind again triggers a fresh capture.
+
+        Args:
+            device_id: The device identifier
+            kind: Which part of the observation the caller will use
+
+        Returns:
+            The Observation, or None if the caller should capture directly
+        """
+        with self._lock:
+            slot = self._slots.get(device_id)
+            if slot is None or kind in slot.served:
+                self.misses += 1
+                return None
+            slot.served.add(kind)
+        observation: Observation | None
+        try:
+            observation = slot.future.result(timeout=self.wait_timeout)
+        except FutureTimeoutError:
+            observation = None
+        except Exception as e:
+            logger.debug(f"Prefetch for {device_id} failed: {e}")
+            observation = None
+        current = self._is_current(device_id, slot.generation)
+        if (
+            observation is None
+            or not current
+            or not observation.settled
+            or time.monotonic() - observation.captured_at > self.max_age
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return observation
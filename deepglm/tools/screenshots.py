@@ -0,0 +1,366 @@
+"""Content-addressed screenshot store.
+
+Screenshots are keyed by the SHA-256 of their PNG bytes, so the many
+identical frames an agent captures (the screen often does not change between
+two looks) are stored once. `put` only hashes the frame and queues it; a
+background thread recompresses the PNG and writes it to disk, so disk I/O
+stays off the agent's step path. `save` writes the frame as it is when a
+caller needs a path, and the background thread replaces the file with the
+recompressed one later. Stored frames are read back through mmap. After
+every write the store evicts frames older than its maximum age, then the
+least recently used frames while it exceeds its size budget; reusing a frame
+updates its file's mtime, so the order survives a restart.
+
+Layout on disk: `<root>/<key[:2]>/<key>.png`.
+
+Example:
+    >>> store = ScreenshotStore(".deepglm/screenshots")
+    >>> key = store.put(png_bytes)  # returns at once
+    >>> data = store.read(key)  # same pixels, possibly a smaller file
+    >>> path = store.save(png_bytes)  # <root>/<key[:2]>/<key>.png, on disk
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import queue
+import shutil
+import struct
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def recompress_png(data: bytes, level: int = 9) -> bytes:
+    """Re-deflate the image data of a PNG at a higher compression level.
+
+    The pixels are unchanged. Devices encode screenshots with fast settings,
+    so this typically saves a good part of the file. Input that cannot be
+    parsed, or that would not get smaller, is returned as is.
+
+    Args:
+        data: PNG file bytes
+        level: zlib compression level
+
+    Returns:
+        PNG file bytes, never larger than the input
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        return data
+    chunks: list[tuple[bytes, bytes]] = []
+    idat: list[bytes] = []
+    pos = len(_PNG_SIGNATURE)
+    try:
+        while pos < len(data):
+            (length,) = struct.unpack(">I", data[pos:pos + 4])
+            kind = data[pos + 4:pos + 8]
+            body = data[pos + 8:pos + 8 + length]
+            pos += 12 + length
+            if kind == b"IDAT":
+                if not idat:
+                    chunks.append((b"IDAT", b""))
+                idat.append(body)
+            else:
+                chunks.append((kind, body))
+        pixels = zlib.decompress(b"".join(idat))
+    except (struct.error, zlib.error):
+        return data
+
+    compressed = zlib.compress(pixels, level)
+    out = [_PNG_SIGNATURE]
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            body = compressed
+        out.append(struct.pack(">I", len(body)) + kind + body)
+        out.append(struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+    result = b"".join(out)
+    return result if len(result) < len(data) else data
+
+
+class ScreenshotStore:
+    """Deduplicating on-disk store for screenshots.
+
+    Args:
+        root: Directory to store frames in (created on first write)
+        max_bytes: Size budget; least recently used frames are evicted beyond it
+        max_age: Seconds after which an unused frame is evicted
+        compress_level: zlib level for background recompression (0 disables it)
+
+    Attributes:
+        dedup_hits: Number of put() calls that found the frame already stored
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 2 * 1024**3,
+        max_age: float = 7 * 24 * 3600,
+        compress_level: int = 9,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress_level = compress_level
+        self.dedup_hits = 0
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        # key -> [size, last used]; loaded from disk on first use
+        self._index: dict[str, list[float]] | None = None
+        self._total = 0
+        self._pending: dict[str, bytes] = {}
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._writer: threading.Thread | None = None
+
+    def path(self, key: str) -> str:
+        """File path of a frame (it may still be pending; see flush())."""
+        return os.path.join(self.root, key[:2], f"{key}.png")
+
+    def _load_index(self) -> dict[str, list[float]]:
+        """Scan the store directory once (caller holds the lock)."""
+        if self._index is None:
+            self._index = {}
+            if os.path.isdir(self.root):
+                for shard in os.scandir(self.root):
+                    if not shard.is_dir():
+                        continue
+                    for entry in os.scandir(shard.path):
+                        if entry.name.endswith(".png"):
+                            stat = entry.stat()
+                            self._index[entry.name[:-4]] = [stat.st_size, stat.st_mtime]
+            self._total = sum(int(size) for size, _ in self._index.values())
+        return self._index
+
+    def put(self, data: bytes) -> str:
+        """Add a frame to the store.
+
+        Returns immediately; the frame is written in the background and is
+        readable through read() right away.
+
+        Args:
+            data: PNG bytes
+
+        Returns:
+            The frame's key (hex SHA-256 of the bytes)
+        """
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            index = self._load_index()
+            reused = key in index
+            if reused:
+                index[key][1] = time.time()
+            if reused or key in self._pending:
+                self.dedup_hits += 1
+            else:
+                self._enqueue(key, data)
+        if reused:
+            self._touch(key)
+        return key
+
+    def save(self, data: bytes) -> str:
+        """Add a frame to the store and return its file, written as it is.
+
+        The background thread recompresses the file afterwards; readers see
+        either version, as it is replaced atomically.
+
+        Args:
+            data: PNG bytes
+
+        Returns:
+            Path of the frame's file
+
+        Raises:
+            OSError: If the frame could not be written
+        """
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path(key)
+        with self._lock:
+            entry = self._load_index().get(key)
+            if entry is not None:
+                entry[1] = time.time()
+        if entry is not None:
+            self._touch(key)
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        try:
+            # Never replaces a file the background thread already recompressed
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                index[key] = [len(data), time.time()]
+                self._total += len(data)
+            if key not in self._pending:
+                self._enqueue(key, data)
+        return path
+
+    def _enqueue(self, key: str, data: bytes) -> None:
+        """Queue a frame for the background writer (caller holds the lock)."""
+        self._pending[key] = data
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="deepglm-screenshots", daemon=True
+            )
+            self._writer.start()
+        self._queue.put(key)
+
+    def _touch(self, key: str) -> None:
+        """Record a reuse in the file's mtime, which orders eviction after a restart."""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending or key in self._load_index()
+
+    def open(self, key: str) -> mmap.mmap | bytes:
+        """Map a stored frame into memory without copying it.
+
+        Args:
+            key: Frame key returned by put()
+
+        Returns:
+            A read-only mmap of the file (close it when done), or the bytes
+            themselves while the frame is still pending
+
+        Raises:
+            KeyError: If the frame is not in the store
+        """
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            entry = self._load_index().get(key)
+            if entry is None:
+                raise KeyError(key)
+            entry[1] = time.time()
+        self._touch(key)
+        try:
+            with open(self.path(key), "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError) as e:
+            raise KeyError(key) from e
+
+    def read(self, key: str) -> bytes:
+        """Read a stored frame.
+
+        Raises:
+            KeyError: If the frame is not in the store
+        """
+        data = self.open(key)
+        if isinstance(data, bytes):
+            return data
+        with data:
+            return data[:]
+
+    def export(self, key: str, dest: str) -> str:
+        """Copy a frame to a file outside the store.
+
+        Returns:
+            dest
+        """
+        self.flush()
+        shutil.copyfile(self.path(key), dest)
+        return dest
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until all pending frames are on disk.
+
+        Returns:
+            False if the timeout expired first
+        """
+        with self._flushed:
+            return self._flushed.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def _write_loop(self) -> None:
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                data = self._pending.get(key)
+            if data is None:
+                continue
+            try:
+                self._write(key, data)
+            except OSError as e:
+                logger.warning(f"Failed to store screenshot {key[:12]}: {e}")
+                with self._flushed:
+                    self._pending.pop(key, None)
+                    self._flushed.notify_all()
+
+    def _write(self, key: str, data: bytes) -> None:
+        smaller = recompress_png(data, self.compress_level) if self.compress_level else data
+        with self._lock:
+            written = key in self._load_index()
+        # A frame saved as it is only needs replacing if it got smaller
+        if not written or smaller is not data:
+            path = self.path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(smaller)
+            os.replace(tmp, path)
+            with self._lock:
+                index = self._load_index()
+                previous = index.get(key)
+                index[key] = [len(smaller), previous[1] if previous else time.time()]
+                self._total += len(smaller) - (int(previous[0]) if previous else 0)
+        # Also expires old frames when the store is within its budget; runs
+        # before the frame counts as flushed, so flush() sees a tidy store
+        self.evict()
+        with self._flushed:
+            self._pending.pop(key, None)
+            self._flushed.notify_all()
+
+    def evict(self, now: float | None = None) -> int:
+        """Evict frames past the maximum age, then least recently used ones over budget.
+
+        Args:
+            now: Current time (defaults to time.time())
+
+        Returns:
+            Number of frames removed
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            index = self._load_index()
+            by_age = sorted(index.items(), key=lambda item: item[1][1])
+            victims = []
+            total = self._total
+            for key, (size, used) in by_age:
+                if now - used <= self.max_age and total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= int(size)
+            for key in victims:
+                self._total -= int(index.pop(key)[0])
+        for key in victims:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+        if victims:
+            logger.debug(f"Evicted {len(victims)} screenshots")
+        return len(victims)
+
+    def stats(self) -> dict[str, int]:
+        """Frame count, bytes on disk, pending frames and dedup hits."""
+        with self._lock:
+            index = self._load_index()
+            return {
+                "frames": len(index) + len(self._pending),
+                "bytes": self._total,
+                "pending": len(self._pending),
+                "dedup_hits": self.dedup_hits,
+            }
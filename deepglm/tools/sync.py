@@ -0,0 +1,367 @@
+"""Delta directory sync between the host and devices.
+
+`DirectorySync` mirrors a directory tree to or from a device over the adb
+sync protocol, rsync-style: a file is transferred only if its size differs,
+or its mtime differs and its SHA-256 does too. Transfers run on a few
+persistent sync connections in parallel, and each connection pipelines its
+files (SEND replies are collected in windows instead of per file).
+
+Remote hashes come from one `sha256sum` call per batch and are kept in a
+per-device manifest cache keyed by remote path, size and mtime, so an
+unchanged tree costs one directory listing on the next run.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shlex
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from deepglm.exceptions import ToolExecutionError
+from deepglm.tools.adb_client import AdbClient, SyncConnection, SyncEntry
+
+logger = logging.getLogger(__name__)
+
+# Keep the sha256sum command line well below the device's ARG_MAX
+_MAX_HASH_COMMAND = 64 * 1024
+
+
+@dataclass
+class SyncResult:
+    """Outcome of a push_dir or pull_dir.
+
+    Attributes:
+        transferred: Relative paths of the files that were copied
+        skipped: Number of files that were already up to date
+        bytes: Bytes transferred
+        seconds: Wall time of the whole sync
+    """
+
+    transferred: list[str] = field(default_factory=list)
+    skipped: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class _LocalFile:
+    path: str
+    size: int
+    mtime: int
+    mode: int
+
+
+def _walk_local(root: str) -> dict[str, _LocalFile]:
+    """Regular files under root, keyed by "/"-separated relative path."""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            st = os.stat(path)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            files[rel] = _LocalFile(path, st.st_size, int(st.st_mtime), st.st_mode)
+    return files
+
+
+def _walk_remote(sync: SyncConnection, root: str) -> dict[str, SyncEntry]:
+    """Regular files under a remote root, keyed by relative path.
+
+    Entry names are set to the full remote path.
+    """
+    files = {}
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        for entry in sync.list(posixpath.join(root, rel_dir) if rel_dir else root):
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir:
+                pending.append(rel)
+            else:
+                entry.name = posixpath.join(root, rel)
+                files[rel] = entry
+    return files
+
+
+def _balance(items: list[tuple[str, int]], buckets: int) -> list[list[str]]:
+    """Split (name, size) items into buckets of similar total size."""
+    loads = [0] * buckets
+    groups: list[list[str]] = [[] for _ in range(buckets)]
+    for name, size in sorted(items, key=lambda item: item[1], reverse=True):
+        target = loads.index(min(loads))
+        loads[target] += size
+        groups[target].append(name)
+    return [names for names in groups if names]
+
+
+class DirectorySync:
+    """Push and pull directory trees, transferring only what changed.
+
+    Args:
+        client_factory: Callable returning an AdbClient
+        manifest_dir: Directory for per-device manifest caches (JSON);
+            None keeps them in memory only
+        workers: Parallel sync connections per transfer
+        ack_window: Files sent on a connection before their replies are read
+
+    Example:
+        >>> sync = DirectorySync(AdbClient)
+        >>> sync.push_dir("emulator-5554", "fixtures/media", "/sdcard/DCIM/fixtures")
+        SyncResult(transferred=['a.jpg'], skipped=41, bytes=1830412, seconds=0.21)
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], AdbClient],
+        manifest_dir: str | None = None,
+        workers: int = 4,
+        ack_window: int = 16,
+    ) -> None:
+        self._client_factory = client_factory
+        self.manifest_dir = manifest_dir
+        self.workers = workers
+        self.ack_window = ack_window
+        # device -> remote path -> [size, mtime, sha256]
+        self._manifests: dict[str, dict[str, list]] = {}
+        # (local path, size, mtime) -> sha256
+        self._local_hashes: dict[tuple[str, int, int], str] = {}
+
+    # Manifest cache
+
+    def _manifest_path(self, device_id: str) -> str | None:
+        if self.manifest_dir is None:
+            return None
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in device_id)
+        return os.path.join(self.manifest_dir, f"{safe}.json")
+
+    def manifest(self, device_id: str) -> dict[str, list]:
+        """Known remote hashes for a device: path -> [size, mtime, sha256]."""
+        if device_id not in self._manifests:
+            path = self._manifest_path(device_id)
+            manifest: dict[str, list] = {}
+            if path and os.path.exists(path):
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable sync manifest {path}: {e}")
+            self._manifests[device_id] = manifest
+        return self._manifests[device_id]
+
+    def _save_manifest(self, device_id: str) -> None:
+        path = self._manifest_path(device_id)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifests[device_id], f)
+        os.replace(tmp, path)
+
+    # Hashing
+
+    def _local_hash(self, file: _LocalFile) -> str:
+        key = (file.path, file.size, file.mtime)
+        if key not in self._local_hashes:
+            with open(file.path, "rb") as f:
+                self._local_hashes[key] = hashlib.file_digest(f, "sha256").hexdigest()
+        return self._local_hashes[key]
+
+    def _remote_hashes(
+        self, client: AdbClient, device_id: str, entries: dict[str, SyncEntry]
+    ) -> dict[str, str]:
+        """SHA-256 of remote files by path, from the manifest or `sha256sum`."""
+        manifest = self.manifest(device_id)
+        hashes = {}
+        missing = []
+        for path, entry in entries.items():
+            cached = manifest.get(path)
+            if cached and cached[0] == entry.size and cached[1] == entry.mtime:
+                hashes[path] = cached[2]
+            else:
+                missing.append(path)
+
+        batches: list[list[str]] = [[]]
+        length = 0
+        for path in missing:
+            quoted = shlex.quote(path)
+            if batches[-1] and length + len(quoted) > _MAX_HASH_COMMAND:
+                batches.append([])
+                length = 0
+            batches[-1].append(quoted)
+            length += len(quoted) + 1
+        for batch in batches:
+            if not batch:
+                continue
+            for line in client.shell(device_id, "sha256sum " + " ".join(batch)).splitlines():
+                digest, _, name = line.partition("  ")
+                if name in entries and len(digest) == 64:
+                    hashes[name] = digest
+                    manifest[name] = [entries[name].size, entries[name].mtime, digest]
+        return hashes
+
+    def _unchanged(
+        self,
+        client: AdbClient,
+        device_id: str,
+        pairs: Mapping[str, tuple[_LocalFile, SyncEntry | None]],
+    ) -> set[str]:
+        """Relative paths whose local and remote copies have the same content."""
+        unchanged = set()
+        to_hash: dict[str, tuple[_LocalFile, SyncEntry]] = {}
+        for rel, (local, remote) in pairs.items():
+            if remote is None or remote.size != local.size:
+                continue
+            if remote.mtime == local.mtime:
+                unchanged.add(rel)
+            else:
+                to_hash[rel] = (local, remote)
+        if to_hash:
+            remote_hashes = self._remote_hashes(
+                client, device_id, {remote.name: remote for _, remote in to_hash.values()}
+            )
+            for rel, (local, remote) in to_hash.items():
+                if remote_hashes.get(remote.name) == self._local_hash(local):
+                    unchanged.add(rel)
+        return unchanged
+
+    def _parallel(
+        self,
+        device_id: str,
+        jobs: list[list[str]],
+        run: Callable[[SyncConnection, list[str]], None],
+    ) -> None:
+        """Run run(sync_connection, names) per job on its own connection."""
+        if not jobs:
+            return
+
+        def worker(names: list[str]) -> None:
+            with self._client_factory().sync(device_id) as sync:
+                run(sync, names)
+
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            for future in [executor.submit(worker, names) for names in jobs]:
+                future.result()
+
+    # Transfers
+
+    def push_dir(self, device_id: str, local_dir: str, remote_dir: str) -> SyncResult:
+        """Make remote_dir on the device contain the files of local_dir.
+
+        Files only present on the device are left alone.
+
+        Args:
+            device_id: The device identifier
+            local_dir: Local source directory
+            remote_dir: Device destination directory (created if missing)
+
+        Returns:
+            SyncResult with the files transferred and skipped
+
+        Raises:
+            ToolExecutionError: If a file could not be written on the device
+        """
+        start = time.monotonic()
+        if not os.path.isdir(local_dir):
+            raise ToolExecutionError(f"Not a directory: {local_dir}")
+        local = _walk_local(local_dir)
+        client = self._client_factory()
+        with client.sync(device_id) as sync:
+            remote = _walk_remote(sync, remote_dir)
+
+        pairs = {rel: (file, remote.get(rel)) for rel, file in local.items()}
+        unchanged = self._unchanged(client, device_id, pairs)
+        changed = sorted(rel for rel in local if rel not in unchanged)
+        result = SyncResult(skipped=len(unchanged))
+
+        def send_files(sync: SyncConnection, names: list[str]) -> None:
+            in_flight: list[str] = []
+            for rel in names:
+                file = local[rel]
+                path = posixpath.join(remote_dir, rel)
+                with open(file.path, "rb") as f:
+                    sync.send(path, f, file.mode, file.mtime)
+                in_flight.append(path)
+                if len(in_flight) >= self.ack_window:
+                    sync.read_ack(in_flight.pop(0))
+            for path in in_flight:
+                sync.read_ack(path)
+
+        jobs = _balance([(rel, local[rel].size) for rel in changed], self.workers)
+        self._parallel(device_id, jobs, send_files)
+
+        manifest = self.manifest(device_id)
+        for rel in changed:
+            file = local[rel]
+            digest = self._local_hashes.get((file.path, file.size, file.mtime))
+            path = posixpath.join(remote_dir, rel)
+            if digest:
+                manifest[path] = [file.size, file.mtime, digest]
+            else:
+                manifest.pop(path, None)
+        self._save_manifest(device_id)
+
+        result.transferred = changed
+        result.bytes = sum(local[rel].size for rel in changed)
+        result.seconds = time.monotonic() - start
+        logger.info(
+            f"push_dir {local_dir} -> {device_id}:{remote_dir}: "
+            f"{len(changed)} sent, {result.skipped} unchanged in {result.seconds:.2f}s"
+        )
+        return result
+
+    def pull_dir(self, device_id: str, remote_dir: str, local_dir: str) -> SyncResult:
+        """Make local_dir contain the files of remote_dir on the device.
+
+        Files only present locally are left alone.
+
+        Args:
+            device_id: The device identifier
+            remote_dir: Device source directory
+            local_dir: Local destination directory (created if missing)
+
+        Returns:
+            SyncResult with the files transferred and skipped
+
+        Raises:
+            ToolExecutionError: If a file could not be read from the device
+        """
+        start = time.monotonic()
+        os.makedirs(local_dir, exist_ok=True)
+        local = _walk_local(local_dir)
+        client = self._client_factory()
+        with client.sync(device_id) as sync:
+            remote = _walk_remote(sync, remote_dir)
+
+        pairs = {rel: (local[rel], entry) for rel, entry in remote.items() if rel in local}
+        unchanged = self._unchanged(client, device_id, pairs)
+        changed = sorted(rel for rel in remote if rel not in unchanged)
+        result = SyncResult(skipped=len(unchanged))
+
+        def recv_files(sync: SyncConnection, names: list[str]) -> None:
+            for rel in names:
+                entry = remote[rel]
+                path = os.path.join(local_dir, *rel.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.sync-tmp"
+                with open(tmp, "wb") as f:
+                    sync.recv(entry.name, f)
+                os.replace(tmp, path)
+                os.utime(path, (entry.mtime, entry.mtime))
+
+        jobs = _balance([(rel, remote[rel].size) for rel in changed], self.workers)
+        self._parallel(device_id, jobs, recv_files)
+        self._save_manifest(device_id)
+
+        result.transferred = changed
+        result.bytes = sum(remote[rel].size for rel in changed)
+        result.seconds = time.monotonic() - start
+        logger.info(
+            f"pull_dir {device_id}:{remote_dir} -> {local_dir}: "
+            f"{len(changed)} received, {result.skipped} unchanged in {result.seconds:.2f}s"
+        )
+        return result
@@ -1,43 +1,435 @@
 """Screen capture and visual analysis tools.
 
-This module is reserved for future implementation of vision capabilities
-for analyzing Android device screenshots.
+Common targets such as system dialogs, permission prompts and keyboard keys
+look the same on every run, so they are first searched for locally:
+`TemplateMatcher` runs multi-scale normalized cross-correlation (NCC) of a
+library of template images against the raw screen, and caches the result
+per screen hash. Only when nothing known is found would a screen go to the
+vision model, which is reserved for Phase 4.
 
-This will be implemented in Phase 4 of the project.
+Template matching needs NumPy (`pip install deepglm[vision]`).
 """
 
+import hashlib
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
 
+from deepglm.config import settings
+from deepglm.exceptions import ToolExecutionError
+from deepglm.tools import adb
 
-# Type aliases for future implementation
+try:
+    import numpy as np
+
+    _HAS_NUMPY = True
+except ImportError:  # optional: installed with the "vision" extra
+    _HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+# ITU-R BT.601 luma weights for RGB -> grayscale
+_LUMA = (0.299, 0.587, 0.114)
+
+
+@dataclass
+class UIElement:
+    """A UI element located on the screen.
+
+    Attributes:
+        label: Element name (a template label such as "dialogs/allow")
+        bounds: Box as (left, top, right, bottom) in screen pixels
+        confidence: Match score in [0, 1]
+        source: What found the element ("template" or "model")
+    """
+
+    label: str
+    bounds: tuple[int, int, int, int]
+    confidence: float
+    source: str = "template"
+
+    @property
+    def center(self) -> tuple[int, int]:
+        """Tap point in the middle of the box."""
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+
+@dataclass
 class AnalysisResult:
     """Result of visual screen analysis.
 
-    Attributes will include:
+    Attributes:
         summary: Text description of screen content
-        elements: List of detected UI elements
+        elements: Detected UI elements
         confidence: Confidence score of the analysis
         suggestions: Suggested next actions based on screen state
     """
 
-    pass
+    summary: str
+    elements: list[UIElement] = field(default_factory=list)
+    confidence: float = 0.0
+    suggestions: list[str] = field(default_factory=list)
+
+
+def _require_numpy() -> None:
+    if not _HAS_NUMPY:
+        raise ToolExecutionError(
+            "Template matching needs NumPy; install it with `pip install deepglm[vision]`"
+        )
+
+
+# Image helpers
+
+
+def decode_png_gray(data: bytes) -> Any:
+    """Decode an 8-bit PNG into a float grayscale array.
+
+    Meant for small template images; palette and 16-bit PNGs are not
+    supported.
+
+    Returns:
+        numpy array of shape (height, width)
+
+    Raises:
+        ValueError: If the PNG cannot be decoded
+    """
+    _require_numpy()
+    if not data.startswith(b"\x89PNG\r\n\x1a\n"):
+        raise ValueError("not a PNG file")
+    pos = 8
+    header = None
+    idat = []
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        kind = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+    if header is None:
+        raise ValueError("PNG has no IHDR chunk")
+    width, height, depth, color_type, _, _, interlace = header
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color_type)
+    if depth != 8 or channels is None or interlace:
+        raise ValueError(f"unsupported PNG (depth {depth}, color type {color_type})")
+
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8)
+    stride = width * channels
+    rows = raw.reshape(height, stride + 1)
+    pixels = np.zeros((height, stride), dtype=np.int64)
+    previous = np.zeros(stride, dtype=np.int64)
+    for y in range(height):
+        kind, row = rows[y, 0], rows[y, 1:].astype(np.int64)
+        if kind == 1:  # Sub
+            row = np.cumsum(row.reshape(width, channels), axis=0).reshape(stride)
+        elif kind == 2:  # Up
+            row = row + previous
+        elif kind in (3, 4):  # Average, Paeth: each byte depends on its left neighbour
+            out = row.copy()
+            for i in range(stride):
+                left = out[i - channels] & 0xFF if i >= channels else 0
+                up = previous[i]
+                if kind == 3:
+                    out[i] += (left + up) >> 1
+                else:
+                    corner = previous[i - channels] if i >= channels else 0
+                    p = left + up - corner
+                    pa, pb, pc = abs(p - left), abs(p - up), abs(p - corner)
+                    out[i] += left if pa <= pb and pa <= pc else up if pb <= pc else corner
+            row = out
+        previous = row & 0xFF
+        pixels[y] = previous
+
+    image = pixels.reshape(height, width, channels).astype(np.float64)
+    if channels >= 3:
+        return image[..., :3] @ np.array(_LUMA)
+    return image[..., 0]
+
+
+def _rgba_to_gray(width: int, height: int, rgba: bytes) -> Any:
+    pixels = np.frombuffer(rgba, dtype=np.uint8, count=width * height * 4)
+    return pixels.reshape(height, width, 4)[..., :3] @ np.array(_LUMA)
+
+
+def _downsample(image: Any, factor: int) -> Any:
+    """Shrink by an integer factor, averaging each factor x factor block."""
+    if factor == 1:
+        return image
+    height, width = image.shape[0] // factor, image.shape[1] // factor
+    blocks = image[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    return blocks.mean(axis=(1, 3))
+
+
+def _resize(image: Any, height: int, width: int) -> Any:
+    """Nearest-neighbour resize."""
+    rows = (np.arange(height) * image.shape[0] / height).astype(int)
+    cols = (np.arange(width) * image.shape[1] / width).astype(int)
+    return image[rows[:, None], cols]
+
+
+class _Screen:
+    """A grayscale screen prepared for repeated NCC against templates."""
+
+    def __init__(self, image: Any) -> None:
+        self.image = image
+        self.shape = image.shape
+        self.spectrum = np.fft.rfft2(image)
+        # Integral images (with a zero border) for window sums and sums of squares
+        self.sums = np.pad(image.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self.squares = np.pad((image * image).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+
+    def _window(self, integral: Any, height: int, width: int) -> Any:
+        return (
+            integral[height:, width:]
+            - integral[:-height, width:]
+            - integral[height:, :-width]
+            + integral[:-height, :-width]
+        )
+
+    def spectrum_of(self, template: Any) -> tuple[Any, float] | None:
+        """FFT of the zero-mean template padded to the screen, and its norm.
+
+        Returns:
+            None if the template is flat or larger than the screen
+        """
+        if template.shape[0] > self.shape[0] or template.shape[1] > self.shape[1]:
+            return None
+        centered = template - template.mean()
+        norm = float(np.sqrt((centered * centered).sum()))
+        if norm < 1e-6:
+            return None
+        return np.conj(np.fft.rfft2(centered, s=self.shape)), norm
+
+    def ncc(self, spectrum: Any, norm: float, height: int, width: int) -> Any:
+        """NCC score of a template at every position where it fits.
+
+        Args:
+            spectrum: Template spectrum from spectrum_of()
+            norm: Template norm from spectrum_of()
+            height: Template height
+            width: Template width
+
+        Returns:
+            Array of shape (H - height + 1, W - width + 1)
+        """
+        correlation = np.fft.irfft2(self.spectrum * spectrum, s=self.shape)
+        correlation = correlation[: self.shape[0] - height + 1, : self.shape[1] - width + 1]
+        count = height * width
+        sums = self._window(self.sums, height, width)
+        variance = self._window(self.squares, height, width) - sums * sums / count
+        denominator = np.sqrt(np.maximum(variance, 0)) * norm
+        return np.where(denominator > 1e-6, correlation / np.maximum(denominator, 1e-6), 0.0)
+
+
+# Template matching
+
+
+@dataclass
+class Template:
+    """A reference image of a UI element.
+
+    Attributes:
+        label: Element name reported for matches
+        image: Grayscale pixels at device resolution (numpy array)
+        threshold: Minimum NCC score for a match
+    """
+
+    label: str
+    image: Any
+    threshold: float = 0.85
+
+
+class TemplateMatcher:
+    """Find known UI elements on a screen without a vision model.
+
+    Each template is correlated with a downsampled grayscale screen at
+    several scales; peaks above the template's threshold become elements.
+    Results are cached per screen hash, so looking at an unchanged screen
+    again costs only the hash.
+
+    Args:
+        templates: Initial templates
+        scales: Template scale factors to try (covers density differences)
+        downscale: Integer factor the screen and templates are shrunk by
+            before matching; larger is faster but less precise
+        max_matches: Maximum matches reported per template
+        cache_size: Number of screens whose results are kept
+
+    Example:
+        >>> matcher = TemplateMatcher.from_directory("templates")
+        >>> matcher.match(1080, 2400, rgba)
+        [UIElement(label='permissions/allow', bounds=(540, 1480, 860, 1600), ...)]
+    """
+
+    def __init__(
+        self,
+        templates: Iterable[Template] = (),
+        scales: Iterable[float] = (0.8, 0.9, 1.0, 1.1, 1.25),
+        downscale: int = 4,
+        max_matches: int = 5,
+        cache_size: int = 64,
+    ) -> None:
+        _require_numpy()
+        self.templates = list(templates)
+        self.scales = tuple(scales)
+        self.downscale = downscale
+        self.max_matches = max_matches
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self._cache: OrderedDict[str, list[UIElement]] = OrderedDict()
+        # (template index, scale, screen shape) -> template spectrum and norm
+        self._spectra: dict[tuple[int, float, tuple[int, int]], tuple[Any, float] | None] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs: Any) -> "TemplateMatcher":
+        """Load every PNG under a directory as a template.
+
+        Labels are the file paths relative to the directory without the
+        extension, e.g. "permissions/allow" for permissions/allow.png.
+        """
+        matcher = cls(**kwargs)
+        if not os.path.isdir(directory):
+            return matcher
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if not name.lower().endswith(".png"):
+                    continue
+                path = os.path.join(root, name)
+                label = os.path.splitext(os.path.relpath(path, directory))[0]
+                try:
+                    with open(path, "rb") as f:
+                        matcher.add(label.replace(os.sep, "/"), decode_png_gray(f.read()))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping template {path}: {e}")
+        logger.info(f"Loaded {len(matcher.templates)} templates from {directory}")
+        return matcher
+
+    def add(self, label: str, image: Any, threshold: float = 0.85) -> None:
+        """Add a template (grayscale array at device resolution)."""
+        with self._lock:
+            self.templates.append(Template(label, np.asarray(image, dtype=np.float64), threshold))
+            self._cache.clear()
+
+    def match(self, width: int, height: int, rgba: bytes) -> list[UIElement]:
+        """Find template matches on a raw RGBA screen.
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            rgba: width * height * 4 bytes of pixels
+
+        Returns:
+            Elements found, best match first
+        """
+        key = hashlib.sha256(rgba).hexdigest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return list(self._cache[key])
+            templates = list(self.templates)
+
+        screen = _Screen(_downsample(_rgba_to_gray(width, height, rgba), self.downscale))
+        elements = []
+        for index, template in enumerate(templates):
+            elements.extend(self._match_template(screen, index, template))
+        elements.sort(key=lambda element: element.confidence, reverse=True)
+
+        with self._lock:
+            self._cache[key] = elements
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(elements)
+
+    def _match_template(
+        self, screen: _Screen, index: int, template: Template
+    ) -> list[UIElement]:
+        factor = self.downscale
+        candidates: list[tuple[float, int, int, int, int]] = []
+        for scale in self.scales:
+            height = round(template.image.shape[0] * scale / factor)
+            width = round(template.image.shape[1] * scale / factor)
+            if height < 4 or width < 4:
+                continue
+            # Template spectra only depend on the screen size, so reuse them
+            key = (index, scale, screen.shape)
+            with self._lock:
+                cached = key in self._spectra
+                spectrum = self._spectra.get(key)
+            if not cached:
+                spectrum = screen.spectrum_of(_resize(template.image, height, width))
+                with self._lock:
+                    spectrum = self._spectra.setdefault(key, spectrum)
+            if spectrum is None:
+                continue
+            template_spectrum, norm = spectrum
+            scores = screen.ncc(template_spectrum, norm, height, width)
+            # Take peaks greedily, blanking the area around each one
+            for _ in range(self.max_matches):
+                y, x = (int(i) for i in np.unravel_index(np.argmax(scores), scores.shape))
+                score = float(scores[y, x])
+                if score < template.threshold:
+                    break
+                candidates.append((score, x, y, width, height))
+                scores[max(0, y - height // 2):y + height // 2 + 1,
+                       max(0, x - width // 2):x + width // 2 + 1] = -1.0
+
+        # Keep the best scale where matches from different scales overlap
+        kept: list[tuple[float, int, int, int, int]] = []
+        for candidate in sorted(candidates, reverse=True):
+            _, x, y, width, height = candidate
+            if all(abs(x - kx) * 2 >= kw or abs(y - ky) * 2 >= kh for _, kx, ky, kw, kh in kept):
+                kept.append(candidate)
+        return [
+            UIElement(
+                label=template.label,
+                bounds=(x * factor, y * factor, (x + width) * factor, (y + height) * factor),
+                confidence=round(min(score, 1.0), 3),
+            )
+            for score, x, y, width, height in kept[: self.max_matches]
+        ]
+
+
+_matcher: TemplateMatcher | None = None
+_matcher_lock = threading.Lock()
+
+
+def get_template_matcher() -> TemplateMatcher:
+    """Shared matcher with the templates from settings.TEMPLATE_DIR."""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = TemplateMatcher.from_directory(settings.TEMPLATE_DIR)
+        return _matcher
 
 
 def capture_and_analyze(
     device_id: str,
     analysis_prompt: str,
-    save_path: str | None = None,
     model: str | None = None,
 ) -> AnalysisResult:
-    """Capture screen and analyze using vision model.
+    """Capture screen and analyze it, locally first and with a vision model otherwise.
 
-    This function will capture a screenshot from the device and analyze
-    it using a dedicated vision model to understand the current screen state.
+    The first stage matches the screen against the template library (see
+    detect_ui_elements). If known elements are found they are returned
+    without a model call; the analysis prompt is only needed by the model.
+    Until the vision model stage exists, a screen without known elements
+    gives a result with no elements and zero confidence.
 
     Args:
         device_id: The device identifier (e.g., "emulator-5554")
         analysis_prompt: Specific question or task for the vision model
             (e.g., "What buttons are visible?", "Is the login form displayed?")
-        save_path: Optional path to save the screenshot locally
         model: Optional vision model identifier (defaults to settings.VISION_MODEL)
 
     Returns:
@@ -47,50 +439,65 @@ def capture_and_analyze(
         - Confidence scores
         - Suggested actions
 
-    Raises:
-        NotImplementedError: This function is not yet implemented (Phase 4)
-
     Future Implementation (Phase 4):
         1. Capture screenshot using ADB
-        2. Save to local path if provided
+        2. Keep the frame in the screenshot store (adb.screenshot_store)
         3. Load vision model (separate from main LLM)
         4. Send image + analysis_prompt to vision model
         5. Parse and structure the response
         6. Return AnalysisResult object
 
-    Example Usage (when implemented):
+    Example Usage:
         >>> result = capture_and_analyze(
         ...     "emulator-5554",
         ...     "What actions can I take on this screen?"
         ... )
         >>> print(result.summary)
-        "The screen shows a login form with email and password fields,
-        and a 'Sign In' button at the bottom."
+        "Found permissions/allow at (700, 1540)"
     """
-    raise NotImplementedError(
-        "capture_and_analyze() is not yet implemented. "
-        "This will be implemented in Phase 4 with vision model integration."
+    if not _HAS_NUMPY:
+        summary = "Template matching is unavailable (NumPy is not installed)."
+    else:
+        elements = detect_ui_elements(device_id)
+        if elements:
+            found = ", ".join(f"{e.label} at {e.center}" for e in elements)
+            return AnalysisResult(
+                summary=f"Found {found}",
+                elements=elements,
+                confidence=max(e.confidence for e in elements),
+            )
+        summary = "No known UI elements found on the screen."
+    return AnalysisResult(
+        summary=summary,
+        suggestions=["Use dump_ui_hierarchy or capture_screen to inspect the screen"],
     )
 
 
-# Additional vision-related functions reserved for future implementation
-
-
-def detect_ui_elements(device_id: str, element_type: str | None = None):
-    """Detect specific UI elements on the screen.
+def detect_ui_elements(device_id: str, element_type: str | None = None) -> list[UIElement]:
+    """Detect known UI elements on the screen with local template matching.
 
     Args:
         device_id: The device identifier
-        element_type: Optional filter for specific element types
-            (e.g., "button", "text_field", "image")
+        element_type: Optional filter on template labels (e.g. "permissions"
+            matches "permissions/allow")
+
+    Returns:
+        Elements found, best match first
 
     Raises:
-        NotImplementedError: Not yet implemented (Phase 4)
+        ToolExecutionError: If NumPy is not installed
     """
-    raise NotImplementedError(
-        "detect_ui_elements() is not yet implemented. "
-        "This will be implemented in Phase 4 with vision model integration."
-    )
+    _require_numpy()
+    matcher = get_template_matcher()
+    if not matcher.templates:
+        return []
+    elements = matcher.match(*adb._capture_raw_screen(device_id))
+    if element_type:
+        elements = [e for e in elements if element_type in e.label]
+    return elements
+
+
+# Additional vision-related functions reserved for future implementation
 
 
 def compare_screenshots(image_path1: str, image_path2: str) -> bool:
@@ -5,16 +5,22 @@ the DeepGLM Android automation agent.
 
 Usage:
     python main.py "your task description"
+    python main.py --resume <thread_id> ["follow-up message"]
 
 Example:
     python main.py "Research the latest Android automation techniques"
 """
 
+import argparse
 import sys
+import uuid
 
-# Import settings to trigger validation
-import deepglm.config.settings  # noqa: F401
+from deepglm.agents.checkpointer import SqliteCheckpointer
 from deepglm.agents.main_agent import create_android_agent
+from deepglm.agents.router import IntentRouter
+
+# Import settings to trigger validation
+from deepglm.config import settings
 
 
 def main():
@@ -22,33 +28,69 @@ def main():
 
     This function:
     1. Validates configuration (via Settings class)
-    2. Gets user query from command line arguments
-    3. Creates the agent with configured tools
-    4. Executes the query and prints results
+    2. Gets the user query (or the thread to resume) from the command line
+    3. Handles trivial commands directly via the fast-path router
+    4. Otherwise creates the agent with configured tools and a SQLite
+       checkpointer, so every step is saved under a thread ID
+    5. Executes the query, or continues the resumed thread from its last
+       completed step, and prints results
     """
-    # Get user query from command line argument
-    if len(sys.argv) > 1:
-        user_query = " ".join(sys.argv[1:])
-    else:
-        print('Usage: python main.py "your task description"')
-        print(
-            'Example: python main.py "What are the latest developments in quantum computing?"'
-        )
+    parser = argparse.ArgumentParser(
+        description="DeepGLM Android automation agent",
+        epilog='Example: python main.py "What are the latest developments in quantum computing?"',
+    )
+    parser.add_argument("query", nargs="*", help="task description")
+    parser.add_argument(
+        "--resume",
+        metavar="THREAD_ID",
+        help="continue an interrupted run from its last completed step",
+    )
+    args = parser.parse_args()
+    user_query = " ".join(args.query)
+    if not user_query and not args.resume:
+        parser.print_usage()
         sys.exit(1)
 
+    # Trivial commands ("go home", "open settings") skip the model entirely
+    if not args.resume:
+        response = IntentRouter().route(user_query)
+        if response is not None:
+            print(response)
+            return
+
     # Create agent using factory function
     # Note: Settings validation happens automatically during import
-    agent = create_android_agent()
+    checkpointer = SqliteCheckpointer(settings.CHECKPOINT_DB)
+    agent = create_android_agent(checkpointer=checkpointer)
+    thread_id = args.resume or uuid.uuid4().hex[:12]
+    config = {"configurable": {"thread_id": thread_id}}
+
+    if args.resume:
+        state = agent.get_state(config)
+        if not state.values:
+            print(f"No saved run with thread ID {thread_id}")
+            sys.exit(1)
+        if not state.next and not user_query:
+            # The run already finished; show its answer again
+            print(state.values["messages"][-1].content)
+            return
+        inputs = {"messages": [{"role": "user", "content": user_query}]} if user_query else None
+    else:
+        print(f"Thread ID: {thread_id}", file=sys.stderr)
+        inputs = {"messages": [{"role": "user", "content": user_query}]}
 
     # Execute user query
     try:
-        result = agent.invoke({"messages": [{"role": "user", "content": user_query}]})
+        result = agent.invoke(inputs, config)
 
         # Print the result
         print(result["messages"][-1].content)
     except Exception as e:
         print(f"Error during execution: {e}")
+        print(f"Resume with: python main.py --resume {thread_id}")
         sys.exit(1)
+    finally:
+        checkpointer.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""Micro-benchmark helpers for the DeepGLM tool layer.
+
+Benchmarks run against the fake adb server, so the numbers are reproducible
+and do not need a device. Results are collected per test and printed as a
+table at the end of the run. Thresholds can be scaled for slower machines
+with the DEEPGLM_BENCH_SCALE environment variable (e.g. "2.0").
+
+The default test run deselects them; run them with `pytest -m benchmark`.
+"""
+
+import gc
+import os
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pytest
+
+_results: list["BenchResult"] = []
+
+
+@dataclass
+class BenchResult:
+    """Timing and allocation statistics for one benchmark.
+
+    Attributes:
+        name: Benchmark name
+        iterations: Number of timed calls
+        ops_per_sec: Calls per second over the timed run
+        p50_ms: Median call latency in milliseconds
+        p99_ms: 99th percentile call latency in milliseconds
+        peak_kib: Peak traced memory of a single call in KiB
+    """
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_kib: float
+
+
+def threshold_scale() -> float:
+    """Multiplier applied to latency thresholds."""
+    return float(os.environ.get("DEEPGLM_BENCH_SCALE", "1.0"))
+
+
+def run_benchmark(
+    name: str,
+    fn: Callable[[], object],
+    max_p99_ms: float | None = None,
+    max_peak_kib: float | None = None,
+    iterations: int = 50,
+    warmup: int = 3,
+) -> BenchResult:
+    """Time `fn`, measure the peak memory of one call and check thresholds.
+
+    Allocation tracing slows code down, so it runs on a separate call after
+    the timed loop. The latency threshold is scaled by threshold_scale().
+    """
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ordered = sorted(samples)
+    result = BenchResult(
+        name=name,
+        iterations=iterations,
+        ops_per_sec=iterations / elapsed,
+        p50_ms=statistics.median(ordered) * 1000,
+        p99_ms=ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000,
+        peak_kib=peak / 1024,
+    )
+    _results.append(result)
+    if max_p99_ms is not None:
+        assert result.p99_ms <= max_p99_ms * threshold_scale(), f"p99 regression: {result}"
+    if max_peak_kib is not None:
+        assert result.peak_kib <= max_peak_kib, f"allocation regression: {result}"
+    return result
+
+
+@pytest.fixture
+def benchmark() -> Callable[..., BenchResult]:
+    """Provide run_benchmark to tests."""
+    return run_benchmark
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """Print a table of benchmark results."""
+    if not _results:
+        return
+    terminalreporter.section("deepglm benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<28}{'ops/sec':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>11}"
+    )
+    for r in _results:
+        terminalreporter.write_line(
+            f"{r.name:<28}{r.ops_per_sec:>10.1f}{r.p50_ms:>10.2f}{r.p99_ms:>10.2f}{r.peak_kib:>11.1f}"
+        )
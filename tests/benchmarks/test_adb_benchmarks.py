@@ -0,0 +1,62 @@
+"""Benchmarks for the adb tool hot paths against the fake adb server."""
+
+import pytest
+
+# name: (max p99 latency in ms, max peak memory per call in KiB)
+THRESHOLDS = {
+    "tap": (25.0, 128.0),
+    "swipe": (25.0, 128.0),
+    "capture_screen": (60.0, 512.0),
+    "list_packages": (25.0, 256.0),
+    "get_device_info": (25.0, 128.0),
+}
+
+DEVICE = "emulator-5554"
+
+
+@pytest.fixture
+def bench(benchmark, fake_adb):
+    """Run a named benchmark against the fake device with its thresholds."""
+
+    def run(name, fn):
+        max_p99_ms, max_peak_kib = THRESHOLDS[name]
+        return benchmark(name, fn, max_p99_ms=max_p99_ms, max_peak_kib=max_peak_kib)
+
+    return run
+
+
+@pytest.mark.benchmark
+def test_tap(bench):
+    from deepglm.tools import adb
+
+    bench("tap", lambda: adb.tap(DEVICE, 540, 1200))
+
+
+@pytest.mark.benchmark
+def test_swipe(bench):
+    from deepglm.tools import adb
+
+    bench("swipe", lambda: adb.swipe(DEVICE, 540, 1800, 540, 600, 100))
+
+
+@pytest.mark.benchmark
+def test_capture_screen(bench, monkeypatch, tmp_path):
+    from deepglm.tools import adb
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    monkeypatch.setattr(adb, "screenshot_store", ScreenshotStore(str(tmp_path)))
+    bench("capture_screen", lambda: adb.capture_screen(DEVICE))
+
+
+@pytest.mark.benchmark
+def test_list_packages(bench):
+    from deepglm.tools import adb
+
+    bench("list_packages", lambda: adb.list_packages(DEVICE))
+
+
+@pytest.mark.benchmark
+def test_get_device_info(bench):
+    from deepglm.tools import adb
+
+    bench("get_device_info", lambda: adb.get_device_info(DEVICE))
@@ -38,3 +38,17 @@ def add_project_to_path(project_root: Path) -> Generator[None, None, None]:
     yield
     if str(project_root) in sys.path:
         sys.path.remove(str(project_root))
+
+
+@pytest.fixture
+def fake_adb(monkeypatch: pytest.MonkeyPatch) -> Generator:
+    """Run a fake adb server with one device and point the adb tools at it."""
+    from deepglm.config import settings
+    from deepglm.testing import FakeAdbServer, FakeDevice
+    from deepglm.tools import adb
+
+    with FakeAdbServer([FakeDevice("emulator-5554")]) as server:
+        monkeypatch.setattr(settings, "ADB_SERVER_PORT", server.port)
+        yield server
+        # Device actions open logcat streams; close them with the server
+        adb.logcat_monitor.stop()
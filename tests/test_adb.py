@@ -0,0 +1,245 @@
+"""Test ADB tool wrappers with the device transport stubbed out."""
+
+import pytest
+
+
+@pytest.fixture
+def adb(monkeypatch):
+    """Import the adb module with shell commands recorded instead of sent."""
+    from deepglm.tools import adb
+
+    commands = []
+
+    def fake_shell(device_id, command):
+        commands.append(command)
+        if command.startswith("dumpsys"):
+            return ""
+        return ":0\n"
+
+    monkeypatch.setattr(adb, "_shell", fake_shell)
+    monkeypatch.setattr(adb, "commands", commands, raising=False)
+    return adb
+
+
+def test_tap_sends_input_command(adb):
+    """Test that tap issues a single input tap command."""
+    assert adb.tap("emulator-5554", 100, 200) is True
+    assert adb.commands == ["input tap 100 200; echo :$?"]
+
+
+def test_input_text_escapes_spaces_and_specials(adb):
+    """Test that input_text escapes spaces and shell metacharacters."""
+    adb.input_text("emulator-5554", "a b&c")
+    assert adb.commands[0].startswith("input text a%sb\\&c;")
+
+
+def test_failed_action_returns_false(adb, monkeypatch):
+    """Test that a non-zero exit status is reported as failure."""
+    monkeypatch.setattr(adb, "_shell", lambda device_id, command: "error\n:1\n")
+    assert adb.press_key("emulator-5554", "KEYCODE_BACK") is False
+
+
+def test_key_code_and_package_name_are_validated(adb):
+    """Test that shell metacharacters in model-supplied names are rejected."""
+    from deepglm.exceptions import ToolExecutionError
+
+    with pytest.raises(ToolExecutionError, match="key code"):
+        adb.press_key("emulator-5554", "KEYCODE_BACK; rm -rf /sdcard/x")
+    with pytest.raises(ToolExecutionError, match="package name"):
+        adb.launch_app("emulator-5554", "com.example.app; reboot")
+    assert adb.commands == []
+    assert adb.press_key("emulator-5554", "4") is True
+
+
+def test_parse_ui_state():
+    """Test parsing of the resumed activity and animation flags."""
+    from deepglm.tools.adb import _parse_ui_state
+
+    output = (
+        "  topResumedActivity=ActivityRecord{1a2b u0 com.android.settings/.Settings t12}\n"
+        "--\n"
+        "    mAppTransitionState=APP_STATE_IDLE\n"
+    )
+    assert _parse_ui_state(output) == ("com.android.settings/.Settings", False)
+    assert _parse_ui_state("--\nmAppTransitionState=APP_STATE_RUNNING") == (None, True)
+
+
+def test_frame_diff():
+    """Test frame difference estimation."""
+    from deepglm.tools.adb import _frame_diff
+
+    frame = bytes(4000)
+    assert _frame_diff(frame, frame) == 0.0
+    assert _frame_diff(frame, bytes([255]) * 4000) == 1.0
+    assert _frame_diff(frame, bytes(10)) == 1.0
+
+
+def test_wait_until_times_out():
+    """Test that wait_until returns False when the condition never holds."""
+    from deepglm.tools.adb import wait_until
+
+    assert wait_until(lambda: False, timeout=0.05, interval=0.01) is False
+    assert wait_until(lambda: True, timeout=0.05) is True
+
+
+def test_wait_for_idle_waits_for_stable_frames(adb, monkeypatch):
+    """Test that wait_for_idle returns once frames stop changing."""
+    frames = iter([b"\x01" * 64, b"\x02" * 64, b"\x03" * 64] + [b"\x04" * 64] * 10)
+    monkeypatch.setattr(adb, "_capture_raw_frame", lambda device_id: next(frames))
+    monkeypatch.setattr(adb.time, "sleep", lambda seconds: None)
+
+    assert adb.wait_for_idle("emulator-5554", timeout=5.0) is True
+    # Four distinct frames, then two converged polls on the last one
+    assert len(adb.commands) == 6
+
+
+def test_wait_for_idle_requires_target_package(adb, monkeypatch):
+    """Test that wait_for_idle does not settle on another app's activity."""
+    monkeypatch.setattr(adb, "_capture_raw_frame", lambda device_id: b"\x00" * 64)
+    assert adb.wait_for_idle(
+        "emulator-5554", timeout=0.1, package_name="com.example.app"
+    ) is False
+
+
+def test_get_device_info_parses_getprop(monkeypatch):
+    """Test that device info is read from a single getprop call."""
+    from deepglm.tools import adb
+
+    output = (
+        "[ro.build.version.release]: [14]\n"
+        "[ro.build.version.sdk]: [34]\n"
+        "[ro.product.manufacturer]: [Google]\n"
+        "[ro.product.model]: [Pixel 8]\n"
+    )
+    monkeypatch.setattr(adb, "_shell", lambda device_id, command: output)
+    info = adb.get_device_info("emulator-5554")
+    assert info == adb.DeviceInfo("emulator-5554", "Pixel 8", "Google", "14", 34)
+
+
+def test_list_packages_and_battery_level(monkeypatch):
+    """Test parsing of pm list packages and dumpsys battery output."""
+    from deepglm.tools import adb
+
+    outputs = {
+        "pm list packages": "package:com.android.settings\npackage:com.example.app\n",
+        "dumpsys battery": "Current Battery Service state:\n  AC powered: false\n  level: 87\n",
+    }
+    monkeypatch.setattr(adb, "_shell", lambda device_id, command: outputs[command])
+    assert adb.list_packages("emulator-5554") == ["com.android.settings", "com.example.app"]
+    assert adb.get_battery_level("emulator-5554") == 87
+
+
+def test_tools_against_fake_adb_server(fake_adb, monkeypatch, tmp_path):
+    """Test the adb tools end to end over the host protocol."""
+    from deepglm.tools import adb
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    store = ScreenshotStore(str(tmp_path / "screenshots"))
+    monkeypatch.setattr(adb, "screenshot_store", store)
+
+    assert adb.get_devices() == ["emulator-5554"]
+    assert adb.launch_app("emulator-5554", "com.android.settings", wait_idle=True) is True
+    assert adb.get_focused_activity("emulator-5554") == "com.android.settings/.MainActivity"
+    assert adb.launch_app("emulator-5554", "com.missing.app") is False
+
+    path = adb.capture_screen("emulator-5554")
+    assert path.startswith(str(tmp_path / "screenshots"))
+    with open(path, "rb") as f:
+        assert f.read(4) == b"\x89PNG"
+    assert adb.dump_ui_hierarchy("emulator-5554").endswith("</hierarchy>")
+
+
+def test_input_text_uses_ime_for_unicode_and_long_text(fake_adb, monkeypatch):
+    """Test that unicode and long text go through ADBKeyBoard and the keyboard is restored."""
+    from deepglm.tools import adb
+
+    monkeypatch.setattr(adb, "_text_ime_installed", {})
+    device = fake_adb.devices["emulator-5554"]
+    device.input_methods.append("com.android.adbkeyboard/.AdbIME")
+    keyboard = device.current_ime
+
+    name = "王小明, 12 Rue de l'Église"
+    assert adb.input_text("emulator-5554", name) is True
+    assert device.typed == [name]
+    assert device.current_ime == keyboard
+    assert device.commands[-1] == f"ime set {keyboard}; echo :$?"
+
+    # The user switched keyboards in between: the new one is restored
+    device.input_methods.append("com.example.keyboard/.Ime")
+    device.current_ime = "com.example.keyboard/.Ime"
+    device.commands.clear()
+    address = "1600 Amphitheatre Parkway, Mountain View, CA 94043 " * 40
+    assert adb.input_text("emulator-5554", address) is True
+    assert "".join(device.typed[1:]) == address
+    assert sum("ADB_INPUT_B64" in command for command in device.commands) == 1
+    assert device.current_ime == "com.example.keyboard/.Ime"
+
+
+def test_input_text_chunks_long_ascii_without_ime(fake_adb, monkeypatch):
+    """Test that long text falls back to chunked input text calls."""
+    from deepglm.exceptions import ToolExecutionError
+    from deepglm.tools import adb
+
+    monkeypatch.setattr(adb, "_text_ime_installed", {})
+    device = fake_adb.devices["emulator-5554"]
+
+    text = "it's a (long) & winding road; " * 40
+    assert adb.input_text("emulator-5554", text) is True
+    assert "".join(device.typed) == text
+    assert len(device.typed) > 1
+    # One IME lookup, then the chunks batched into a few shell calls
+    assert len(device.commands) < len(device.typed)
+
+    with pytest.raises(ToolExecutionError, match="ADBKeyBoard"):
+        adb.input_text("emulator-5554", "Grüße")
+
+
+def test_scroll_to_finds_row_below_the_fold(fake_adb):
+    """Test that scroll_to swipes down until the row is visible and returns its center."""
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    device.list_rows = 200
+
+    x, y = adb.scroll_to("emulator-5554", "text=Row 60")
+    row = 60 * 150 + 200 - device.scroll_offset
+    assert x == 540 and row <= y < row + 150
+    swipes = [c for c in device.commands if c.startswith("input swipe")]
+    # Steps grow while consecutive views overlap, so far fewer than one per screen
+    assert 0 < len(swipes) < 9000 // 1100
+
+    assert adb.scroll_to("emulator-5554", "text=Row 5", direction="up") is not None
+    assert device.scroll_offset < 5 * 150 + 200
+
+
+def test_scroll_to_keeps_tall_rows_overlapping(fake_adb):
+    """Test that each swipe leaves the tallest row partly in view."""
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    device.list_rows = 30
+    device.list_row_height = 900
+
+    x, y = adb.scroll_to("emulator-5554", "text=Row 20")
+    row = 20 * 900 + 200 - device.scroll_offset
+    assert max(200, row) <= y < row + 900
+    # The list view is 2200px tall; a full 900px row must stay on screen
+    swipes = [c.split()[2:6] for c in device.commands if c.startswith("input swipe")]
+    assert swipes and all(abs(int(y1) - int(y2)) <= 2200 - 900 for _, y1, _, y2 in swipes)
+
+
+def test_scroll_to_stops_at_end_of_list(fake_adb):
+    """Test that scroll_to returns None once swiping no longer changes the list."""
+    from deepglm.exceptions import ToolExecutionError
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    device.list_rows = 40
+
+    assert adb.scroll_to("emulator-5554", "id=title; text=Row 99") is None
+    assert device.scroll_offset == 40 * 150 + 200 - 2400
+    swipes = [c for c in device.commands if c.startswith("input swipe")]
+    assert len(swipes) < 10
+
+    with pytest.raises(ToolExecutionError, match="direction"):
+        adb.scroll_to("emulator-5554", "Row 1", direction="sideways")
@@ -0,0 +1,142 @@
+"""Test durable checkpointing and resume of agent runs."""
+
+import base64
+
+import pytest
+
+
+def test_interrupted_run_resumes_from_last_step(fake_adb, monkeypatch, tmp_path):
+    """Test that a run failing mid-task resumes without redoing finished tools."""
+    from langchain.agents.middleware import AgentMiddleware
+
+    from deepglm.agents import SqliteCheckpointer, create_android_agent
+    from deepglm.config import settings
+    from deepglm.testing import MockOpenAIServer
+
+    class ProviderOutage(AgentMiddleware):
+        """Fail the second model call once, like a provider outage."""
+
+        calls = 0
+
+        def wrap_model_call(self, request, handler):
+            ProviderOutage.calls += 1
+            if ProviderOutage.calls == 2:
+                raise RuntimeError("provider unavailable")
+            return handler(request)
+
+    script = [
+        [{"name": "get_battery_level", "args": {"device_id": "{device_id}"}}],
+        "Battery is at 80%.",
+    ]
+    config = {"configurable": {"thread_id": "task-1"}}
+    db = str(tmp_path / "checkpoints.db")
+    with MockOpenAIServer(script) as server:
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.url)
+        with SqliteCheckpointer(db) as checkpointer:
+            agent = create_android_agent(middleware=[ProviderOutage()], checkpointer=checkpointer)
+            with pytest.raises(RuntimeError):
+                agent.invoke(
+                    {"messages": [{"role": "user", "content": "battery? [device:emulator-5554]"}]},
+                    config,
+                )
+
+        # A new process: fresh checkpointer on the same file
+        with SqliteCheckpointer(db) as checkpointer:
+            agent = create_android_agent(checkpointer=checkpointer)
+            assert agent.get_state(config).next
+            result = agent.invoke(None, config)
+
+    assert result["messages"][-1].content == "Battery is at 80%."
+    commands = fake_adb.devices["emulator-5554"].commands
+    assert len([c for c in commands if c.startswith("dumpsys battery")]) == 1
+
+
+def test_run_interrupted_between_tool_calls_of_one_turn_resumes(fake_adb, monkeypatch, tmp_path):
+    """Test that a turn crashing after its first action resumes with only the rest."""
+    from langchain.agents.middleware import AgentMiddleware
+
+    from deepglm.agents import SqliteCheckpointer, create_android_agent
+    from deepglm.config import settings
+    from deepglm.testing import MockOpenAIServer
+
+    class Crash(AgentMiddleware):
+        """Fail the second tap once, like the process dying mid-turn."""
+
+        crashed = False
+
+        def wrap_tool_call(self, request, handler):
+            if request.tool_call["args"].get("x") == 2 and not Crash.crashed:
+                Crash.crashed = True
+                raise RuntimeError("process killed")
+            return handler(request)
+
+    script = [
+        [
+            {"name": "tap", "args": {"device_id": "{device_id}", "x": 1, "y": 1}},
+            {"name": "tap", "args": {"device_id": "{device_id}", "x": 2, "y": 2}},
+        ],
+        "Tapped twice.",
+    ]
+    config = {"configurable": {"thread_id": "task-2"}}
+    db = str(tmp_path / "checkpoints.db")
+    with MockOpenAIServer(script) as server:
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.url)
+        with SqliteCheckpointer(db) as checkpointer:
+            agent = create_android_agent(middleware=[Crash()], checkpointer=checkpointer)
+            with pytest.raises(RuntimeError):
+                agent.invoke(
+                    {"messages": [{"role": "user", "content": "tap [device:emulator-5554]"}]},
+                    config,
+                )
+
+        with SqliteCheckpointer(db) as checkpointer:
+            agent = create_android_agent(checkpointer=checkpointer)
+            result = agent.invoke(None, config)
+
+    assert result["messages"][-1].content == "Tapped twice."
+    taps = [c for c in fake_adb.devices["emulator-5554"].commands if c.startswith("input tap")]
+    assert [t.split(";")[0] for t in taps] == ["input tap 1 1", "input tap 2 2"]
+
+
+def test_screenshots_are_stored_once_out_of_line(tmp_path):
+    """Test that large image payloads are deduplicated by hash and restored."""
+    from langchain_core.messages import HumanMessage
+    from langgraph.checkpoint.base import empty_checkpoint
+
+    from deepglm.agents import SqliteCheckpointer
+
+    image = "data:image/png;base64," + base64.b64encode(bytes(range(256)) * 512).decode()
+    message = HumanMessage(
+        content=[
+            {"type": "text", "text": "screen"},
+            {"type": "image_url", "image_url": {"url": image}},
+        ]
+    )
+    checkpointer = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    for _ in range(2):
+        checkpoint = empty_checkpoint()
+        version = checkpointer.get_next_version(None, None)
+        checkpoint["channel_values"] = {"messages": [message, message]}
+        checkpoint["channel_versions"] = {"messages": version}
+        config = checkpointer.put(config, checkpoint, {}, {"messages": version})
+
+    restored = checkpointer.get_tuple({"configurable": {"thread_id": "t"}})
+    assert restored.checkpoint["channel_values"]["messages"] == [message, message]
+    conn = checkpointer._conn
+    assert conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0] == 1
+    stored = conn.execute("SELECT MAX(LENGTH(value)) FROM channel_values").fetchone()[0]
+    assert stored < 1024
+    assert len(list(checkpointer.list({"configurable": {"thread_id": "t"}}))) == 2
+
+    # Payloads go with the last thread that references them
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": [message]}
+    checkpoint["channel_versions"] = {"messages": version}
+    other = {"configurable": {"thread_id": "u", "checkpoint_ns": ""}}
+    checkpointer.put(other, checkpoint, {}, {"messages": version})
+    checkpointer.delete_thread("t")
+    assert conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0] == 1
+    checkpointer.delete_thread("u")
+    assert conn.execute("SELECT COUNT(*) FROM payloads").fetchone()[0] == 0
+    checkpointer.close()
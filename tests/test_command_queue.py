@@ -0,0 +1,189 @@
+"""Test coalescing, throttling and batching in the per-device command queue."""
+
+import re
+import threading
+import time
+
+
+class _Device:
+    """Records service requests; the first one blocks until released."""
+
+    def __init__(self):
+        self.requests = []
+        self.release = threading.Event()
+
+    def shell(self, device_id, command):
+        self.requests.append(("shell", command))
+        if len(self.requests) == 1:
+            self.release.wait(5)
+        output = []
+        # Batches wrap each command in a subshell; echo them as if run directly
+        for part in re.sub(r"\( (.*?)\n\)", r"\1", command, flags=re.S).split("; "):
+            if part.startswith("echo"):
+                output.append(part[5:].replace("$?", "0") + "\n")
+            else:
+                output.append(f"<{part}>")
+        return "".join(output)
+
+    def exec_out(self, device_id, command):
+        self.requests.append(("exec", command))
+        return b"PNG"
+
+
+def _submit(queue, call, *args):
+    """Call the queue from a new thread once the previous call is queued."""
+    results = []
+    submitted = sum(s.submitted for s in queue.stats().values())
+    thread = threading.Thread(target=lambda: results.append(call(*args)))
+    thread.start()
+    while sum(s.submitted for s in queue.stats().values()) == submitted:
+        time.sleep(0.001)
+    return thread, results
+
+
+def test_queue_coalesces_reads_and_key_presses_and_batches():
+    """Test that queued duplicates share results and the rest goes in one request."""
+    from deepglm.tools.command_queue import CommandQueue
+
+    device = _Device()
+    queue = CommandQueue(device.shell, device.exec_out)
+    calls = [
+        (queue.shell, "d1", "input tap 1 2; echo :$?"),
+        (queue.shell, "d1", "getprop ro.build.version.sdk"),
+        (queue.exec_out, "d1", "screencap -p"),
+        (queue.exec_out, "d1", "screencap -p"),
+        (queue.shell, "d1", "getprop ro.build.version.sdk"),
+        (queue.shell, "d1", "input keyevent KEYCODE_BACK; echo :$?"),
+        (queue.shell, "d1", "input keyevent KEYCODE_BACK; echo :$?"),
+        (queue.shell, "d1", "getprop ro.build.version.sdk"),
+    ]
+    pending = [_submit(queue, *calls[0])]
+    while not device.requests:
+        time.sleep(0.001)
+    # The tap is in flight; everything else queues up behind it
+    pending += [_submit(queue, *call) for call in calls[1:]]
+    assert queue.depth("d1") == 5
+    device.release.set()
+    for thread, _ in pending:
+        thread.join()
+
+    results = [result for _, (result,) in pending]
+    assert results[0] == "<input tap 1 2>:0\n"
+    assert results[1] == results[4] == "<getprop ro.build.version.sdk>"
+    assert results[2] == results[3] == b"PNG"
+    assert results[5] == results[6] == "<input keyevent KEYCODE_BACK KEYCODE_BACK>:0\n"
+    # Reads before the key presses went out one by one (the screenshot uses
+    # exec:); the merged key press and the last read share one request
+    assert device.requests[1:3] == [
+        ("shell", "getprop ro.build.version.sdk"),
+        ("exec", "screencap -p"),
+    ]
+    _, joined = device.requests[3]
+    assert joined.startswith("( input keyevent KEYCODE_BACK KEYCODE_BACK; echo :$?\n); echo; echo ")
+    assert joined.count("getprop ro.build.version.sdk") == 1
+    assert results[7] == "<getprop ro.build.version.sdk>"
+
+    stats = queue.stats()["d1"]
+    assert (stats.submitted, stats.coalesced, stats.batches) == (8, 3, 4)
+    assert stats.max_depth == 5 and stats.depth == 0
+
+
+def test_batch_keeps_results_apart_when_a_command_fails():
+    """Test that a failing or exiting command does not cut off the rest of its batch."""
+    from deepglm.testing import FakeDevice
+    from deepglm.tools.command_queue import CommandQueue
+
+    fake = FakeDevice("d1")
+    started, release = threading.Event(), threading.Event()
+
+    def shell(device_id, command):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return fake.run(command).decode()
+
+    queue = CommandQueue(shell, lambda device_id, command: b"")
+    pending = [_submit(queue, queue.shell, "d1", "input tap 1 2; echo :$?")]
+    started.wait(5)
+    # The tap is in flight; the rest goes out as one batch behind it
+    pending += [
+        _submit(queue, queue.shell, "d1", command)
+        for command in ("cd /sdcard/missing; echo :$?", "exit 2", "getprop ro.product.model")
+    ]
+    release.set()
+    for thread, _ in pending:
+        thread.join()
+
+    assert len(fake.commands) == 2
+    assert [result for _, (result,) in pending[1:]] == [
+        "/system/bin/sh: cd: not found\n:127\n",
+        "",
+        "Fake Pixel\n",
+    ]
+
+
+def test_queue_throttles_actions_but_not_reads():
+    """Test that actions are spaced by the rate limit while reads pass at once."""
+    from deepglm.tools.command_queue import CommandQueue
+
+    device = _Device()
+    device.release.set()
+    queue = CommandQueue(device.shell, device.exec_out, max_actions_per_second=20)
+
+    start = time.monotonic()
+    for i in range(5):
+        queue.shell("d1", f"input tap {i} {i}; echo :$?")
+    actions = time.monotonic() - start
+    start = time.monotonic()
+    for _ in range(5):
+        queue.shell("d1", "dumpsys battery")
+    reads = time.monotonic() - start
+
+    # Four 50ms gaps between five taps
+    assert actions >= 0.19
+    assert reads < 0.05
+    assert queue.stats()["d1"].throttled_seconds >= 0.15
+
+
+def test_compound_commands_behind_read_prefixes_are_actions():
+    """Test that chained, piped or redirected commands are never treated as reads."""
+    from deepglm.tools.command_queue import CommandQueue
+
+    queue = CommandQueue(_Device().shell, _Device().exec_out)
+
+    assert queue.is_read("dumpsys battery")
+    for command in (
+        "getprop; input tap 1 1",
+        "ls /sdcard && rm -r /sdcard/x",
+        "cat /sdcard/a | sh",
+        "ls /sdcard > /sdcard/listing",
+        "cat `rm /sdcard/a`",
+        "stat $(input keyevent 3)",
+    ):
+        assert not queue.is_read(command), command
+
+
+def test_adb_tools_share_queued_round_trips(fake_adb):
+    """Test that concurrent tool calls on a slow device share round trips."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    device.latency = 0.1
+    before = adb.command_queue.stats().get("emulator-5554")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        infos = list(executor.map(adb.get_device_info, ["emulator-5554"] * 6))
+        levels = list(executor.map(adb.get_battery_level, ["emulator-5554"] * 6))
+    assert {info.model for info in infos} == {"Fake Pixel"}
+    assert levels == [80] * 6
+    assert len(device.commands) < 12
+
+    device.commands.clear()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        keys = [executor.submit(adb.press_key, "emulator-5554", "KEYCODE_BACK") for _ in range(3)]
+        battery = executor.submit(adb.get_battery_level, "emulator-5554")
+        assert all(key.result() for key in keys) and battery.result() == 80
+    assert len(device.commands) < 4
+    stats = adb.command_queue.stats()["emulator-5554"]
+    assert stats.coalesced > (before.coalesced if before else 0)
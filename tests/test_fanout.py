@@ -0,0 +1,60 @@
+"""Tests for running android-operator agents on several devices in parallel."""
+
+import time
+
+
+def test_fanout_runs_operators_in_parallel_on_bound_devices(monkeypatch):
+    """Each operator acts only on its own device, and runs overlap in time."""
+    from langchain_openai import ChatOpenAI
+
+    from deepglm.agents.subagents import OperatorFanOut, resolve_operator_tools
+    from deepglm.config import settings
+    from deepglm.testing import FakeAdbServer, FakeDevice, MockOpenAIServer
+    from deepglm.tools import adb
+
+    # The model names the wrong device; the binding must override it
+    script = [[{"name": "tap", "args": {"device_id": "emulator-5554", "x": 5, "y": 6}}], "Tapped."]
+    devices = [FakeDevice("emulator-5554"), FakeDevice("emulator-5556"), FakeDevice("R58M")]
+    with FakeAdbServer(devices) as adb_server, MockOpenAIServer(script, latency=0.5) as model_server:
+        monkeypatch.setattr(settings, "ADB_SERVER_PORT", adb_server.port)
+        model = ChatOpenAI(model="mock", api_key="test_key", base_url=model_server.url)
+        fanout = OperatorFanOut(model, resolve_operator_tools(), ["tap", "swipe"])
+        run_on_devices = fanout.as_tool()
+
+        start = time.monotonic()
+        report = run_on_devices("Tap the button", ["emulator-5554", "emulator-5556", "R58M"])
+        elapsed = time.monotonic() - start
+        adb.logcat_monitor.stop()
+
+    # Two model calls per operator: about 1s in parallel, 3s one after another
+    assert elapsed < 2.0
+    assert model_server.requests == 6
+    for device in devices:
+        assert device.commands.count("input tap 5 6; echo :$?") == 1
+        assert f"[{device.serial}] ok in" in report
+    assert report.count("Tapped.") == 3
+
+
+def test_fanout_reports_failed_devices():
+    """A device whose operator raises is reported without failing the others."""
+    from deepglm.agents.subagents import DeviceRun, OperatorFanOut
+
+    class Operator:
+        def __init__(self, device_id):
+            self.device_id = device_id
+
+        def invoke(self, state, config):
+            if self.device_id == "broken":
+                raise RuntimeError("device offline")
+            from langchain_core.messages import AIMessage
+
+            return {"messages": [AIMessage(f"done on {self.device_id}")]}
+
+    fanout = OperatorFanOut(model=None, tools=[], mutating_tools=[])
+    fanout._operator = Operator
+    runs = fanout.run("go", ["a", "broken", "a"])
+
+    assert [(r.device_id, r.status) for r in runs] == [("a", "ok"), ("broken", "error")]
+    assert runs[0].output == "done on a"
+    assert runs[1].output == "RuntimeError: device offline"
+    assert isinstance(runs[0], DeviceRun)
@@ -0,0 +1,37 @@
+"""Test the mock model server and the end-to-end load-test harness."""
+
+
+def test_mock_openai_replays_script():
+    """Test that the mock server fills device IDs and counts steps by history."""
+    from deepglm.testing import MockOpenAIServer
+
+    script = [[{"name": "tap", "args": {"device_id": "{device_id}", "x": 1, "y": 2}}], "done"]
+    with MockOpenAIServer(script) as server:
+        first = server.respond({"messages": [{"role": "user", "content": "go [device:abc]"}]})
+        second = server.respond(
+            {
+                "messages": [
+                    {"role": "user", "content": "go [device:abc]"},
+                    {"role": "assistant", "content": None},
+                    {"role": "tool", "content": "ok"},
+                ]
+            }
+        )
+
+    args = first["tool_calls"][0]["function"]["arguments"]
+    assert args == '{"device_id": "abc", "x": 1, "y": 2}'
+    assert second["content"] == "done" and second["tool_calls"] == []
+
+
+def test_load_test_runs_agent_end_to_end():
+    """Test that the harness drives the real agent against mock backends."""
+    from deepglm.testing.load_test import DEFAULT_SCRIPT, format_reports, run_load_test
+
+    reports = run_load_test(concurrency_levels=(1, 2), tasks_per_level=2, model_latency=0.0)
+
+    assert [r.concurrency for r in reports] == [1, 2]
+    for report in reports:
+        assert report.errors == 0
+        assert report.steps == report.tasks * len(DEFAULT_SCRIPT)
+        assert report.device_ms_per_step > 0
+    assert "overhead ms" in format_reports(reports)
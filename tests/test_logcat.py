@@ -0,0 +1,131 @@
+"""Tests for logcat streaming and the indexed log buffer."""
+
+import struct
+import time
+
+import pytest
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_parse_entry_header_versions():
+    """v1 entries (no header size) and v4 entries (28-byte header) both parse."""
+    from deepglm.tools.logcat import parse_entry
+
+    payload = b"\x06MyTag\0boom\0"
+    v1 = struct.pack("<HHiIII", len(payload), 0, 42, 43, 1700000000, 500000000)
+    assert parse_entry(v1, payload) == (1700000000.5, 42, 43, 6, "MyTag", "boom")
+
+    v4 = struct.pack("<HHiIII", len(payload), 28, 42, 43, 1700000000, 0)
+    assert parse_entry(v4, struct.pack("<II", 0, 10000) + payload)[4:] == ("MyTag", "boom")
+
+
+def test_log_buffer_queries_and_wraparound():
+    """Indexed queries honour all filters and only see entries still in the ring."""
+    from deepglm.tools.logcat import LogBuffer
+
+    buffer = LogBuffer(capacity=10000)
+    for i in range(25000):
+        tag = "Hot" if i % 100 == 0 else "Noise"
+        level = 6 if i % 1000 == 0 else 3
+        buffer.append(float(i), i % 7, 1, level, tag, f"message {i}")
+
+    assert len(buffer) == 10000
+    assert buffer.oldest_seq == 15000
+
+    hot = buffer.query(tag="Hot")
+    assert [e.seq for e in hot] == list(range(15000, 25000, 100))
+    assert hot[1].tag == "Hot" and hot[1].level == "D"
+
+    errors = buffer.query(min_level="E", since=20000)
+    assert [e.message for e in errors] == [f"message {i}" for i in range(20000, 25000, 1000)]
+    assert buffer.query(tag="Hot", pid=0, min_level="E", limit=1)[0].seq == 21000
+    assert buffer.count(contains="message 2499") == 10
+    assert buffer.query(tag="Missing") == []
+
+
+def test_check_logcat_reports_crash_since_last_action(fake_adb):
+    """A crash logged after an action is reported; earlier entries are not."""
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    # Ahead of the host: host times would make stale entries look recent
+    device.clock_offset = 30.0
+    device.log("logged before the stream starts")
+    time.sleep(0.01)  # -T has millisecond resolution
+    adb.logcat_monitor.buffer("emulator-5554")
+
+    device.log("old failure", tag="Other", level=6)
+    assert _wait_for(lambda: adb.check_logcat("emulator-5554").matched == 1)
+
+    assert adb.tap("emulator-5554", 10, 10)
+    device.log("Displayed com.example.app/.MainActivity", tag="ActivityManager")
+    device.log(
+        "FATAL EXCEPTION: main\nProcess: com.example.app, PID: 4242\n"
+        "java.lang.IllegalStateException: boom",
+        tag="AndroidRuntime",
+        level=6,
+        pid=4242,
+    )
+    assert _wait_for(lambda: adb.check_logcat("emulator-5554").crashes)
+
+    report = adb.check_logcat("emulator-5554", package_name="com.example.app")
+    assert report.crashes == ["crash in com.example.app: FATAL EXCEPTION: main"]
+    assert report.matched == 1
+    assert "E/AndroidRuntime(4242): FATAL EXCEPTION" in report.entries[0]
+
+    assert adb.check_logcat("emulator-5554", package_name="com.other").crashes == []
+    assert adb.check_logcat("emulator-5554", min_level="I", tag="ActivityManager").matched == 1
+    everything = adb.check_logcat("emulator-5554", min_level="V", since_last_action=False)
+    assert everything.matched == 3
+
+
+def test_stream_starts_on_first_check_and_replays_since_action(fake_adb):
+    """Actions only record a time; the first check still sees what they caused."""
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    # Behind the host: host times would hide what the action caused
+    device.clock_offset = -30.0
+    device.log("before the action", level=6)
+    time.sleep(0.01)
+    assert adb.tap("emulator-5554", 10, 10)
+    assert adb.logcat_monitor._streams == {}
+
+    device.log("after the action", level=6)
+    report = adb.check_logcat("emulator-5554")
+    assert report.matched == 1 and "after the action" in report.entries[0]
+    assert adb.check_logcat("emulator-5554", since_last_action=False).matched == 1
+
+
+def test_check_logcat_accepts_level_names(fake_adb):
+    """Level names and lower case work; unknown levels are a tool error."""
+    from deepglm.exceptions import ToolExecutionError
+    from deepglm.tools import adb
+
+    device = fake_adb.devices["emulator-5554"]
+    adb.logcat_monitor.buffer("emulator-5554")
+    device.log("disk almost full", level=5)
+    assert _wait_for(lambda: adb.check_logcat("emulator-5554", min_level="w").matched == 1)
+    assert adb.check_logcat("emulator-5554", min_level="warning").matched == 1
+    assert adb.check_logcat("emulator-5554", min_level="Error").matched == 0
+    with pytest.raises(ToolExecutionError, match="Unknown log level"):
+        adb.check_logcat("emulator-5554", min_level="loud")
+
+
+def test_stop_ends_idle_reader_threads(fake_adb):
+    """Stopping the monitor wakes readers blocked on a quiet stream."""
+    from deepglm.tools import adb
+
+    adb.logcat_monitor.buffer("emulator-5554")
+    stream = adb.logcat_monitor._streams["emulator-5554"]
+    adb.logcat_monitor.stop()
+    stream._thread.join(2)
+    assert not stream.alive
@@ -0,0 +1,99 @@
+"""Test DeepGLM agent middleware."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _turn(*calls):
+    """Build a tool-call request factory for one model turn."""
+    from langchain_core.messages import AIMessage
+    from langgraph.prebuilt.tool_node import ToolCallRequest
+
+    tool_calls = [
+        {"name": name, "args": {"device_id": device}, "id": f"call_{i}", "type": "tool_call"}
+        for i, (name, device) in enumerate(calls)
+    ]
+    state = {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+    return [
+        ToolCallRequest(tool_call=call, tool=None, state=state, runtime=None)
+        for call in tool_calls
+    ]
+
+
+def test_mutating_calls_keep_order_per_device():
+    """Test that device calls run in emitted order while other devices overlap."""
+    from deepglm.middleware import ToolConcurrencyMiddleware
+
+    middleware = ToolConcurrencyMiddleware(mutating_tools=["tap", "swipe"])
+    requests = _turn(
+        ("tap", "a"),
+        ("swipe", "a"),
+        ("get_battery_level", "a"),
+        ("tap", "b"),
+        ("get_battery_level", "b"),
+    )
+    finished = []
+    lock = threading.Lock()
+
+    def handler(request):
+        # The first action is the slowest, so only ordering keeps it first
+        time.sleep(0.1 if request.tool_call["id"] == "call_0" else 0.01)
+        with lock:
+            finished.append(request.tool_call["id"])
+        return request.tool_call["id"]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        # Submit in reverse so the scheduler cannot rely on submission order
+        futures = [
+            executor.submit(middleware.wrap_tool_call, r, handler) for r in reversed(requests)
+        ]
+        results = [f.result() for f in futures]
+
+    assert sorted(results) == ["call_0", "call_1", "call_2", "call_3", "call_4"]
+    assert finished.index("call_0") < finished.index("call_1")
+    # A read sees the actions emitted before it on its device
+    assert finished.index("call_1") < finished.index("call_2")
+    assert finished.index("call_3") < finished.index("call_4")
+    # Other devices are not held back by device "a"
+    assert finished.index("call_3") < finished.index("call_0")
+    assert finished.index("call_4") < finished.index("call_0")
+    assert middleware._turns == {}
+
+
+def test_read_only_calls_pass_through():
+    """Test that tools not marked mutating are not tracked."""
+    from deepglm.middleware import ToolConcurrencyMiddleware
+
+    middleware = ToolConcurrencyMiddleware(mutating_tools=["tap"])
+    (request,) = _turn(("list_packages", "a"))
+    assert middleware.wrap_tool_call(request, lambda r: "ok") == "ok"
+    assert middleware._turns == {}
+
+
+def test_calls_answered_before_a_resume_are_not_waited_for():
+    """Test that only unanswered calls of a resumed turn are ordered."""
+    from langchain_core.messages import ToolMessage
+
+    from deepglm.middleware import ToolConcurrencyMiddleware
+
+    middleware = ToolConcurrencyMiddleware(mutating_tools=["tap"])
+    _, second = _turn(("tap", "a"), ("tap", "a"))
+    second.state["messages"].append(ToolMessage("ok", tool_call_id="call_0"))
+
+    start = time.monotonic()
+    assert middleware.wrap_tool_call(second, lambda r: "ok") == "ok"
+    assert time.monotonic() - start < 1
+    assert middleware._turns == {}
+
+
+def test_missing_earlier_call_does_not_hang_the_turn():
+    """Test that a call whose predecessor never runs goes ahead after the timeout."""
+    from deepglm.middleware import ToolConcurrencyMiddleware
+
+    middleware = ToolConcurrencyMiddleware(mutating_tools=["tap"], wait_timeout=0.05)
+    _, second = _turn(("tap", "a"), ("tap", "a"))
+
+    start = time.monotonic()
+    assert middleware.wrap_tool_call(second, lambda r: "ok") == "ok"
+    assert 0.05 <= time.monotonic() - start < 1
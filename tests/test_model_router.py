@@ -0,0 +1,200 @@
+"""Test multi-endpoint model routing against local mock servers."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _MockEndpoint:
+    """Minimal OpenAI-compatible chat completions server."""
+
+    def __init__(self, name: str, delay: float = 0.0, status: int = 200) -> None:
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.calls = 0
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                endpoint.calls += 1
+                time.sleep(endpoint.delay)
+                body = json.dumps(
+                    {
+                        "id": "chatcmpl-1",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "test_model",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": endpoint.name},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                    }
+                ).encode()
+                self.send_response(endpoint.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def endpoint(self):
+        from langchain_openai import ChatOpenAI
+
+        from deepglm.middleware import Endpoint
+
+        return Endpoint(
+            name=self.name,
+            model=ChatOpenAI(model="test_model", api_key="test_key", base_url=self.url, max_retries=0),
+        )
+
+
+@pytest.fixture
+def mock_endpoints():
+    """Start mock endpoints on demand and shut them down after the test."""
+    servers = []
+
+    def start(name, **kwargs):
+        server = _MockEndpoint(name, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.server.shutdown()
+
+
+def _invoke(router):
+    """Run one model call through the router, like the agent loop does."""
+    from langchain.agents.middleware import ModelRequest, ModelResponse
+    from langchain_core.messages import HumanMessage
+
+    request = ModelRequest(model=router.endpoints[0].model, messages=[HumanMessage("hi")])
+    response = router.wrap_model_call(
+        request, lambda r: ModelResponse(result=[r.model.invoke(r.messages)])
+    )
+    return response.result[0].content
+
+
+def test_routes_to_fastest_endpoint(mock_endpoints):
+    """Test that calls go to the endpoint with the lowest latency EWMA."""
+    from deepglm.middleware import ModelRouterMiddleware
+
+    slow = mock_endpoints("slow", delay=0.2)
+    fast = mock_endpoints("fast")
+    router = ModelRouterMiddleware([slow.endpoint(), fast.endpoint()])
+
+    # Both endpoints are measured once, then the fast one wins
+    assert {_invoke(router), _invoke(router)} == {"slow", "fast"}
+    assert [_invoke(router) for _ in range(3)] == ["fast"] * 3
+    assert slow.calls == 1
+
+
+def test_fails_over_and_marks_unhealthy(mock_endpoints):
+    """Test that errors fail over to the next endpoint and trip the cooldown."""
+    from deepglm.middleware import ModelRouterMiddleware
+
+    broken = mock_endpoints("broken", status=500)
+    backup = mock_endpoints("backup", delay=0.05)
+    router = ModelRouterMiddleware([broken.endpoint(), backup.endpoint()], alpha=0.6)
+
+    assert _invoke(router) == "backup"
+    assert router.ranked()[0].name == "backup"
+    assert _invoke(router) == "backup"
+    assert broken.calls == 1
+
+
+def test_request_errors_propagate_without_failover(mock_endpoints):
+    """Test that a 400 is raised at once and does not count against the endpoint."""
+    from openai import BadRequestError
+
+    from deepglm.middleware import ModelRouterMiddleware
+
+    rejecting = mock_endpoints("rejecting", status=400)
+    backup = mock_endpoints("backup")
+    router = ModelRouterMiddleware([rejecting.endpoint(), backup.endpoint()])
+
+    with pytest.raises(BadRequestError):
+        _invoke(router)
+    assert backup.calls == 0
+    assert router.endpoints[0].error_rate == 0.0
+
+
+def test_each_endpoint_gets_its_api_key(monkeypatch):
+    """Test that OPENAI_API_KEYS entries pair with OPENAI_BASE_URLS by position."""
+    from deepglm.agents.main_agent import _build_endpoints
+    from deepglm.config import settings
+
+    monkeypatch.setattr(settings, "OPENAI_BASE_URLS", ["http://a/v1", "http://b/v1|m", "http://c/v1"])
+    monkeypatch.setattr(settings, "OPENAI_API_KEYS", ["key_a", ""])
+    keys = [e.model.openai_api_key.get_secret_value() for e in _build_endpoints()]
+    assert keys == ["test_key", "key_a", "test_key", "test_key"]
+
+
+def test_hedges_slow_primary(mock_endpoints):
+    """Test that a request slower than the latency percentile is hedged."""
+    from deepglm.middleware import ModelRouterMiddleware
+
+    primary = mock_endpoints("primary")
+    backup = mock_endpoints("backup", delay=0.1)
+    router = ModelRouterMiddleware(
+        [primary.endpoint(), backup.endpoint()], hedge_percentile=0.9, min_hedge_samples=3
+    )
+    for _ in range(4):
+        assert _invoke(router) in ("primary", "backup")
+    assert router.ranked()[0].name == "primary"
+
+    # The primary stalls; the hedge to the backup answers first
+    primary.delay = 1.0
+    start = time.monotonic()
+    assert _invoke(router) == "backup"
+    assert time.monotonic() - start < 0.8
+
+
+def _ainvoke(router):
+    """Async version of _invoke."""
+    import asyncio
+
+    from langchain.agents.middleware import ModelRequest, ModelResponse
+    from langchain_core.messages import HumanMessage
+
+    async def handler(request):
+        return ModelResponse(result=[await request.model.ainvoke(request.messages)])
+
+    request = ModelRequest(model=router.endpoints[0].model, messages=[HumanMessage("hi")])
+    response = asyncio.run(router.awrap_model_call(request, handler))
+    return response.result[0].content
+
+
+@pytest.mark.parametrize("invoke", [_invoke, _ainvoke])
+def test_failover_skips_endpoint_used_as_hedge(mock_endpoints, invoke):
+    """Test that an endpoint that already failed as the hedge is not called again."""
+    from deepglm.middleware import ModelRouterMiddleware
+
+    primary = mock_endpoints("primary")
+    backup = mock_endpoints("backup", delay=0.1)
+    router = ModelRouterMiddleware(
+        [primary.endpoint(), backup.endpoint()], hedge_percentile=0.9, min_hedge_samples=3
+    )
+    for _ in range(4):
+        invoke(router)
+
+    # The primary stalls and both endpoints fail: each is called once
+    primary.delay, primary.status, backup.status = 0.3, 500, 500
+    calls = (primary.calls, backup.calls)
+    with pytest.raises(Exception):
+        invoke(router)
+    assert (primary.calls, backup.calls) == (calls[0] + 1, calls[1] + 1)
@@ -0,0 +1,124 @@
+"""Test background observation prefetching."""
+
+import threading
+
+
+def _prefetcher(settled=True):
+    from deepglm.tools.prefetch import Observation, ObservationPrefetcher
+
+    captures = []
+
+    def observe(device_id, current):
+        captures.append(device_id)
+        return Observation(screen_png=b"png", hierarchy="<hierarchy/>", settled=settled)
+
+    return ObservationPrefetcher(observe), captures
+
+
+def test_prefetched_observation_is_served_once_per_kind():
+    """Test that a prefetched capture serves one screen and one hierarchy read."""
+    prefetcher, captures = _prefetcher()
+    prefetcher.schedule("emulator-5554")
+
+    assert prefetcher.take("emulator-5554", "screen").screen_png == b"png"
+    assert prefetcher.take("emulator-5554", "hierarchy").hierarchy == "<hierarchy/>"
+    assert prefetcher.take("emulator-5554", "screen") is None
+    assert captures == ["emulator-5554"]
+
+
+def test_new_action_discards_prefetch():
+    """Test that invalidation drops the observation for that device only."""
+    prefetcher, _ = _prefetcher()
+    prefetcher.schedule("a")
+    prefetcher.schedule("b")
+    prefetcher.invalidate("a")
+
+    assert prefetcher.take("a", "screen") is None
+    assert prefetcher.take("b", "screen") is not None
+
+
+def test_unsettled_capture_is_not_used():
+    """Test that a capture taken before the UI settled is discarded."""
+    prefetcher, _ = _prefetcher(settled=False)
+    prefetcher.schedule("a")
+    assert prefetcher.take("a", "screen") is None
+
+
+def test_capture_screen_uses_prefetch(monkeypatch, tmp_path):
+    """Test that capture_screen skips the device when a prefetch is ready."""
+    from deepglm.tools import adb
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    prefetcher, _ = _prefetcher()
+    store = ScreenshotStore(str(tmp_path))
+    monkeypatch.setattr(adb, "observation_prefetcher", prefetcher)
+    monkeypatch.setattr(adb, "screenshot_store", store)
+    monkeypatch.setattr(adb, "_capture_png", lambda device_id: b"fresh")
+
+    prefetcher.schedule("a")
+    with open(adb.capture_screen("a"), "rb") as f:
+        assert f.read() == b"png"
+    with open(adb.capture_screen("a"), "rb") as f:
+        assert f.read() == b"fresh"
+
+
+def test_middleware_prefetches_after_mutating_actions():
+    """Test that the middleware prefetches after actions, not after reads."""
+    from langgraph.prebuilt.tool_node import ToolCallRequest
+
+    from deepglm.middleware import PerceptionPrefetchMiddleware
+
+    prefetcher, captures = _prefetcher()
+    done = threading.Event()
+    middleware = PerceptionPrefetchMiddleware(prefetcher, mutating_tools=["tap"])
+
+    def request(name):
+        call = {"name": name, "args": {"device_id": "a"}, "id": name, "type": "tool_call"}
+        return ToolCallRequest(tool_call=call, tool=None, state={}, runtime=None)
+
+    middleware.wrap_tool_call(request("list_packages"), lambda r: done.set())
+    assert prefetcher.take("a", "screen") is None
+    middleware.wrap_tool_call(request("tap"), lambda r: done.set())
+    assert prefetcher.take("a", "screen") is not None
+    assert captures == ["a"]
+
+
+def test_invalidated_capture_stops_between_steps():
+    """Test that an in-flight capture stops once a new action made it stale."""
+    from deepglm.tools.prefetch import ObservationPrefetcher
+
+    steps = []
+    started = threading.Event()
+    resume = threading.Event()
+
+    def observe(device_id, current):
+        steps.append("idle")
+        started.set()
+        resume.wait(timeout=5)
+        if not current():
+            return None
+        steps.append("screencap")
+        return None
+
+    prefetcher = ObservationPrefetcher(observe)
+    prefetcher.schedule("a")
+    future = prefetcher._slots["a"].future
+    assert started.wait(timeout=5)
+    prefetcher.invalidate("a")
+    resume.set()
+
+    assert future.result(timeout=5) is None
+    assert steps == ["idle"]
+
+
+def test_stale_observe_skips_device_captures(monkeypatch):
+    """Test that adb's observer skips screencap and dump once stale."""
+    from deepglm.tools import adb
+
+    calls = []
+    monkeypatch.setattr(adb, "wait_for_idle", lambda device_id, **kwargs: True)
+    monkeypatch.setattr(adb, "_capture_png", lambda device_id: calls.append("screencap"))
+    monkeypatch.setattr(adb, "_dump_hierarchy", lambda device_id: calls.append("dump"))
+
+    assert adb._observe("a", lambda: False) is None
+    assert calls == []
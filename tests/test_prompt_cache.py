@@ -0,0 +1,110 @@
+"""Test prompt-cache-aware request layout and cache-hit reporting."""
+
+
+def _run_agent(monkeypatch, server_url: str, compact: bool):
+    """Run a three-step task and return the model spans."""
+    from deepglm.agents.main_agent import create_android_agent
+    from deepglm.config import settings
+    from deepglm.middleware import TracingMiddleware
+
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", server_url)
+    monkeypatch.setattr(settings, "COMPACT_TOOL_DESCRIPTIONS", compact)
+    tracer = TracingMiddleware(None)
+    agent = create_android_agent(middleware=[tracer])
+    agent.invoke({"messages": [{"role": "user", "content": "Check [device:emulator-5554]"}]})
+    return [span for span in tracer.spans if span.kind == "model"]
+
+
+def test_agent_prefix_is_served_from_cache(fake_adb, monkeypatch):
+    """Test that every step after the first reuses the system prompt and tools."""
+    from deepglm.testing import MockOpenAIServer
+
+    script = [
+        [{"name": "get_battery_level", "args": {"device_id": "{device_id}"}}],
+        [{"name": "press_key", "args": {"device_id": "{device_id}", "key_code": "KEYCODE_BACK"}}],
+        "Done.",
+    ]
+    with MockOpenAIServer(script) as server:
+        spans = _run_agent(monkeypatch, server.url, compact=False)
+    with MockOpenAIServer(script) as server:
+        compact_spans = _run_agent(monkeypatch, server.url, compact=True)
+
+    first, *later = spans
+    assert first.attributes["cached_tokens"] == 0
+    for previous, span in zip(spans, later):
+        # Everything up to the end of the previous request is a cache hit
+        assert span.attributes["cached_tokens"] >= previous.attributes["prompt_tokens"] - 64
+    assert compact_spans[0].attributes["prompt_tokens"] < first.attributes["prompt_tokens"]
+
+
+def test_prompt_cache_middleware_reports_prefix_changes():
+    """Test that a changed system prompt is counted and cache usage recorded."""
+    from langchain.agents.middleware import ModelRequest, ModelResponse
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from deepglm.middleware import PromptCacheMiddleware, compact_tool
+    from deepglm.tools import adb
+
+    middleware = PromptCacheMiddleware("test")
+    tools = [compact_tool(adb.tap)]
+
+    def handler(request):
+        usage = {
+            "input_tokens": 1000,
+            "output_tokens": 10,
+            "total_tokens": 1010,
+            "input_token_details": {"cache_read": 768},
+        }
+        return ModelResponse(result=[AIMessage("ok", usage_metadata=usage)])
+
+    for prompt in ("You operate devices.", "You operate devices.", "Now at 12:00."):
+        request = ModelRequest(
+            model=None, messages=[HumanMessage("hi")], system_prompt=prompt, tools=tools
+        )
+        middleware.wrap_model_call(request, handler)
+
+    assert middleware.prefix_changes == 1
+    assert [call.cached_tokens for call in middleware.calls] == [768, 768, 768]
+    assert middleware.hit_ratio == 0.768
+
+
+def test_compact_tool_keeps_summary_returns_and_arg_schema():
+    """Test that compact descriptions drop prose but keep argument docs in the schema."""
+    from deepglm.middleware import compact_tool
+    from deepglm.tools import adb
+
+    scroll = compact_tool(adb.scroll_to)
+    assert scroll.description.startswith("Scroll the largest scrollable view")
+    assert "Returns: (x, y) center of the element" in scroll.description
+    assert "hierarchy dump" not in scroll.description
+    assert "Raises" not in scroll.description
+    properties = scroll.tool_call_schema.model_json_schema()["properties"]
+    assert "down" in properties["direction"]["description"]
+
+
+def test_schema_cache_follows_tool_lifetime():
+    """Test that cached tool schemas are dropped with the tool and not reused."""
+    import gc
+
+    from langchain_core.tools import tool
+
+    from deepglm.middleware import PromptCacheMiddleware
+
+    middleware = PromptCacheMiddleware("test")
+
+    def make(doc):
+        def lookup(query: str) -> str:
+            return query
+
+        lookup.__doc__ = doc
+        return tool(lookup)
+
+    first = make("Look up a value.")
+    assert "Look up a value." in middleware._schema(first)
+    del first
+    gc.collect()
+    assert middleware._schemas == {}
+
+    second = make("Find a record.")
+    assert "Find a record." in middleware._schema(second)
+    assert middleware._schema({"name": "raw", "parameters": {}}) != middleware._schema(second)
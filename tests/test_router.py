@@ -0,0 +1,90 @@
+"""Test the deterministic fast-path intent router."""
+
+import pytest
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """Create a router bound to a stubbed single-device adb layer."""
+    from deepglm.agents import router as router_module
+
+    calls = []
+    adb = router_module.adb
+    monkeypatch.setattr(adb, "get_devices", lambda: ["emulator-5554"])
+    monkeypatch.setattr(
+        adb,
+        "list_packages",
+        lambda device_id: [
+            "com.android.settings",
+            "com.android.providers.settings",
+            "com.google.android.youtube",
+        ],
+    )
+    monkeypatch.setattr(
+        adb,
+        "press_key",
+        lambda device_id, key_code, wait_idle=False: calls.append(("press_key", key_code)) or True,
+    )
+    monkeypatch.setattr(
+        adb,
+        "launch_app",
+        lambda device_id, package, wait_idle=False: calls.append(("launch_app", package)) or True,
+    )
+    monkeypatch.setattr(adb, "get_battery_level", lambda device_id: 64)
+    instance = router_module.IntentRouter()
+    instance.calls = calls
+    return instance
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("go home", ("press_key", "KEYCODE_HOME")),
+        ("Please press back.", ("press_key", "KEYCODE_BACK")),
+        ("open Settings", ("launch_app", "com.android.settings")),
+        ("launch the YouTube app", ("launch_app", "com.google.android.youtube")),
+    ],
+)
+def test_simple_commands_bypass_agent(router, query, expected):
+    """Test that trivial commands run the matching tool directly."""
+    assert router.route(query) is not None
+    assert router.calls == [expected]
+
+
+def test_battery_query(router):
+    """Test that battery questions are answered from get_battery_level."""
+    assert router.route("battery level?") == "Battery level on emulator-5554 is 64%."
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "open the app that plays music",
+        "open maps",
+        "go home and then open settings",
+        "what apps are installed?",
+    ],
+)
+def test_other_requests_fall_through(router, query):
+    """Test that anything not fully understood falls through to the agent."""
+    assert router.route(query) is None
+    assert router.calls == []
+
+
+def test_no_fast_path_with_multiple_devices(router, monkeypatch):
+    """Test that the router does not guess a device."""
+    from deepglm.agents import router as router_module
+
+    monkeypatch.setattr(router_module.adb, "get_devices", lambda: ["a", "b"])
+    assert router.route("go home") is None
+
+
+def test_transport_errors_fall_back_to_agent(router, monkeypatch):
+    """Test that a dropped adb connection hands the request to the agent."""
+    from deepglm.agents import router as router_module
+
+    def refuse(device_id):
+        raise ConnectionRefusedError("adb server is not running")
+
+    monkeypatch.setattr(router_module.adb, "get_battery_level", refuse)
+    assert router.route("battery level?") is None
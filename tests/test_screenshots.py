@@ -0,0 +1,115 @@
+"""Test the content-addressed screenshot store."""
+
+import os
+import time
+import zlib
+
+
+def _png(shade: int, width: int = 64, height: int = 64) -> bytes:
+    from deepglm.testing.fake_adb import encode_png
+
+    return encode_png(width, height, bytes((shade, shade, shade, 255)) * (width * height))
+
+
+def _pixels(png: bytes) -> bytes:
+    """Decompressed data of a single-IDAT PNG, to compare images across encodings."""
+    start = png.index(b"IDAT") + 4
+    length = int.from_bytes(png[start - 8:start - 4], "big")
+    return zlib.decompress(png[start:start + length])
+
+
+def test_duplicate_frames_are_stored_once(tmp_path):
+    """Test that identical frames share one key and one file."""
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    store = ScreenshotStore(str(tmp_path))
+    keys = [store.put(_png(10)), store.put(_png(10)), store.put(_png(20))]
+    assert store.flush(timeout=5)
+
+    assert keys[0] == keys[1] != keys[2]
+    assert store.stats()["frames"] == 2 and store.dedup_hits == 1
+    assert sorted(os.listdir(tmp_path / keys[0][:2])) == [f"{keys[0]}.png"]
+
+
+def test_frames_are_recompressed_and_read_back(tmp_path):
+    """Test that background recompression keeps pixels and mmap reads work."""
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    original = _png(30, width=256, height=256)
+    store = ScreenshotStore(str(tmp_path))
+    key = store.put(original)
+    assert store.read(key) == original  # served from memory while pending
+    store.flush(timeout=5)
+
+    stored = store.read(key)
+    assert len(stored) <= len(original)
+    assert _pixels(stored) == _pixels(original)
+    with store.open(key) as view:
+        assert view[:4] == b"\x89PNG"
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    """Test that the oldest frames go first and expired frames are removed."""
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    store = ScreenshotStore(str(tmp_path), compress_level=0)
+    keys = []
+    for shade in range(4):
+        keys.append(store.put(_png(shade)))
+        store.flush(timeout=5)
+
+    # Reading a frame marks it as recently used
+    store.read(keys[0])
+    store.max_bytes = os.path.getsize(store.path(keys[0])) + os.path.getsize(store.path(keys[3]))
+    assert store.evict() == 2
+    assert keys[0] in store and keys[3] in store
+    assert keys[1] not in store and not os.path.exists(store.path(keys[1]))
+
+    # A fresh store picks up the remaining frames from disk
+    reloaded = ScreenshotStore(str(tmp_path), max_age=60)
+    assert reloaded.stats()["frames"] == 2
+    assert reloaded.evict(now=time.time() + 120) == 2
+    assert reloaded.stats() == {"frames": 0, "bytes": 0, "pending": 0, "dedup_hits": 0}
+
+
+def test_saved_frames_are_on_disk_and_expire_on_write(tmp_path):
+    """Test that save() returns a written file and writes evict expired frames."""
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    store = ScreenshotStore(str(tmp_path), compress_level=0)
+    old = store.save(_png(40))
+    with open(old, "rb") as f:
+        assert f.read() == _png(40)
+
+    # Within the size budget, but the first frame is past the maximum age
+    os.utime(old, (0, 0))
+    reloaded = ScreenshotStore(str(tmp_path), max_age=60, compress_level=0)
+    new = reloaded.save(_png(50))
+    assert reloaded.flush(timeout=5)
+    assert os.path.exists(new) and not os.path.exists(old)
+    assert reloaded.stats()["frames"] == 1
+
+
+def test_save_writes_at_once_and_recompresses_later(tmp_path):
+    """Test that save() does not wait for recompression and reuse survives a restart."""
+    from deepglm.tools.screenshots import ScreenshotStore
+
+    original = _png(60, width=256, height=256)
+    store = ScreenshotStore(str(tmp_path))
+    path = store.save(original)
+    assert os.path.getsize(path) <= len(original)  # on disk at once, either version
+    assert store.flush(timeout=5)
+    with open(path, "rb") as f:
+        stored = f.read()
+    assert len(stored) < len(original) and _pixels(stored) == _pixels(original)
+    assert store.stats()["bytes"] == len(stored)
+
+    # Reusing a frame moves its mtime, so a fresh store evicts the other one first
+    other = store.save(_png(70))
+    store.flush(timeout=5)
+    os.utime(path, (0, 0))
+    os.utime(other, (1, 1))
+    assert store.save(original) == path
+    reloaded = ScreenshotStore(str(tmp_path), max_bytes=os.path.getsize(path))
+    assert reloaded.evict() == 1
+    assert os.path.exists(path) and not os.path.exists(other)
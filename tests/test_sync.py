@@ -0,0 +1,75 @@
+"""Test delta directory sync over the adb sync protocol."""
+
+import os
+
+
+def _tree(root, files):
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+
+def _sends(device):
+    return [path for command, path in device.sync_requests if command == "SEND"]
+
+
+def test_push_dir_sends_only_changed_files(fake_adb, tmp_path):
+    """Test that unchanged files are skipped by size/mtime, then by hash."""
+    from deepglm.tools.adb_client import AdbClient
+    from deepglm.tools.sync import DirectorySync
+
+    device = fake_adb.devices["emulator-5554"]
+    local = tmp_path / "fixtures"
+    _tree(local, {"a.txt": b"alpha", "media/b.bin": os.urandom(200_000), "media/c.txt": b"c"})
+    sync = DirectorySync(AdbClient, manifest_dir=str(tmp_path / "manifests"), workers=2)
+
+    first = sync.push_dir("emulator-5554", str(local), "/sdcard/fixtures")
+    assert first.transferred == ["a.txt", "media/b.bin", "media/c.txt"]
+    assert device.files["/sdcard/fixtures/media/b.bin"][0] == (local / "media/b.bin").read_bytes()
+
+    # Nothing changed: no file is sent
+    device.sync_requests.clear()
+    assert sync.push_dir("emulator-5554", str(local), "/sdcard/fixtures").skipped == 3
+    assert _sends(device) == []
+
+    # A content change is sent; a touched but identical file is hashed and skipped
+    (local / "a.txt").write_bytes(b"ALPHA!")
+    os.utime(local / "media/c.txt", (1_000_000, 1_000_000))
+    result = sync.push_dir("emulator-5554", str(local), "/sdcard/fixtures")
+    assert result.transferred == ["a.txt"] and result.skipped == 2
+    assert [c for c in device.commands if c.startswith("sha256sum")] == [
+        "sha256sum /sdcard/fixtures/media/c.txt"
+    ]
+
+    # The remote hash is now in the manifest cache, also for a new process
+    device.commands.clear()
+    fresh = DirectorySync(AdbClient, manifest_dir=str(tmp_path / "manifests"))
+    assert fresh.push_dir("emulator-5554", str(local), "/sdcard/fixtures").transferred == []
+    assert device.commands == []
+
+
+def test_pull_dir_receives_only_changed_files(fake_adb, tmp_path):
+    """Test that pulled files keep device mtimes, so a second pull is a no-op."""
+    from deepglm.tools.adb_client import AdbClient
+    from deepglm.tools.sync import DirectorySync
+
+    device = fake_adb.devices["emulator-5554"]
+    device.files.update(
+        {
+            "/sdcard/out/log.txt": (b"log", 0o100644, 1_700_000_000),
+            "/sdcard/out/shots/1.png": (b"png", 0o100644, 1_700_000_100),
+        }
+    )
+    sync = DirectorySync(AdbClient)
+    local = tmp_path / "out"
+
+    first = sync.pull_dir("emulator-5554", "/sdcard/out", str(local))
+    assert first.transferred == ["log.txt", "shots/1.png"]
+    assert (local / "shots" / "1.png").read_bytes() == b"png"
+    assert int(os.stat(local / "log.txt").st_mtime) == 1_700_000_000
+
+    device.files["/sdcard/out/log.txt"] = (b"log2", 0o100644, 1_700_000_200)
+    second = sync.pull_dir("emulator-5554", "/sdcard/out", str(local))
+    assert second.transferred == ["log.txt"] and second.skipped == 1
+    assert (local / "log.txt").read_bytes() == b"log2"
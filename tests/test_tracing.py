@@ -0,0 +1,90 @@
+"""Test span recording and export in the tracing middleware."""
+
+import json
+
+
+def test_agent_run_is_traced_to_chrome_format(fake_adb, monkeypatch, tmp_path):
+    """Test that model and tool spans reach a Chrome trace with tokens and TTFT."""
+    from deepglm.agents.main_agent import create_android_agent
+    from deepglm.config import settings
+    from deepglm.testing import MockOpenAIServer
+
+    script = [
+        [{"name": "get_battery_level", "args": {"device_id": "{device_id}"}}],
+        "Battery is at 80%.",
+    ]
+    trace_path = tmp_path / "trace.json"
+    with MockOpenAIServer(script, latency=0.01) as server:
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.url)
+        monkeypatch.setattr(settings, "TRACE_PATH", str(trace_path))
+        agent = create_android_agent()
+        agent.invoke({"messages": [{"role": "user", "content": "battery? [device:emulator-5554]"}]})
+
+    events = json.loads(trace_path.read_text().rstrip().rstrip(",") + "]")
+    assert [(e["cat"], e["name"]) for e in events] == [
+        ("model", "test_model"),
+        ("tool", "get_battery_level"),
+        ("model", "test_model"),
+    ]
+    model, tool, _ = events
+    assert model["args"]["prompt_tokens"] > 0 and model["args"]["completion_tokens"] > 0
+    assert 0 < model["args"]["ttft"] <= model["dur"] / 1e6
+    assert tool["args"]["module"] == "adb"
+    assert tool["args"]["device_id"] == "emulator-5554"
+    assert tool["args"]["status"] == "success"
+
+
+def test_vision_tools_are_traced(fake_adb, monkeypatch):
+    """Test that vision tool calls get spans attributed to the vision module."""
+    from deepglm.agents.main_agent import create_android_agent
+    from deepglm.config import settings
+    from deepglm.middleware import TracingMiddleware
+    from deepglm.testing import MockOpenAIServer
+
+    script = [
+        [{"name": "detect_ui_elements", "args": {"device_id": "{device_id}"}}],
+        "No known elements.",
+    ]
+    tracer = TracingMiddleware(None)
+    with MockOpenAIServer(script) as server:
+        monkeypatch.setattr(settings, "OPENAI_BASE_URL", server.url)
+        agent = create_android_agent(middleware=[tracer])
+        agent.invoke({"messages": [{"role": "user", "content": "look [device:emulator-5554]"}]})
+
+    (span,) = [span for span in tracer.spans if span.kind == "tool"]
+    assert span.name == "detect_ui_elements"
+    assert span.attributes["module"] == "vision"
+    assert span.attributes["device_id"] == "emulator-5554"
+
+
+def test_subagent_hop_parents_nested_spans(tmp_path):
+    """Test that spans inside a subagent hop point at the hop and export as JSONL."""
+    from langchain_core.messages import ToolMessage
+
+    from deepglm.middleware import TracingMiddleware
+    from deepglm.middleware.tracing import SUBAGENT_TOOL
+
+    tracer = TracingMiddleware(str(tmp_path / "trace.jsonl"), profile_tools=["slow_tool"])
+
+    class Request:
+        def __init__(self, name, args):
+            self.tool_call = {"name": name, "args": args, "id": name}
+            self.tool = None
+
+    def slow_tool(request):
+        import time
+
+        time.sleep(0.05)
+        return ToolMessage("ok", tool_call_id=request.tool_call["id"])
+
+    def task(request):
+        return tracer.wrap_tool_call(Request("slow_tool", {"device_id": "d1"}), slow_tool)
+
+    tracer.wrap_tool_call(Request(SUBAGENT_TOOL, {"subagent_type": "android-operator"}), task)
+    tracer.close()
+
+    inner, hop = [json.loads(line) for line in (tmp_path / "trace.jsonl").read_text().splitlines()]
+    assert hop["kind"] == "subagent" and hop["attributes"]["subagent"] == "android-operator"
+    assert inner["parent_id"] == hop["span_id"]
+    assert sum(inner["attributes"]["profile"].values()) > 0
+    assert tracer.summary()["tool:slow_tool"]["count"] == 1
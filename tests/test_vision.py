@@ -0,0 +1,124 @@
+"""Tests for local template matching in the vision tools."""
+
+import struct
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _png_with_filters(gray):
+    """Encode a grayscale image, cycling through all five PNG row filters."""
+    height, width = gray.shape
+    raw = b""
+    previous = np.zeros(width, dtype=np.int64)
+    for y in range(height):
+        row = gray[y].astype(np.int64)
+        left = np.concatenate(([0], row[:-1]))
+        corner = np.concatenate(([0], previous[:-1]))
+        kind = y % 5
+        if kind == 1:
+            filtered = row - left
+        elif kind == 2:
+            filtered = row - previous
+        elif kind == 3:
+            filtered = row - (left + previous) // 2
+        elif kind == 4:
+            p = left + previous - corner
+            pa, pb, pc = abs(p - left), abs(p - previous), abs(p - corner)
+            predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, previous, corner))
+            filtered = row - predictor
+        else:
+            filtered = row
+        raw += bytes([kind]) + bytes((filtered & 0xFF).astype(np.uint8))
+        previous = row
+
+    def chunk(kind, data):
+        crc = struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        return struct.pack(">I", len(data)) + kind + data + crc
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _screen_with(patches, width=1080, height=2400):
+    """RGBA bytes of a smooth background with grayscale patches pasted in."""
+    ys, xs = np.mgrid[0:height, 0:width]
+    gray = 120 + 40 * np.sin(xs / 97.0) * np.cos(ys / 131.0)
+    for x, y, patch in patches:
+        gray[y:y + patch.shape[0], x:x + patch.shape[1]] = patch
+    gray = gray.astype(np.uint8)
+    rgba = np.stack([gray, gray, gray, np.full_like(gray, 255)], axis=-1)
+    return rgba.tobytes()
+
+
+def _icon(size=96):
+    """A distinctive checkerboard-with-ring icon."""
+    ys, xs = np.mgrid[0:size, 0:size]
+    icon = np.where(((xs // 16) + (ys // 16)) % 2 == 0, 30.0, 220.0)
+    ring = np.abs(np.hypot(xs - size / 2, ys - size / 2) - size / 3) < 4
+    icon[ring] = 128.0
+    return icon
+
+
+def test_decode_png_gray_handles_all_filters():
+    """Rows using None, Sub, Up, Average and Paeth filters decode exactly."""
+    from deepglm.testing.fake_adb import encode_png
+    from deepglm.tools.vision import decode_png_gray
+
+    gray = (np.arange(23 * 17).reshape(17, 23) * 37 % 256).astype(np.uint8)
+    assert np.array_equal(decode_png_gray(_png_with_filters(gray)), gray)
+
+    rgba = bytes((10, 20, 30, 255)) * 12
+    decoded = decode_png_gray(encode_png(4, 3, rgba))
+    assert decoded.shape == (3, 4)
+    assert decoded[0, 0] == pytest.approx(0.299 * 10 + 0.587 * 20 + 0.114 * 30)
+
+
+def test_template_matcher_finds_scaled_icon_and_caches():
+    """Matches are found at native and enlarged scale, and cached per screen."""
+    from deepglm.tools.vision import TemplateMatcher, _resize
+
+    icon = _icon()
+    big = _resize(icon, 120, 120)
+    rgba = _screen_with([(200, 1500, icon), (700, 300, big)])
+
+    matcher = TemplateMatcher()
+    matcher.add("permissions/allow", icon)
+    elements = matcher.match(1080, 2400, rgba)
+
+    assert [e.label for e in elements] == ["permissions/allow"] * 2
+    by_x = sorted(elements, key=lambda e: e.bounds[0])
+    assert all(abs(a - b) <= 12 for a, b in zip(by_x[0].bounds, (200, 1500, 296, 1596)))
+    assert all(abs(a - b) <= 12 for a, b in zip(by_x[1].bounds, (700, 300, 820, 420)))
+    assert min(e.confidence for e in elements) > 0.85
+
+    assert matcher.match(1080, 2400, rgba) == elements
+    assert matcher.cache_hits == 1
+    assert matcher.match(1080, 2400, _screen_with([])) == []
+
+
+def test_capture_and_analyze_uses_templates_first(monkeypatch):
+    """Known elements are answered locally; other screens report no match."""
+    from deepglm.tools import adb, vision
+
+    matcher = vision.TemplateMatcher()
+    matcher.add("keyboard/enter", _icon())
+    monkeypatch.setattr(vision, "_matcher", matcher)
+    screens = iter([_screen_with([(500, 2000, _icon())]), _screen_with([])])
+    monkeypatch.setattr(adb, "_capture_raw_screen", lambda device_id: (1080, 2400, next(screens)))
+
+    result = vision.capture_and_analyze("emulator-5554", "Is the keyboard open?")
+    assert result.elements[0].label == "keyboard/enter"
+    assert result.confidence > 0.85
+    assert "keyboard/enter at" in result.summary
+
+    result = vision.capture_and_analyze("emulator-5554", "Is the keyboard open?")
+    assert result.elements == [] and result.confidence == 0.0
+    assert result.summary == "No known UI elements found on the screen."